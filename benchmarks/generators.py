@@ -0,0 +1,122 @@
+"""
+Generators of synthetic knowledge sources and input tables of configurable
+size for the benchmarks.
+"""
+import datetime
+import random
+
+import pandas as pd
+
+EX = 'http://example.org/bench/'
+RDF_TYPE = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+RDFS_LABEL = '<http://www.w3.org/2000/01/rdf-schema#label>'
+RDFS_DOMAIN = '<http://www.w3.org/2000/01/rdf-schema#domain>'
+RDFS_RANGE = '<http://www.w3.org/2000/01/rdf-schema#range>'
+RDFS_SUBCLASS_OF = '<http://www.w3.org/2000/01/rdf-schema#subClassOf>'
+OWL_CLASS = '<http://www.w3.org/2002/07/owl#Class>'
+OWL_OBJECT_PROPERTY = '<http://www.w3.org/2002/07/owl#ObjectProperty>'
+OWL_DATATYPE_PROPERTY = '<http://www.w3.org/2002/07/owl#DatatypeProperty>'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+_DATATYPES = ['integer', 'double', 'string', 'date']
+
+
+def _get_literal(datatype: str, rnd: random.Random) -> str:
+    if datatype == 'integer':
+        value = str(rnd.randint(0, 100000))
+    elif datatype == 'double':
+        value = f'{rnd.gauss(50, 20):.4f}'
+    elif datatype == 'string':
+        value = ''.join(rnd.choices('abcdefghijklmnopqrstuvwxyz ', k=rnd.randint(3, 30)))
+    else:
+        value = (datetime.date(2000, 1, 1) + datetime.timedelta(days=rnd.randint(0, 9000))).isoformat()
+
+    return f'"{value}"^^<{XSD}{datatype}>'
+
+
+def write_knowledge_source(
+        file_path: str,
+        num_classes: int = 20,
+        num_properties: int = 40,
+        num_instances: int = 5000,
+        seed: int = 0
+) -> int:
+    """
+    Writes an N-Triples knowledge source with a class hierarchy, object and
+    datatype properties with domains and ranges and typed instances using
+    them. Returns the number of triples written.
+    """
+    rnd = random.Random(seed)
+    num_triples = 0
+
+    with open(file_path, 'w') as file:
+        def write(s: str, p: str, o: str) -> None:
+            nonlocal num_triples
+            file.write(f'{s} {p} {o} .\n')
+            num_triples += 1
+
+        classes = [f'<{EX}Class{i}>' for i in range(num_classes)]
+        for i, cls in enumerate(classes):
+            write(cls, RDF_TYPE, OWL_CLASS)
+            if i > 0:
+                write(cls, RDFS_SUBCLASS_OF, classes[rnd.randrange(i)])
+
+        # class index -> (property, range class or datatype)
+        class_properties = {i: [] for i in range(num_classes)}
+        for i in range(num_properties):
+            prop = f'<{EX}property{i}>'
+            domain_idx = rnd.randrange(num_classes)
+            write(prop, RDFS_DOMAIN, classes[domain_idx])
+
+            if i % 3 == 0:
+                range_idx = rnd.randrange(num_classes)
+                write(prop, RDF_TYPE, OWL_OBJECT_PROPERTY)
+                write(prop, RDFS_RANGE, classes[range_idx])
+                class_properties[domain_idx].append((prop, range_idx))
+            else:
+                datatype = _DATATYPES[i % len(_DATATYPES)]
+                write(prop, RDF_TYPE, OWL_DATATYPE_PROPERTY)
+                write(prop, RDFS_RANGE, f'<{XSD}{datatype}>')
+                class_properties[domain_idx].append((prop, datatype))
+
+        instances_per_class = {i: [] for i in range(num_classes)}
+        for i in range(num_instances):
+            class_idx = rnd.randrange(num_classes)
+            instances_per_class[class_idx].append(f'<{EX}instance{i}>')
+
+        for class_idx, instances in instances_per_class.items():
+            for instance in instances:
+                write(instance, RDF_TYPE, classes[class_idx])
+                write(instance, RDFS_LABEL, f'"{instance[len(EX) + 1:-1]}"@en')
+
+                for prop, rnge in class_properties[class_idx]:
+                    if isinstance(rnge, int):
+                        targets = instances_per_class[rnge]
+                        if targets:
+                            write(instance, prop, rnd.choice(targets))
+                    else:
+                        write(instance, prop, _get_literal(rnge, rnd))
+
+    return num_triples
+
+
+def get_input_table(num_rows: int = 10000, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns a table like the input files to be mapped: an ID column followed
+    by integer, float, string and date columns
+    """
+    rnd = random.Random(seed)
+
+    return pd.DataFrame({
+        'id': [f'row{i}' for i in range(num_rows)],
+        'count': [rnd.randint(0, 100000) for _ in range(num_rows)],
+        'measure': [rnd.gauss(50, 20) for _ in range(num_rows)],
+        'name': [
+            ''.join(rnd.choices('abcdefghijklmnopqrstuvwxyz ', k=rnd.randint(3, 30)))
+            for _ in range(num_rows)
+        ],
+        'date': [
+            (datetime.date(2000, 1, 1) + datetime.timedelta(days=rnd.randint(0, 9000))).isoformat()
+            for _ in range(num_rows)
+        ]
+    })
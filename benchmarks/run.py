@@ -0,0 +1,296 @@
+"""
+End-to-end benchmark of the labeling and modeling pipeline on synthetic data.
+
+Each stage (loading the knowledge source, building its columns, inferring the
+input columns, matching them, building the graph and solving the Steiner tree
+problem) is timed separately. The results contain the best wall time of all
+repetitions, the throughput in items (triples, columns, rows, ...) per second
+and the peak of the memory traced by tracemalloc while the stage runs, on top
+of the memory allocated before the stage. Since tracing slows allocations
+down, the memory is measured in an extra, untimed run of each stage.
+
+Usage, from the repository root:
+
+    python -m benchmarks.run --num_instances 20000 --output results.json
+    python -m benchmarks.run --num_instances 20000 --baseline results.json
+
+With --baseline, the stages are compared to a previous run with the same
+sizes and the exit code is 1 if a stage got slower (or needs more memory)
+than the tolerance allows.
+"""
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Callable, Dict, Tuple
+
+from benchmarks import generators
+from util import columncomparator
+from util import columninferencer
+from util import graphbuilder
+from util.knowledgesource import KnowledgeSource
+from util.steiner import CSRGraph, MehlhornSolver
+
+logger = logging.getLogger(__name__)
+
+StageResult = Dict[str, float]
+
+
+def _get_peak_traced_mb(fn: Callable) -> Tuple[object, float]:
+    """Runs fn and returns its result and the peak of the memory it allocated"""
+    is_tracing = tracemalloc.is_tracing()
+    if not is_tracing:
+        tracemalloc.start()
+
+    try:
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+
+    finally:
+        if not is_tracing:
+            tracemalloc.stop()
+
+    return result, (peak_bytes - start_bytes) / 2 ** 20
+
+
+class _Benchmark:
+    def __init__(self, repeats: int):
+        self.repeats = repeats
+        self.stages: Dict[str, StageResult] = dict()
+
+    def run_stage(self, name: str, fn: Callable, num_items: Callable[[object], int]):
+        """
+        Runs the stage repeatedly and records its best time, then once more
+        to record its peak memory. num_items maps the result of the stage to
+        the number of items it processed.
+        """
+        best_seconds = float('inf')
+        result = None
+
+        for _ in range(self.repeats):
+            # garbage of the previous repetition is not accounted to this one
+            result = None
+            gc.collect()
+            start = time.perf_counter()
+            result = fn()
+            best_seconds = min(best_seconds, time.perf_counter() - start)
+
+        result = None
+        gc.collect()
+        result, peak_traced_mb = _get_peak_traced_mb(fn)
+
+        items = num_items(result)
+        self.stages[name] = {
+            'seconds': best_seconds,
+            'items': items,
+            'throughput': items / best_seconds if best_seconds > 0 else float('inf'),
+            'peak_traced_mb': peak_traced_mb
+        }
+        logger.info(
+            f'{name}: {best_seconds:.4f} s, {self.stages[name]["throughput"]:.1f} items/s, '
+            f'{peak_traced_mb:.1f} MB'
+        )
+
+        return result
+
+
+def run(
+        num_classes: int,
+        num_properties: int,
+        num_instances: int,
+        num_rows: int,
+        repeats: int
+) -> Dict[str, StageResult]:
+    benchmark = _Benchmark(repeats)
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        kg_file_path = os.path.join(dir_path, 'kg.nt')
+        num_triples = generators.write_knowledge_source(
+            kg_file_path,
+            num_classes=num_classes,
+            num_properties=num_properties,
+            num_instances=num_instances
+        )
+
+        knowledge_source = benchmark.run_stage(
+            'knowledge_source_load',
+            lambda: KnowledgeSource(kg_file_path, sample_portion=1),
+            lambda _: num_triples
+        )
+
+    benchmark.run_stage(
+        'get_columns',
+        lambda: knowledge_source.type_inferencer.get_columns(),
+        len
+    )
+
+    table = generators.get_input_table(num_rows)
+
+    def infer_input_columns():
+        input_columns = [columninferencer.init_id_column('id', table['id'])]
+        for column_name in table.columns[1:]:
+            input_column = columninferencer.transform_series(table[column_name], column_name)
+            input_columns[0].add_link_to_other_column(column_name, input_column)
+            input_columns.append(input_column)
+
+        return input_columns
+
+    input_columns = benchmark.run_stage(
+        'transform_series',
+        infer_input_columns,
+        lambda _: table.size
+    )
+
+    knowledge_source.build_columns()
+    ontology_columns = list(knowledge_source.columns.values())
+    num_comparisons = len(input_columns) * len(ontology_columns)
+
+    closest_columns = benchmark.run_stage(
+        'get_closest',
+        lambda: [columncomparator.get_closest(c, ontology_columns) for c in input_columns],
+        lambda _: num_comparisons
+    )
+    benchmark.run_stage(
+        'get_closest_n',
+        lambda: [columncomparator.get_closest_n(c, ontology_columns, n=5) for c in input_columns],
+        lambda _: num_comparisons
+    )
+
+    weights = knowledge_source.type_inferencer.get_edge_weights()
+    benchmark.run_stage(
+        'graphbuilder_build',
+        lambda: graphbuilder.build(ontology_columns, weights),
+        lambda graph: len(graph.edges())
+    )
+    graph = benchmark.run_stage(
+        'csr_graph_build',
+        lambda: CSRGraph.from_columns(ontology_columns, weights),
+        lambda g: g.get_num_edges()
+    )
+
+    terminal_nodes = {c.column_name for c in closest_columns if c is not None}
+    benchmark.run_stage(
+        'steiner_solve',
+        lambda: MehlhornSolver(graph, terminal_nodes).run(),
+        lambda _: graph.get_num_nodes()
+    )
+
+    return benchmark.stages
+
+
+def compare(
+        stages: Dict[str, StageResult],
+        baseline_stages: Dict[str, StageResult],
+        tolerance: float,
+        min_seconds: float = .01,
+        min_mb: float = 1.
+) -> bool:
+    """
+    Prints the ratios of the stage times and peak memory to the baseline and
+    returns whether any stage exceeds the baseline by more than the tolerance.
+    Slowdowns of less than min_seconds and memory increases of less than
+    min_mb are considered noise. The memory is not compared to baselines
+    which lack the per-stage peak.
+    """
+    has_regression = False
+    print(f'{"stage":<24}{"seconds":>12}{"baseline":>12}{"ratio":>8}{"mem ratio":>11}')
+
+    for name, result in stages.items():
+        baseline = baseline_stages.get(name)
+        if baseline is None:
+            print(f'{name:<24}{result["seconds"]:>12.4f}{"-":>12}')
+            continue
+
+        ratio = result['seconds'] / max(baseline['seconds'], 1e-9)
+        is_slower = ratio > 1 + tolerance and result['seconds'] - baseline['seconds'] > min_seconds
+
+        if 'peak_traced_mb' in baseline:
+            mem_ratio = result['peak_traced_mb'] / max(baseline['peak_traced_mb'], 1e-9)
+            needs_more_memory = mem_ratio > 1 + tolerance and \
+                result['peak_traced_mb'] - baseline['peak_traced_mb'] > min_mb
+            mem_ratio_str = f'{mem_ratio:>11.2f}'
+        else:
+            needs_more_memory = False
+            mem_ratio_str = f'{"-":>11}'
+
+        is_regression = is_slower or needs_more_memory
+        has_regression |= is_regression
+
+        print(
+            f'{name:<24}{result["seconds"]:>12.4f}{baseline["seconds"]:>12.4f}'
+            f'{ratio:>8.2f}{mem_ratio_str}{"  REGRESSION" if is_regression else ""}'
+        )
+
+    return has_regression
+
+
+def main():
+    arg_parser = ArgumentParser()
+    arg_parser.add_argument('--num_classes', type=int, default=20)
+    arg_parser.add_argument('--num_properties', type=int, default=40)
+    arg_parser.add_argument('--num_instances', type=int, default=5000)
+    arg_parser.add_argument('--num_rows', type=int, default=10000)
+    arg_parser.add_argument(
+        '--repeats',
+        type=int,
+        default=3,
+        help='repetitions of each stage, the best time is reported'
+    )
+    arg_parser.add_argument(
+        '--min_seconds',
+        type=float,
+        default=.01,
+        help='slowdowns of less seconds are not reported as regressions'
+    )
+    arg_parser.add_argument(
+        '--min_mb',
+        type=float,
+        default=1.,
+        help='memory increases of less MB are not reported as regressions'
+    )
+    arg_parser.add_argument('--output', help='file the results are written to as JSON')
+    arg_parser.add_argument('--baseline', help='results of a previous run to compare to')
+    arg_parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=.2,
+        help='relative slowdown or memory increase of a stage compared to the '
+             'baseline which is still accepted'
+    )
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = {
+        'num_classes': args.num_classes,
+        'num_properties': args.num_properties,
+        'num_instances': args.num_instances,
+        'num_rows': args.num_rows
+    }
+    stages = run(repeats=args.repeats, **config)
+    results = {'config': config, 'stages': stages}
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        if baseline['config'] != config:
+            logger.warning(f'The baseline was run with a different configuration: {baseline["config"]}')
+
+        if compare(stages, baseline['stages'], args.tolerance, args.min_seconds, args.min_mb):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 import logging
 from abc import ABC, abstractmethod
 from types import NoneType
-from typing import List, Dict, Set, Tuple, Union
+from typing import List, Dict, Iterator, Set, Tuple, Union
 
 import numpy as np
 from pandas import Series, Timestamp
@@ -16,9 +16,31 @@ ResourceID = str
 
 
 class LabeledColumn(ABC):
+    # Columns are created for every type and datatype property of a knowledge
+    # source, so they use slots instead of per-instance dicts. Most of them
+    # have no links, hence the links dict is only allocated on demand, i.e.
+    # when links are accessed or added. iter_links() does not allocate it.
+    __slots__ = ('column_name', '_links')
+
     def __init__(self, column_name: ColumnName):
         self.column_name = column_name
-        self.links: Dict[ColumnName, Set[LabeledColumn]] = {}
+        self._links: Dict[ColumnName, Set[LabeledColumn]] | None = None
+
+    @property
+    def links(self) -> Dict[ColumnName, Set['LabeledColumn']]:
+        if self._links is None:
+            self._links = {}
+
+        return self._links
+
+    @links.setter
+    def links(self, links: Dict[ColumnName, Set['LabeledColumn']]):
+        self._links = links
+
+    def iter_links(self) -> Iterator[Tuple[ColumnName, Set['LabeledColumn']]]:
+        """Yields the links like links.items(), without allocating the links"""
+        if self._links:
+            yield from self._links.items()
 
     def add_link_to_other_column(self, link_name: ColumnName, target_column: 'LabeledColumn'):
         if target_column is None:
@@ -26,10 +48,39 @@ class LabeledColumn(ABC):
                 f'target column for link {link_name} is None in column {self.column_name}'
             )
 
-        if link_name not in self.links:
-            self.links[link_name] = set()
+        if self._links is None:
+            self._links = {}
 
-        self.links[link_name].add(target_column)
+        if link_name not in self._links:
+            self._links[link_name] = set()
+
+        self._links[link_name].add(target_column)
+
+    def clear_links(self):
+        self._links = None
+
+    @classmethod
+    def _get_all_slots(cls) -> Tuple[str, ...]:
+        all_slots = cls.__dict__.get('_all_slots')
+
+        if all_slots is None:
+            all_slots = tuple(
+                slot
+                for klass in reversed(cls.__mro__)
+                for slot in klass.__dict__.get('__slots__', ())
+            )
+            cls._all_slots = all_slots
+
+        return all_slots
+
+    def __getstate__(self):
+        # a plain tuple of the slot values instead of a dict keyed by the
+        # slot names keeps pickled columns small
+        return tuple(getattr(self, slot, None) for slot in self._get_all_slots())
+
+    def __setstate__(self, state):
+        for slot, value in zip(self._get_all_slots(), state):
+            setattr(self, slot, value)
 
     @staticmethod
     @abstractmethod
@@ -42,6 +93,8 @@ class LabeledColumn(ABC):
 
 
 class IDColumn(LabeledColumn):
+    __slots__ = ('min_id_length', 'avg_id_length', 'max_id_length')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -74,6 +127,8 @@ class IDColumn(LabeledColumn):
 
 
 class UntypedIDColumn(LabeledColumn):
+    __slots__ = ('entries', 'entry_links')
+
     def __init__(self):
         super().__init__('untyped_id_column')
         self.entries: Set[ResourceID] = set()
@@ -117,6 +172,8 @@ class UntypedIDColumn(LabeledColumn):
 
 
 class TypedIDColumn(IDColumn):
+    __slots__ = ('_id_cnt',)
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -125,35 +182,29 @@ class TypedIDColumn(IDColumn):
             max_id_length: int = 0
     ):
         super().__init__(column_name, min_id_length, avg_id_length, max_id_length)
-        self._ids: Set[ResourceID] = set()
+        # only the length statistics are kept, the IDs themselves are
+        # tracked by the type handlers
         self._id_cnt = 0
 
     def add_id(self, id_str: ResourceID):
-        self._ids.add(id_str)
-        self.min_id_length = min(self.min_id_length, len(id_str))
-        self.max_id_length = max(self.max_id_length, len(id_str))
+        id_len = len(id_str)
+
+        if self._id_cnt == 0:
+            self.min_id_length = id_len
+            self.max_id_length = id_len
+        else:
+            self.min_id_length = min(self.min_id_length, id_len)
+            self.max_id_length = max(self.max_id_length, id_len)
 
         self._id_cnt += 1
-        id_len = len(id_str)
         self.avg_id_length = \
             (self.avg_id_length * (self._id_cnt - 1) / self._id_cnt) + \
             (id_len / self._id_cnt)
 
-    def contains_id(self, id_str: ResourceID) -> bool:
-        return id_str in self._ids
-
-    def update_stats(self):
-        id_lengths = list(map(lambda i: len(i), self._ids))
-        min_id_len = min(id_lengths)
-        avg_id_len = sum(id_lengths) / self._id_cnt
-        max_id_len = max(id_lengths)
-
-        self.min_id_length = min_id_len
-        self.avg_id_length = avg_id_len
-        self.max_id_length = max_id_len
-
 
 class TextColumn(LabeledColumn):
+    __slots__ = ('min_text_length', 'avg_text_length', 'max_text_length', '_values_cnt')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -176,6 +227,20 @@ class TextColumn(LabeledColumn):
             (self.avg_text_length * (self._values_cnt - 1) / self._values_cnt) + \
             (text_length / self._values_cnt)
 
+    def revert_stats(self, text_length: int):
+        """
+        Removes a text length from the average. The minimum and maximum
+        cannot be reverted without knowing all values and hence stay bounds.
+        """
+        if self._values_cnt <= 1:
+            self._values_cnt = 0
+            self.avg_text_length = 0
+            return
+
+        self.avg_text_length = \
+            (self.avg_text_length * self._values_cnt - text_length) / (self._values_cnt - 1)
+        self._values_cnt -= 1
+
     @staticmethod
     def get_type() -> ColumnType:
         return ColumnType.Text
@@ -201,6 +266,8 @@ class TextColumn(LabeledColumn):
 
 
 class StringColumn(LabeledColumn):
+    __slots__ = ('min_str_length', 'avg_str_length', 'max_str_length', '_values_cnt')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -247,6 +314,8 @@ class StringColumn(LabeledColumn):
 
 
 class BooleanColumn(LabeledColumn):
+    __slots__ = ('portion_true', 'portion_false')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -276,6 +345,8 @@ class BooleanColumn(LabeledColumn):
 
 
 class CategoriesColumn(LabeledColumn):
+    __slots__ = ('categories',)
+
     def __init__(self, column_name: ColumnName, categories: List[str]):
         super().__init__(column_name)
         self.categories = categories
@@ -298,6 +369,8 @@ class CategoriesColumn(LabeledColumn):
 
 
 class IntegerColumn(LabeledColumn):
+    __slots__ = ('min_value', 'avg_value', 'max_value', 'value_stddev')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -333,6 +406,8 @@ class IntegerColumn(LabeledColumn):
 
 
 class FloatColumn(LabeledColumn):
+    __slots__ = ('min_value', 'avg_value', 'max_value', 'value_stddev')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -368,10 +443,12 @@ class FloatColumn(LabeledColumn):
 
 
 class WGS84CoordinateColumn(FloatColumn):
-    pass
+    __slots__ = ()
 
 
 class WGS84LatitudeColumn(WGS84CoordinateColumn):
+    __slots__ = ()
+
     @staticmethod
     def looks_like_latitude_column(column: Series) -> bool:
         if np.min(column) > -90.0 and np.max(column) < 90.0 \
@@ -386,6 +463,8 @@ class WGS84LatitudeColumn(WGS84CoordinateColumn):
 
 
 class WGS84LongitudeColumn(WGS84CoordinateColumn):
+    __slots__ = ()
+
     @staticmethod
     def looks_like_longitude_column(column: Series) -> bool:
         if np.min(column) > -180.0 and np.max(column) < 180.0 \
@@ -400,6 +479,8 @@ class WGS84LongitudeColumn(WGS84CoordinateColumn):
 
 
 class DateTimeColumn(LabeledColumn):
+    __slots__ = ('min_date_time', 'mean_date_time', 'max_date_time')
+
     def __init__(
             self,
             column_name: ColumnName,
@@ -436,6 +517,8 @@ class DateTimeColumn(LabeledColumn):
 
 
 class YetUnknownTypeColumn(LabeledColumn):
+    __slots__ = ('values',)
+
     def __init__(self, column_name: ColumnName):
         super().__init__(column_name)
         self.values = []
@@ -1,13 +1,15 @@
-from typing import Set, Tuple, Dict, List
-
-import pandas as pd
+from functools import partial
+from typing import Set, Tuple, Dict, List, Iterable, Iterator, Callable, Type
 
 from rdflib import URIRef
-from rdflib.term import Node
+from rdflib.term import Node, Literal
 
-from util import columninferencer
+from util import datatypecolumns
 from util import datatypeinferencer
+from util import graphbuilder
 from semanticlabeling.labeledcolumn import ColumnName, TypedIDColumn, LabeledColumn
+from util.graphbuilder import EdgeWeights
+from util.iriinterner import IRIInterner
 from util.statement import NotFullyTypedStatementsHandler
 from util.property import PropertiesHandler, PropertyHandler
 from util.type import TypesHandler, TypeHandler
@@ -19,33 +21,103 @@ class TypeInferencer:
     """
 
     def __init__(self):
-        self.types_handler = TypesHandler()
+        # IRIs are interned once and shared by all handlers
+        self.interner = IRIInterner()
+        self.types_handler = TypesHandler(self.interner)
         self.properties_handler = PropertiesHandler(self.types_handler)
-        self.statements_handler = NotFullyTypedStatementsHandler()
+        self.statements_handler = NotFullyTypedStatementsHandler(self.interner)
+
+        # changes since the last call of clear_changes(), used to only rebuild
+        # the columns affected by a delta
+        self._changed_type_iris: Set[URIRef] = set()
+        self._changed_property_iris: Set[URIRef] = set()
+        self._removed_values: Dict[str, List] = dict()
+
+    def clear_changes(self) -> None:
+        self._changed_type_iris = set()
+        self._changed_property_iris = set()
+        self._removed_values = dict()
+
+    def pop_changed_column_keys(self) -> Set[ColumnName | URIRef]:
+        """
+        Returns the keys of all columns which are affected by the changes
+        since the last call and clears the changes. Affected are the columns
+        of changed types and their subclasses, the datatype columns of
+        changed properties and the type columns linked by them.
+        Keys of columns which do not exist any more are contained as well.
+        """
+        property_iris = set(self._changed_property_iris)
+
+        # domains and ranges are propagated along sub- and inverse properties
+        for superproperty_iri, subproperty_iris in self.properties_handler.subproperties.items():
+            if superproperty_iri in self._changed_property_iris:
+                property_iris.update(subproperty_iris)
+
+        for property_1_iri, property_2_iri in self.properties_handler.inverse_properties:
+            if property_1_iri in self._changed_property_iris \
+                    or property_2_iri in self._changed_property_iris:
+                property_iris.add(property_1_iri)
+                property_iris.add(property_2_iri)
+
+        type_iris = set(self._changed_type_iris)
+        datatype_ids = set(self._removed_values.keys())
+
+        for property_iri in property_iris:
+            property_ = self.properties_handler.properties.get(property_iri)
+
+            if property_ is None:
+                continue
+
+            type_iris.update(d.iri for d in property_.domains)
+            datatype_ids.update(r.id_ for r in property_.ranges if r.is_datatype)
+
+        # subclasses inherit the links of their superclasses
+        for type_iri in list(type_iris):
+            type_iris.update(self.get_subclasses_of(type_iri))
+
+        for datatype_id, values in self._removed_values.items():
+            datatype = self.types_handler.datatypes.get(datatype_id)
+
+            if datatype is not None:
+                datatype.remove_values(values)
+
+        self.clear_changes()
+
+        return type_iris.union(datatype_ids)
 
     def add_type(self, type_iri: URIRef) -> None:
         self.types_handler.add_type(type_iri)
+        self._changed_type_iris.add(type_iri)
 
     def get_type(self, type_iri: URIRef) -> TypeHandler:
         return self.types_handler.get_type(type_iri)
 
     def add_instance_of_type(self, instance_iri: URIRef, type_iri: URIRef) -> None:
         self.types_handler.add_instance_of_type(instance_iri, type_iri)
-        self.statements_handler.update_untyped_resource(
+        changed_property_iris = self.statements_handler.update_untyped_resource(
             instance_iri,
             type_iri,
             self.types_handler,
             self.properties_handler
         )
 
+        self._changed_type_iris.add(type_iri)
+        self._changed_property_iris.update(changed_property_iris)
+
+    def remove_instance_of_type(self, instance_iri: URIRef, type_iri: URIRef) -> None:
+        self.types_handler.remove_instance_of_type(instance_iri, type_iri)
+        self._changed_type_iris.add(type_iri)
+
     def add_property(self, property_iri: URIRef) -> None:
         self.properties_handler.add_property(property_iri)
 
     def add_data_property(self, data_property_iri: URIRef) -> None:
         self.properties_handler.add_datatype_property(data_property_iri)
+        self._changed_property_iris.add(data_property_iri)
 
     def add_object_property(self, object_property_iri: URIRef) -> None:
         self.properties_handler.add_object_property(object_property_iri)
+        self._changed_property_iris.add(object_property_iri)
 
     def add_functional_property(self, property_iri: URIRef) -> None:
         self.properties_handler.add_functional_property(property_iri)
@@ -73,9 +145,11 @@ class TypeInferencer:
 
     def add_property_range(self, property_iri: URIRef, range_: URIRef) -> None:
         self.properties_handler.add_property_range(property_iri, range_)
+        self._changed_property_iris.add(property_iri)
 
     def add_property_domain(self, property_iri: URIRef, domain: URIRef) -> None:
         self.properties_handler.add_property_domain(property_iri, domain)
+        self._changed_property_iris.add(property_iri)
 
     def get_column_name_for(self, property_iri: URIRef) -> ColumnName:
         return self.properties_handler.get_property(property_iri).get_column_name()
@@ -91,6 +165,26 @@ class TypeInferencer:
             self.types_handler,
             self.properties_handler
         )
+        self._changed_property_iris.add(p)
+
+    def remove_statement(self, s: URIRef, p: URIRef, o: Node) -> None:
+        dropped_types = self.statements_handler.remove_statement(
+            s,
+            p,
+            o,
+            self.types_handler,
+            self.properties_handler
+        )
+        self._changed_property_iris.add(p)
+        # types which are no domain any more lose their links
+        self._changed_type_iris.update(t.iri for t in dropped_types)
+
+        if isinstance(o, Literal):
+            datatype_id = self.types_handler._get_property_id(p)
+
+            if datatype_id not in self._removed_values:
+                self._removed_values[datatype_id] = []
+            self._removed_values[datatype_id].append(o.value)
 
     def get_property_domain_iris(self, property_iri: URIRef) -> Set[URIRef]:
         return set(
@@ -110,12 +204,14 @@ class TypeInferencer:
 
     def add_inverse_properties(self, property_1: URIRef, property_2: URIRef):
         self.properties_handler.inverse_properties.add((property_1, property_2))
+        self._changed_property_iris.update((property_1, property_2))
 
     def get_inverse_properties(self) -> Set[Tuple[URIRef, URIRef]]:
         return self.properties_handler.inverse_properties
 
     def add_subproperty(self, superproperty_iri: URIRef, subproperty_iri: URIRef):
         self.properties_handler.add_subproperty(superproperty_iri, subproperty_iri)
+        self._changed_property_iris.update((superproperty_iri, subproperty_iri))
 
     def get_subproperties(self) -> Dict[URIRef, Set[URIRef]]:
         return self.properties_handler.subproperties
@@ -134,74 +230,225 @@ class TypeInferencer:
 
     def add_subclass(self, superclass_iri: URIRef, subclass_iri: URIRef):
         self.types_handler.add_subclass(superclass_iri, subclass_iri)
+        self._changed_type_iris.update((superclass_iri, subclass_iri))
 
     def get_subclasses_of(self, superclass_iri: URIRef) -> Set[URIRef]:
-        subclasses = self.types_handler.subclasses_of.get(superclass_iri)
-
-        if subclasses is None:
-            return set()
-
-        else:
-            return subclasses
+        return self.types_handler.get_subclasses_of(superclass_iri)
+
+    def compute_class_closure(self) -> None:
+        """
+        Computes the closure of the class hierarchy once all classes are
+        added and assigns the domains and ranges deferred until then
+        """
+        self.types_handler.compute_class_closure()
+        self._changed_property_iris.update(
+            self.statements_handler.assign_deferred(self.types_handler, self.properties_handler)
+        )
 
     def get_superclasses_of(self, subclass_iri: URIRef) -> Set[URIRef]:
-        superclasses = self.types_handler.superclasses_of.get(subclass_iri)
+        return self.types_handler.get_superclasses_of(subclass_iri)
+
+    def _get_domain_index(self) -> Dict[URIRef, Dict[URIRef, PropertyHandler]]:
+        """
+        Returns an index of all properties (in the order of the properties
+        handler) whose domain is the class or one of its superclasses
+        """
+        domain_index: Dict[URIRef, Dict[URIRef, PropertyHandler]] = dict()
+
+        for prop in self.properties_handler.properties.values():
+            for domain in prop.domains:
+                class_iris = self.types_handler.get_subclasses_of(domain.iri)
+                class_iris.add(domain.iri)
+
+                for class_iri in class_iris:
+                    if class_iri not in domain_index:
+                        domain_index[class_iri] = dict()
+                    domain_index[class_iri][prop.iri] = prop
+
+        return domain_index
+
+    def get_edge_weights(self) -> EdgeWeights:
+        """
+        Returns the weights of the links between the type columns and the
+        columns of their property ranges, derived from how often the property
+        is used with the type and the range (see graphbuilder.get_edge_weight).
+        Since only the supporting statements of each domain and range are
+        counted, the usage of a link is estimated by the smaller of both.
+        Links a type only inherits from a superclass count as unused.
+        """
+        weights: EdgeWeights = dict()
+
+        for class_iri, props in self._get_domain_index().items():
+            type_ = self.types_handler.types.get(class_iri)
+
+            if type_ is None:
+                continue
 
-        if superclasses is None:
-            return set()
+            for prop in props.values():
+                domain_support = prop.get_domain_support(type_)
+                is_functional = prop.is_functional or prop.is_inverse_functional
+
+                for rnge in prop.ranges:
+                    num_uses = min(domain_support, prop.get_range_support(rnge))
+                    weights[(type_.id_, prop.id_, rnge.id_)] = \
+                        graphbuilder.get_edge_weight(num_uses, is_functional)
+
+        return weights
+
+    def get_column_factories(
+            self,
+            min_instances: int = 0,
+            keys: Iterable[ColumnName | URIRef] | None = None
+    ) -> List[Tuple[ColumnName | URIRef, Callable[[], LabeledColumn], Tuple[Type[LabeledColumn], ...]]]:
+        """
+        Returns the key, a function building the column and the classes the
+        column may have (empty if unknown) for all datatypes and types or, if
+        keys are given, only for the datatypes and types with these keys.
+        """
+        builder = _ColumnBuilder(self, min_instances)
+        factories = []
+
+        if keys is None:
+            datatype_ids = list(self.types_handler.datatypes.keys())
+            type_iris = list(self.types_handler.types.keys())
 
         else:
-            return superclasses
-
-    def get_columns(self, min_instances: int = 0) -> List[Tuple[ColumnName, LabeledColumn]]:
-        return_columns: List[Tuple[ColumnName, LabeledColumn]] = []
+            # type IRIs and datatype IDs may have the same string value
+            datatype_ids = [
+                k for k in keys
+                if not isinstance(k, URIRef) and k in self.types_handler.datatypes
+            ]
+            type_iris = [
+                k for k in keys
+                if isinstance(k, URIRef) and k in self.types_handler.types
+            ]
+
+        for datatype_id in datatype_ids:
+            datatype = self.types_handler.datatypes[datatype_id]
 
-        for datatype_id, datatype in self.types_handler.datatypes.items():
             if 0 < len(datatype.values) < min_instances:
                 continue
 
-            dtype_column = datatypeinferencer.get_column(datatype)
+            factories.append((
+                datatype_id,
+                partial(datatypecolumns.build_datatype_column, datatype),
+                datatypeinferencer.get_column_classes(datatype)
+            ))
 
-            if dtype_column is None:
-                dtype_column = columninferencer.transform_series(
-                    pd.Series(datatype.values),
-                    datatype_id
-                )
-
-            return_columns.append((datatype_id, dtype_column))
-
-        for type_iri in self.types_handler.types.keys():
+        for type_iri in type_iris:
             type_: TypeHandler = self.get_type(type_iri)
 
             if 0 < len(type_.values) < min_instances:
                 continue
 
-            column: TypedIDColumn = type_.get_id_column()
+            factories.append((
+                type_.iri,
+                partial(builder.build_type_column, type_),
+                (TypedIDColumn,)
+            ))
+
+        return factories
+
+    def get_column_name(self, key: ColumnName | URIRef) -> ColumnName:
+        """The name of the column with the given key, without building it"""
+        if isinstance(key, URIRef):
+            return self.types_handler.types[key].id_
+
+        return self.types_handler.datatypes[key].id_
+
+    def get_column_links(
+            self,
+            keys: Iterable[ColumnName | URIRef],
+            min_instances: int = 0
+    ) -> Iterator[Tuple[ColumnName, ColumnName, ColumnName]]:
+        """
+        Yields the (column name, link name, target column name) triples of
+        the links the columns with the given keys get when they are built,
+        without building them
+        """
+        domain_index = self._get_domain_index()
+
+        for key in keys:
+            if not isinstance(key, URIRef):
+                # datatype columns have no links
+                continue
 
-            superclasses_iris = self.types_handler.superclasses_of.get(type_iri)
+            type_ = self.types_handler.types[key]
+
+            for prop, rnge in _iter_link_ranges(type_, domain_index, min_instances):
+                # see TypeHandler.get_column()
+                if not rnge.is_datatype or datatypeinferencer.get_column_classes(rnge):
+                    yield type_.id_, prop.id_, rnge.id_
+
+    def get_columns(
+            self,
+            min_instances: int = 0,
+            keys: Iterable[ColumnName | URIRef] | None = None,
+            n_jobs: int = 1
+    ) -> List[Tuple[ColumnName, LabeledColumn]]:
+        """
+        Builds the columns of all datatypes and types or, if keys are given,
+        only of the datatypes and types with these keys. The datatype columns
+        are built in n_jobs processes.
+        """
+        factories = self.get_column_factories(min_instances, keys)
+
+        datatype_ids = [key for key, _, _ in factories if not isinstance(key, URIRef)]
+        datatype_columns = dict(zip(
+            datatype_ids,
+            datatypecolumns.build_datatype_columns(
+                [self.types_handler.datatypes[datatype_id] for datatype_id in datatype_ids],
+                n_jobs=n_jobs
+            )
+        ))
+
+        return [
+            (key, datatype_columns[key] if not isinstance(key, URIRef) else build())
+            for key, build, _ in factories
+        ]
+
+
+def _iter_link_ranges(
+        type_: TypeHandler,
+        domain_index: Dict[URIRef, Dict[URIRef, PropertyHandler]],
+        min_instances: int
+) -> Iterator[Tuple[PropertyHandler, TypeHandler]]:
+    """The properties and ranges the column of the given type links to"""
+    for prop in domain_index.get(type_.iri, dict()).values():
+        for rnge in prop.ranges:
+            if 0 < len(rnge.values) < min_instances:
+                continue
 
-            for prop in self.properties_handler.properties.values():
-                type_is_in_property_domain = False
-                if type_ in prop.domains:
-                    type_is_in_property_domain = True
+            yield prop, rnge
+
+
+class _ColumnBuilder:
+    """
+    Builds the columns of a type inferencer on demand. The domain index and
+    the link target columns are shared by all columns built by a builder.
+    """
+    def __init__(self, type_inferencer: TypeInferencer, min_instances: int):
+        self._type_inferencer = type_inferencer
+        self._min_instances = min_instances
 
-                elif superclasses_iris is not None:
-                    for superclass_iri in superclasses_iris:
-                        superclass_type = self.get_type(superclass_iri)
+        self._domain_index: Dict[URIRef, Dict[URIRef, PropertyHandler]] | None = None
+        # range columns are shared by all links to them
+        self._range_columns: Dict[int, LabeledColumn | None] = dict()
 
-                        if superclass_type in prop.domains:
-                            type_is_in_property_domain = True
-                            break
+    def build_type_column(self, type_: TypeHandler) -> TypedIDColumn:
+        if self._domain_index is None:
+            self._domain_index = self._type_inferencer._get_domain_index()
 
-                if type_is_in_property_domain:
-                    for rnge in prop.ranges:
-                        if 0 < len(rnge.values) < min_instances:
-                            continue
+        column: TypedIDColumn = type_.get_id_column()
+        # links of a previous build may be outdated
+        column.clear_links()
 
-                        range_column = rnge.get_column()
-                        if range_column is not None:
-                            column.add_link_to_other_column(prop.id_, range_column)
+        for prop, rnge in _iter_link_ranges(type_, self._domain_index, self._min_instances):
+            if id(rnge) not in self._range_columns:
+                self._range_columns[id(rnge)] = rnge.get_column()
 
-            return_columns.append((type_.iri, column))
+            range_column = self._range_columns[id(rnge)]
+            if range_column is not None:
+                column.add_link_to_other_column(prop.id_, range_column)
 
-        return return_columns
+        return column
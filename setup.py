@@ -24,6 +24,8 @@ setup(
         'matplotlib',
         'steiner-tree==1.1.3',
         'pyvis',
-        'diskcache',
-    ]
+    ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    }
 )
@@ -0,0 +1,50 @@
+from benchmarks import run
+
+
+def test_run_small():
+    stages = run.run(num_classes=5, num_properties=10, num_instances=100, num_rows=50, repeats=1)
+
+    assert set(stages) == {
+        'knowledge_source_load', 'get_columns', 'transform_series', 'get_closest',
+        'get_closest_n', 'graphbuilder_build', 'csr_graph_build', 'steiner_solve'
+    }
+    assert all(stage['items'] > 0 and stage['peak_traced_mb'] >= 0 for stage in stages.values())
+    assert stages['knowledge_source_load']['peak_traced_mb'] > 0
+
+
+def test_peak_memory_is_measured_per_stage():
+    benchmark = run._Benchmark(repeats=1)
+
+    data = benchmark.run_stage('allocate', lambda: bytearray(8 * 2 ** 20), len)
+    benchmark.run_stage('idle', lambda: [1], len)
+
+    assert benchmark.stages['allocate']['peak_traced_mb'] >= 8
+    # the memory still held from the previous stage is not accounted to this one
+    assert benchmark.stages['idle']['peak_traced_mb'] < 1
+    assert len(data) == 8 * 2 ** 20
+
+
+def test_compare():
+    baseline = {
+        'load': {'seconds': 1., 'peak_traced_mb': 100.},
+        'solve': {'seconds': .001, 'peak_traced_mb': 2.}
+    }
+
+    assert not run.compare(baseline, baseline, tolerance=.2)
+    # small absolute slowdowns and memory increases are noise
+    assert not run.compare(
+        {**baseline, 'solve': {'seconds': .005, 'peak_traced_mb': 2.5}}, baseline, tolerance=.2)
+    assert run.compare(
+        {**baseline, 'load': {'seconds': 1.5, 'peak_traced_mb': 100.}}, baseline, tolerance=.2)
+    assert run.compare(
+        {**baseline, 'load': {'seconds': 1., 'peak_traced_mb': 150.}}, baseline, tolerance=.2)
+    # memory regressions of later, smaller stages are detected as well
+    assert run.compare(
+        {**baseline, 'solve': {'seconds': .001, 'peak_traced_mb': 10.}}, baseline, tolerance=.2)
+
+
+def test_compare_to_baseline_without_memory():
+    baseline = {'load': {'seconds': 1., 'peak_rss_mb': 100.}}
+
+    assert not run.compare(
+        {'load': {'seconds': 1., 'peak_traced_mb': 500.}}, baseline, tolerance=.2)
@@ -0,0 +1,143 @@
+import random
+
+from rdflib import URIRef
+
+from util.classhierarchy import ClassHierarchy
+from util.iriinterner import IRIInterner
+
+
+EX = 'http://example.org/'
+
+
+def _cls(i: int) -> URIRef:
+    return URIRef(f'{EX}Cls{i}')
+
+
+def _get_reachable(edges, start):
+    reachable = set()
+    queue = list(edges.get(start, ()))
+    while queue:
+        node = queue.pop()
+        if node not in reachable:
+            reachable.add(node)
+            queue.extend(edges.get(node, ()))
+
+    return reachable
+
+
+def test_closure_matches_reachability():
+    rnd = random.Random(23)
+    num_classes = 60
+    hierarchy = ClassHierarchy(IRIInterner())
+    superclass_edges = dict()
+    subclass_edges = dict()
+
+    # mostly a DAG, plus some cycles (e.g. from owl:equivalentClass) and a
+    # self loop
+    for _ in range(120):
+        sub, sup = rnd.randrange(num_classes), rnd.randrange(num_classes)
+        if sub > sup or rnd.random() < 0.05:
+            hierarchy.add_subclass(_cls(sup), _cls(sub))
+            superclass_edges.setdefault(sub, set()).add(sup)
+            subclass_edges.setdefault(sup, set()).add(sub)
+
+    for i in range(num_classes):
+        assert hierarchy.get_superclasses_of(_cls(i)) == \
+               {_cls(j) for j in _get_reachable(superclass_edges, i)}
+        assert hierarchy.get_subclasses_of(_cls(i)) == \
+               {_cls(j) for j in _get_reachable(subclass_edges, i)}
+
+        for j in range(num_classes):
+            assert hierarchy.is_subclass_of(_cls(i), _cls(j)) == \
+                   (j in _get_reachable(superclass_edges, i))
+
+
+def test_equivalent_classes_are_their_own_sub_and_superclasses():
+    hierarchy = ClassHierarchy(IRIInterner())
+    hierarchy.add_subclass(_cls(1), _cls(2))
+    hierarchy.add_subclass(_cls(2), _cls(1))
+    hierarchy.add_subclass(_cls(0), _cls(1))
+
+    assert hierarchy.get_superclasses_of(_cls(1)) == {_cls(0), _cls(1), _cls(2)}
+    assert hierarchy.get_subclasses_of(_cls(2)) == {_cls(1), _cls(2)}
+    assert hierarchy.get_subclasses_of(_cls(0)) == {_cls(1), _cls(2)}
+    assert not hierarchy.is_subclass_of(_cls(0), _cls(0))
+
+
+def test_closure_is_updated_after_new_edges():
+    hierarchy = ClassHierarchy(IRIInterner())
+    hierarchy.add_subclass(_cls(0), _cls(1))
+    assert hierarchy.get_subclasses_of(_cls(0)) == {_cls(1)}
+
+    hierarchy.add_subclass(_cls(1), _cls(2))
+    assert hierarchy.get_subclasses_of(_cls(0)) == {_cls(1), _cls(2)}
+    assert hierarchy.get_superclasses_of(_cls(3)) == set()
+    assert set(hierarchy.get_subclass_edges()) == {(_cls(0), _cls(1)), (_cls(1), _cls(2))}
+
+
+def test_deep_hierarchy():
+    hierarchy = ClassHierarchy(IRIInterner())
+    depth = 5000
+
+    for i in range(depth):
+        hierarchy.add_subclass(_cls(i), _cls(i + 1))
+
+    assert len(hierarchy.get_superclasses_of(_cls(depth))) == depth
+    assert hierarchy.is_subclass_of(_cls(depth), _cls(0))
+    assert not hierarchy.is_subclass_of(_cls(0), _cls(depth))
+
+
+def test_subclass_tests_while_loading_do_not_compute_closure(monkeypatch):
+    rnd = random.Random(42)
+    num_classes = 40
+    hierarchy = ClassHierarchy(IRIInterner())
+    superclass_edges = dict()
+
+    num_closures = 0
+    compute_closure = hierarchy.compute_closure
+
+    def counting_compute_closure():
+        nonlocal num_closures
+        num_closures += 1
+        compute_closure()
+
+    monkeypatch.setattr(hierarchy, 'compute_closure', counting_compute_closure)
+
+    # subClassOf triples interleaved with subclass tests, including cycles
+    for _ in range(80):
+        sub, sup = rnd.randrange(num_classes), rnd.randrange(num_classes)
+        hierarchy.add_subclass(_cls(sup), _cls(sub))
+        superclass_edges.setdefault(sub, set()).add(sup)
+
+        i, j = rnd.randrange(num_classes), rnd.randrange(num_classes)
+        assert hierarchy.is_subclass_of(_cls(i), _cls(j)) == \
+               (j in _get_reachable(superclass_edges, i))
+
+    assert num_closures == 0
+
+    hierarchy.compute_closure()
+    for i in range(num_classes):
+        for j in range(num_classes):
+            assert hierarchy.is_subclass_of(_cls(i), _cls(j)) == \
+                   (j in _get_reachable(superclass_edges, i))
+
+    assert num_closures == 1
+
+
+def test_superclasses_are_memoized_until_next_edge():
+    hierarchy = ClassHierarchy(IRIInterner())
+    hierarchy.add_subclass(_cls(1), _cls(2))
+    hierarchy.add_subclass(_cls(0), _cls(1))
+
+    assert not hierarchy.is_closure_computed()
+    assert hierarchy.is_subclass_of(_cls(2), _cls(0))
+    assert hierarchy.is_subclass_of(_cls(2), _cls(1))
+    assert list(hierarchy._reachable_bits) == [hierarchy._find_class_idx(_cls(2))]
+
+    hierarchy.add_subclass(_cls(3), _cls(0))
+    assert hierarchy._reachable_bits == dict()
+    assert hierarchy.is_subclass_of(_cls(2), _cls(3))
+
+    hierarchy.compute_closure()
+    assert hierarchy.is_closure_computed()
+    assert hierarchy._reachable_bits == dict()
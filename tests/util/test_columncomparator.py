@@ -2,7 +2,7 @@ from pandas import Timestamp
 
 from pytest import approx
 
-from util.columncomparator import IncomparableLabeledColumnException
+from util.columncomparator import IncomparableLabeledColumnException, are_comparable
 from semanticlabeling.labeledcolumn import BooleanColumn, CategoriesColumn, \
     DateTimeColumn, FloatColumn, IDColumn, IntegerColumn, StringColumn, \
     TextColumn, TypedIDColumn, UntypedIDColumn, WGS84CoordinateColumn, \
@@ -4192,3 +4192,14 @@ def test_compare_unknown_unknown():
         assert False
     except IncomparableLabeledColumnException:
         assert True
+
+
+def test_are_comparable():
+    assert are_comparable(TypedIDColumn, IDColumn)
+    assert are_comparable(StringColumn, TextColumn)
+    assert are_comparable(IntegerColumn, WGS84LatitudeColumn)
+    assert are_comparable(DateTimeColumn, DateTimeColumn)
+
+    assert not are_comparable(IntegerColumn, StringColumn)
+    assert not are_comparable(UntypedIDColumn, UntypedIDColumn)
+    assert not are_comparable(YetUnknownTypeColumn, TextColumn)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import pytest
+from rdflib import URIRef
+
+from semanticlabeling.labeledcolumn import BooleanColumn, CategoriesColumn, \
+    DateTimeColumn, FloatColumn, IntegerColumn, StringColumn, TextColumn, \
+    TypedIDColumn, WGS84LatitudeColumn, YetUnknownTypeColumn
+from util import columnstore
+from util.columnstore import ColumnStore, UnstorableColumnException
+
+
+CITY_CLS = URIRef('http://example.org/City')
+
+
+@pytest.fixture
+def columns():
+    city = TypedIDColumn('City', 20, 24.5, 31)
+    name = TextColumn('name', 3, 12.25, 40)
+    code = StringColumn('code', np.int64(2), 2.0, np.int64(3))
+    lat = WGS84LatitudeColumn('lat', -45.5, 12.1, 67.3, 23.4)
+    population = IntegerColumn('population', 1000, 53000.5, 3400000, 1234.5)
+    area = FloatColumn('area', 0.5, 12.5, 891.8, float('nan'))
+    capital = BooleanColumn('isCapital', 0.1, 0.9)
+    kind = CategoriesColumn('kind', ['town', 'city', 'village', float('nan'), 42])
+    founded = DateTimeColumn(
+        'founded',
+        pd.Timestamp('1203-05-01'),
+        pd.NaT,
+        pd.Timestamp('2001-12-24 13:45:12')
+    )
+
+    for link_name, target in [('name', name), ('code', code), ('lat', lat),
+                              ('population', population), ('area', area),
+                              ('isCapital', capital), ('kind', kind),
+                              ('founded', founded), ('twinCity', city)]:
+        city.add_link_to_other_column(link_name, target)
+
+    return [city, name, code, lat, population, area, capital, kind, founded]
+
+
+@pytest.fixture
+def store(columns, tmp_path):
+    keys = [(CITY_CLS, 0)] + [(column.column_name, idx) for idx, column in enumerate(columns)][1:]
+    # a datatype ID which has the same string representation as the type IRI
+    keys.append((str(CITY_CLS), 1))
+
+    columnstore.write(columns, keys, str(tmp_path))
+
+    return ColumnStore(str(tmp_path))
+
+
+def test_statistics_are_restored(columns, store):
+    for idx, column in enumerate(columns):
+        restored = store.get_column_by_index(idx)
+
+        assert type(restored) is type(column)
+        assert restored.column_name == column.column_name
+
+        if not isinstance(column, CategoriesColumn):
+            assert str(restored) == str(column)
+
+
+def test_categories_are_restored(store):
+    categories = store['kind'].categories
+
+    assert categories[:3] == ['town', 'city', 'village']
+    assert np.isnan(categories[3])
+    assert categories[4] == 42
+
+
+def test_time_stamps_are_restored(store):
+    founded = store['founded']
+
+    assert founded.min_date_time == pd.Timestamp('1203-05-01')
+    assert founded.mean_date_time is pd.NaT
+    assert founded.max_date_time == pd.Timestamp('2001-12-24 13:45:12')
+
+
+def test_links_are_restored(store):
+    city = store[CITY_CLS]
+
+    assert set(city.links.keys()) == {
+        'name', 'code', 'lat', 'population', 'area', 'isCapital', 'kind',
+        'founded', 'twinCity'
+    }
+    assert city.links['name'] == {store['name']}
+    # self link
+    assert city.links['twinCity'] == {city}
+
+
+def test_mapping_interface(columns, store):
+    assert len(store) == len(columns) + 1
+    assert store.get_num_columns() == len(columns)
+
+    assert CITY_CLS in store
+    assert URIRef('http://example.org/Town') not in store
+    assert store.get('missing') is None
+
+    # the IRI key and the string key with the same text refer to different columns
+    assert isinstance(store[CITY_CLS], TypedIDColumn)
+    assert isinstance(store[str(CITY_CLS)], TextColumn)
+
+    keys = list(store.keys())
+    assert keys[0] == CITY_CLS and isinstance(keys[0], URIRef)
+    assert isinstance(keys[-1], str) and not isinstance(keys[-1], URIRef)
+
+
+def test_columns_are_memoized(store):
+    assert store['name'] is store['name']
+    assert store[CITY_CLS].links['name'] == {store['name']}
+
+
+def test_features_are_memory_mapped(store):
+    features = store.get_features('IntegerColumn')
+
+    assert isinstance(features, np.memmap)
+    assert features.shape == (1,)
+    assert features.dtype.names == ('min_value', 'avg_value', 'max_value', 'value_stddev')
+    assert not features.flags.writeable
+
+
+def test_integer_statistics_are_exact(tmp_path):
+    columns = [
+        IntegerColumn('large', 2 ** 53 + 1, 2. ** 53, 2 ** 63 - 1, 0.5),
+        IntegerColumn('huge', -2 ** 70 - 1, 0., 10 ** 30 + 1, 0.5),
+        TextColumn('empty', float('nan'), float('nan'), float('nan'))
+    ]
+    columnstore.write(columns, [], str(tmp_path))
+    store = ColumnStore(str(tmp_path))
+
+    large = store.get_column_by_index(0)
+    assert large.min_value == 2 ** 53 + 1
+    assert large.max_value == 2 ** 63 - 1
+    assert store.get_features('IntegerColumn')['min_value'].dtype == np.int64
+
+    # statistics which do not fit into int64
+    huge = store.get_column_by_index(1)
+    assert huge.min_value == -2 ** 70 - 1
+    assert huge.max_value == 10 ** 30 + 1
+
+    assert np.isnan(store.get_column_by_index(2).min_text_length)
+
+
+def test_unstorable_column(tmp_path):
+    with pytest.raises(UnstorableColumnException):
+        columnstore.write([YetUnknownTypeColumn('unknown')], [], str(tmp_path))
+
+
+def test_column_classes_are_known_without_creating_columns(store):
+    assert store.get_column_classes(CITY_CLS) == (TypedIDColumn,)
+    assert store.get_column_classes(str(CITY_CLS)) == (TextColumn,)
+    assert store._columns == dict()
+
+    with pytest.raises(KeyError):
+        store.get_column_classes('missing')
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+from rdflib import URIRef, XSD
+
+from util.datatypecolumns import build_datatype_columns
+from util.type import TypeHandler
+
+
+def _get_datatype(iri: URIRef, id_: str, values: list) -> TypeHandler:
+    datatype = TypeHandler(iri, id_)
+    datatype.is_datatype = True
+    datatype.values = values
+
+    return datatype
+
+
+@pytest.fixture
+def datatypes():
+    rnd = random.Random(42)
+
+    return [
+        _get_datatype(XSD.int, 'ints', [rnd.randrange(-10**12, 10**12) for _ in range(1000)]),
+        # too large for int64 arrays
+        _get_datatype(XSD.integer, 'bigInts', [10**30, 1, 2]),
+        _get_datatype(XSD.double, 'floats', [rnd.random() for _ in range(1000)]),
+        _get_datatype(XSD.string, 'strings', [f'wört {i}' if i % 3 else f'x{i}' for i in range(1000)]),
+        _get_datatype(XSD.string, 'noStrings', []),
+        # mixed values are pickled
+        _get_datatype(XSD.boolean, 'booleans', [True, False, 'true', '0']),
+        _get_datatype(URIRef('http://example.org/unknown'), 'unknown', [1.5, 2.5, 4.0])
+    ]
+
+
+def test_parallel_columns_equal_sequential_columns(datatypes):
+    sequential_columns = build_datatype_columns(datatypes, n_jobs=1)
+    parallel_columns = build_datatype_columns(datatypes, n_jobs=2)
+
+    assert len(parallel_columns) == len(datatypes)
+
+    for sequential_column, parallel_column in zip(sequential_columns, parallel_columns):
+        assert type(parallel_column) is type(sequential_column)
+        assert parallel_column.column_name == sequential_column.column_name
+        assert str(parallel_column) == str(sequential_column)
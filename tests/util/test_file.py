@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from util.knowledgesource import KnowledgeSource  # noqa: F401, resolves the import cycle of util.type
+from semanticlabeling import ColumnType
+from util import columninferencer
+from util import rdf2csv
+from util.file import FeatherInputFile, InputFile, ParquetInputFile, SampledCSVInputFile
+from tests.util.test_rdf2csv import TRIPLES
+
+
+def _get_columns(input_file):
+    return {column.column_name: input_file.get_column_type(column.column_name) for column in input_file.columns}
+
+
+def test_sampled_csv_input_file(tmp_path):
+    (tmp_path / 'cities.nt').write_text(TRIPLES)
+    rdf2csv.convert_files([str(tmp_path / 'cities.nt')], str(tmp_path / 'cities.csv'))
+
+    input_file = SampledCSVInputFile(str(tmp_path / 'cities.csv'))
+    columns = _get_columns(input_file)
+
+    assert input_file.get_column_keys()[0] == 'id'
+    assert columns['lat'] == ColumnType.Float
+    assert input_file.get_column_type('unknown') == ColumnType.Unknown
+    # the ID column links to all other columns
+    assert set(input_file.columns[0].links) == set(input_file.get_column_keys()[1:])
+
+
+def test_parquet_input_file(tmp_path):
+    pytest.importorskip('pyarrow')
+
+    (tmp_path / 'cities.nt').write_text(TRIPLES)
+    rdf2csv.convert_files([str(tmp_path / 'cities.nt')], str(tmp_path / 'cities.parquet'))
+    rdf2csv.convert_files([str(tmp_path / 'cities.nt')], str(tmp_path / 'cities.csv'))
+
+    input_file = ParquetInputFile(str(tmp_path / 'cities.parquet'))
+    csv_columns = _get_columns(SampledCSVInputFile(str(tmp_path / 'cities.csv')))
+
+    assert input_file.has_header
+    assert input_file.get_column_keys()[0] == 'id'
+    # the same columns as from the CSV file, without its dummy date column
+    assert _get_columns(input_file) == {col: t for col, t in csv_columns.items() if col != 'date'}
+
+
+def test_parquet_input_file_samples_rows(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+
+    pd.DataFrame({
+        'id': [f'row{i}' for i in range(100)],
+        'count': list(range(100))
+    }).to_parquet(tmp_path / 'rows.parquet')
+
+    series_lengths = []
+    transform_series = columninferencer.transform_series
+
+    def recording_transform_series(series, series_name):
+        series_lengths.append(len(series))
+        return transform_series(series=series, series_name=series_name)
+
+    monkeypatch.setattr(columninferencer, 'transform_series', recording_transform_series)
+    input_file = ParquetInputFile(str(tmp_path / 'rows.parquet'), max_rows=10)
+
+    assert input_file.get_column_keys() == ['id', 'count']
+    assert series_lengths == [10]
+
+
+@pytest.mark.parametrize('file_name', ['cities.feather', 'cities.arrow'])
+def test_feather_input_file(tmp_path, file_name):
+    pytest.importorskip('pyarrow')
+
+    (tmp_path / 'cities.nt').write_text(TRIPLES)
+    rdf2csv.convert_files([str(tmp_path / 'cities.nt')], str(tmp_path / file_name))
+    rdf2csv.convert_files([str(tmp_path / 'cities.nt')], str(tmp_path / 'cities.parquet'))
+
+    input_file_cls = InputFile.get_file_type_by_str(file_name.rsplit('.', 1)[-1])
+    input_file = input_file_cls(str(tmp_path / file_name))
+
+    assert input_file_cls is FeatherInputFile
+    assert _get_columns(input_file) == _get_columns(ParquetInputFile(str(tmp_path / 'cities.parquet')))
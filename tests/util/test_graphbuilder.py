@@ -243,3 +243,21 @@ def test_build_graph_from_labeled_columns():
 
     # from util import graphvisualizer
     # graphvisualizer.visualize(graph)
+
+
+def test_edge_weight():
+    assert graphbuilder.get_edge_weight(0) == graphbuilder.DEFAULT_EDGE_WEIGHT
+    assert 0 < graphbuilder.get_edge_weight(1000) < graphbuilder.get_edge_weight(10) < 1
+    assert graphbuilder.get_edge_weight(10, is_functional=True) < graphbuilder.get_edge_weight(10)
+
+
+def test_build_graph_with_weights():
+    person = IDColumn('Person', 3, 4., 5)
+    city = IDColumn('City', 3, 4., 5)
+    person.add_link_to_other_column('livesIn', city)
+    person.add_link_to_other_column('knows', person)
+
+    graph = graphbuilder.build([person, city], weights={('Person', 'livesIn', 'City'): .5})
+
+    assert {e.key: e.weight for e in graph.iter_edges()} == \
+           {'livesIn': .5, 'knows': graphbuilder.DEFAULT_EDGE_WEIGHT}
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from util.idset import CompactIDSet
+
+
+def test_behaves_like_a_set():
+    rnd = random.Random(42)
+    ids = CompactIDSet()
+    expected = set()
+
+    for _ in range(20000):
+        # IDs spread over several chunks, some of them dense
+        id_ = rnd.randrange(200000) if rnd.random() < 0.5 else rnd.randrange(70000, 80000)
+
+        if rnd.random() < 0.8:
+            ids.add(id_)
+            expected.add(id_)
+        else:
+            ids.discard(id_)
+            expected.discard(id_)
+
+    assert len(ids) == len(expected)
+    assert list(ids) == sorted(expected)
+
+    for id_ in range(0, 200000, 7):
+        assert (id_ in ids) == (id_ in expected)
+
+
+def test_dense_chunk_is_stored_as_bitmap():
+    ids = CompactIDSet(range(65536, 65536 + 10000))
+
+    assert len(ids) == 10000
+    assert ids.get_num_bytes() == 8192
+    assert 65536 + 9999 in ids
+    assert 65535 not in ids
+
+    for id_ in range(65536 + 100, 65536 + 10000):
+        ids.discard(id_)
+
+    assert list(ids) == list(range(65536, 65536 + 100))
+    assert ids.get_num_bytes() == 200
+
+
+def test_empty_chunks_are_dropped():
+    ids = CompactIDSet([3, 70000])
+    ids.discard(70000)
+    ids.discard(70000)
+    ids.remove(3)
+
+    assert len(ids) == 0
+    assert not ids
+    assert ids.get_num_bytes() == 0
+
+    with pytest.raises(KeyError):
+        ids.remove(3)
+
+
+def test_negative_ids_are_rejected():
+    with pytest.raises(ValueError):
+        CompactIDSet([-1])
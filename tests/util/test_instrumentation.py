@@ -0,0 +1,156 @@
+import json
+import os
+import tracemalloc
+
+from util.knowledgesource import KnowledgeSource
+from util.instrumentation import LoadProgress, NULL_PROFILER, ProgressHook, StageProfiler
+
+
+def test_nested_stages_are_accumulated():
+    profiler = StageProfiler()
+
+    for _ in range(2):
+        with profiler.stage('load'):
+            with profiler.stage('parse'):
+                sum(range(10000))
+
+    assert set(profiler.stages) == {'load', 'load/parse'}
+    assert profiler.stages['load'].calls == 2
+    assert profiler.stages['load/parse'].calls == 2
+    assert profiler.stages['load'].wall_seconds >= profiler.stages['load/parse'].wall_seconds
+
+
+def test_stage_is_recorded_on_exception():
+    profiler = StageProfiler()
+
+    try:
+        with profiler.stage('failing'):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert profiler.stages['failing'].calls == 1
+
+    # the failed stage is not the parent of later ones
+    with profiler.stage('next'):
+        pass
+    assert 'next' in profiler.stages
+
+
+def test_counters():
+    profiler = StageProfiler()
+    profiler.count('triples', 5)
+    profiler.count('triples', 3)
+    profiler.count('solutions')
+
+    assert profiler.get_report()['counters'] == {'triples': 8, 'solutions': 1}
+
+
+def test_disabled_profiler_records_nothing():
+    with NULL_PROFILER.stage('load'):
+        NULL_PROFILER.count('triples', 5)
+
+    report = NULL_PROFILER.get_report()
+    assert report['stages'] == {}
+    assert report['counters'] == {}
+
+
+def test_peak_traced_memory():
+    profiler = StageProfiler(trace_memory=True)
+
+    try:
+        with profiler.stage('outer'):
+            with profiler.stage('allocate'):
+                data = bytearray(8 * 2 ** 20)
+                del data
+
+            with profiler.stage('idle'):
+                pass
+    finally:
+        tracemalloc.stop()
+
+    stages = profiler.get_report()['stages']
+    assert stages['outer/allocate']['peak_traced_mb'] >= 8
+    assert stages['outer/idle']['peak_traced_mb'] < 8
+    # the peak of a nested stage is included in the enclosing one
+    assert stages['outer']['peak_traced_mb'] >= 8
+
+
+def test_cprofile_files(tmp_path):
+    profiler = StageProfiler(cprofile_dir_path=str(tmp_path))
+
+    with profiler.stage('load'):
+        with profiler.stage('parse'):
+            pass
+
+    # only the outermost stages are profiled
+    assert os.listdir(tmp_path) == ['load.prof']
+
+
+def test_report_file(tmp_path):
+    profiler = StageProfiler()
+    knowledge_source = KnowledgeSource(
+        'tests/util/test_knowledge_source.ttl',
+        sample_portion=1,
+        profiler=profiler
+    )
+    assert knowledge_source.columns
+
+    report_file_path = tmp_path / 'profile.json'
+    profiler.write_report(str(report_file_path))
+
+    with open(report_file_path) as report_file:
+        report = json.load(report_file)
+
+    assert {'parse', 'skolemize', 'process_triples', 'post_process'} <= set(report['stages'])
+    assert report['stages']['parse']['calls'] == 1
+    assert report['counters']['triples'] > 0
+    assert 'peak_traced_mb' not in report['stages']['parse']
+
+
+class _RecordingProgressHook(ProgressHook):
+    def __init__(self, interval: int):
+        super().__init__(interval)
+        self.reports = []
+        self.final_report = None
+
+    def on_progress(self, progress: LoadProgress) -> None:
+        self.reports.append(progress.to_dict())
+
+    def on_finish(self, progress: LoadProgress) -> None:
+        self.final_report = progress.to_dict()
+
+
+def test_progress_hook():
+    hook = _RecordingProgressHook(interval=10)
+    profiler = StageProfiler()
+    KnowledgeSource(
+        'tests/util/test_knowledge_source.ttl',
+        sample_portion=1,
+        profiler=profiler,
+        progress_hook=hook
+    )
+
+    final_report = hook.final_report
+    num_triples = final_report['total_triples']
+    assert final_report['processed_triples'] == num_triples
+    assert sum(final_report['predicate_classes'].values()) == num_triples
+    assert final_report['predicate_classes']['type'] > 0
+    assert final_report['predicate_classes']['statement'] > 0
+    assert 'sampled_out_statement' not in final_report['predicate_classes']
+    assert final_report['rss_mb'] > 0
+
+    # reported every 10 triples
+    assert [r['processed_triples'] for r in hook.reports] == list(range(10, num_triples + 1, 10))
+    assert hook.reports[0]['total_triples'] == num_triples
+
+    assert profiler.counters['triples/type'] == final_report['predicate_classes']['type']
+
+
+def test_progress_hook_sampled_out_statements():
+    hook = _RecordingProgressHook(interval=10)
+    KnowledgeSource('tests/util/test_knowledge_source.ttl', sample_portion=0, progress_hook=hook)
+
+    predicate_classes = hook.final_report['predicate_classes']
+    assert predicate_classes['sampled_out_statement'] > 0
+    assert 'statement' not in predicate_classes
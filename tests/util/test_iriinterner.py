@@ -0,0 +1,55 @@
+from rdflib import URIRef
+
+from util.iriinterner import IRIInterner, LocalNameRegistry
+
+
+EX1 = 'http://example.org/'
+EX2 = 'http://example.com/ont#'
+
+
+def test_interned_ids_are_dense():
+    interner = IRIInterner()
+
+    assert interner.get_id(URIRef(EX1 + 'a')) == 0
+    assert interner.get_id(URIRef(EX1 + 'b')) == 1
+    assert interner.get_id(URIRef(EX1 + 'a')) == 0
+    assert len(interner) == 2
+
+    assert interner.get_iri(1) == URIRef(EX1 + 'b')
+    assert interner.find_id(URIRef(EX1 + 'c')) is None
+    assert len(interner) == 2
+
+
+def test_local_name_collisions_are_suffixed():
+    registry = LocalNameRegistry(IRIInterner(), separator='_')
+
+    assert registry.get_name(URIRef(EX1 + 'Person')) == 'Person'
+    assert registry.get_name(URIRef(EX2 + 'Person')) == 'Person_1'
+    assert registry.get_name(URIRef('http://example.net/Person')) == 'Person_2'
+    assert registry.get_name(URIRef(EX2 + 'Person')) == 'Person_1'
+
+    assert registry.get_iri('Person_1') == URIRef(EX2 + 'Person')
+    assert registry.get_iri('Person_3') is None
+
+
+def test_suffixed_names_taken_by_local_names_are_skipped():
+    registry = LocalNameRegistry(IRIInterner())
+
+    assert registry.get_name(URIRef(EX1 + 'name1')) == 'name1'
+    assert registry.get_name(URIRef(EX1 + 'name')) == 'name'
+    assert registry.get_name(URIRef(EX2 + 'name')) == 'name2'
+    assert registry.get_name(URIRef(EX2 + 'name2')) == 'name21'
+
+
+def test_registries_share_the_interner():
+    interner = IRIInterner()
+    types = LocalNameRegistry(interner, separator='_')
+    properties = LocalNameRegistry(interner)
+
+    types.get_name(URIRef(EX1 + 'a'))
+    properties.get_name(URIRef(EX1 + 'a'))
+
+    assert len(interner) == 1
+    assert types.contains_iri(URIRef(EX1 + 'a'))
+    assert not types.contains_iri(URIRef(EX1 + 'b'))
+    assert list(properties.items()) == [(URIRef(EX1 + 'a'), 'a')]
@@ -1,9 +1,9 @@
 import pytest
-from rdflib import URIRef, FOAF
+from rdflib import Graph, Literal, RDF, RDFS, URIRef, FOAF
 
-from semanticlabeling.labeledcolumn import ColumnName, IntegerColumn, \
+from semanticlabeling.labeledcolumn import ColumnName, IntegerColumn, StringColumn, \
     LabeledColumn, TypedIDColumn
-from util.knowledgesource import KnowledgeSource
+from util.knowledgesource import KnowledgeSource, UnsupportedDeltaException
 
 
 EX = 'http://example.org/'
@@ -206,6 +206,17 @@ def test_extracted_columns(ontology):
     assert 7 == sum([isinstance(c, TypedIDColumn) for c in ontology.columns.values()])
 
 
+def test_subclass_columns_inherit_domain_links(ontology):
+    # ex:dtypeProp2 has the domain ex:Cls1, all other classes are subclasses
+    for cls in [CLS1, CLS2, CLS3, CLS4, CLS5, CLS6, CLS7]:
+        assert 'dtypeProp2' in ontology.columns[cls].links
+
+    # ex:objProp7 is the inverse of ex:objProp3, whose range ex:Cls7 has no
+    # subclasses
+    assert 'objProp7' in ontology.columns[CLS7].links
+    assert 'objProp7' not in ontology.columns[CLS3].links
+
+
 def test_extracted_columns_ks(knowledge_source):
     num_columns = (1 +  # ex:Person (TypedIDColumn)
                    1 +  # ex:BassGuitar (TypedIDColumn)
@@ -309,3 +320,261 @@ def test_inverse_functional_property_processing_ks(knowledge_source):
 def test_typeinferencer_state(knowledge_source):
     assert 0 == \
            len(knowledge_source.type_inferencer.statements_handler.untyped_resources)
+
+
+def _get_column_signature(knowledge_source: KnowledgeSource):
+    signature = dict()
+    for key, column in knowledge_source.columns.items():
+        links = {
+            (link_name, str(target))
+            for link_name, targets in column.links.items()
+            for target in targets
+        }
+        signature[key] = (type(column), str(column), frozenset(links))
+
+    return signature
+
+
+def test_apply_delta(knowledge_source, tmp_path):
+    knows_triples = [
+        (URIRef(EX + s), FOAF.knows, URIRef(EX + o))
+        for s, o in [('adam', 'chris'), ('dana', 'eric'), ('halle', 'chris')]
+    ]
+    removed = knows_triples + [
+        (URIRef(EX + 'adam'), HAS_NAME_DTYPE_PROP, Literal('Adam'))
+    ]
+    added = [
+        (URIRef(EX + 'lena'), RDF.type, PERSON_CLS),
+        (URIRef(EX + 'lena'), HAS_NAME_DTYPE_PROP, Literal('Magdalena')),
+        (URIRef(EX + 'lena'), PLAYS_OBJ_PROP, URIRef(EX + 'fender_kingman'))
+    ]
+
+    bass_guitar_column = knowledge_source.columns[BASS_GUITAR_CLS]
+    assert 'knows' in knowledge_source.columns[PERSON_CLS].links
+
+    changed_keys = knowledge_source.apply_delta(added, removed)
+
+    # only the columns of the changed properties and their domains are rebuilt
+    assert PERSON_CLS in changed_keys
+    assert BASS_GUITAR_CLS not in changed_keys
+    assert knowledge_source.columns[BASS_GUITAR_CLS] is bass_guitar_column
+
+    assert 'knows' not in knowledge_source.columns[PERSON_CLS].links
+    assert set() == knowledge_source.get_property_domains(FOAF.knows)
+
+    g = Graph()
+    g.parse('tests/util/test_knowledge_source.ttl')
+    for triple in removed:
+        g.remove(triple)
+    for triple in added:
+        g.add(triple)
+    updated_file_path = str(tmp_path / 'updated.ttl')
+    g.serialize(updated_file_path, format='turtle')
+
+    rebuilt = KnowledgeSource(updated_file_path, sample_portion=1)
+
+    assert _get_column_signature(knowledge_source) == _get_column_signature(rebuilt)
+
+
+def test_apply_delta_does_not_remove_declared_domain(ontology):
+    ontology.apply_delta(
+        added=[(URIRef(EX + 'inst1'), RDF.type, CLS1)],
+        removed=[]
+    )
+    domains = ontology.get_property_domains(DTYPE_PROP1)
+    assert CLS1 in domains
+
+    ontology.apply_delta(
+        added=[(URIRef(EX + 'inst1'), DTYPE_PROP1, Literal(23))],
+        removed=[]
+    )
+    ontology.apply_delta(
+        added=[],
+        removed=[(URIRef(EX + 'inst1'), DTYPE_PROP1, Literal(23))]
+    )
+
+    assert domains == ontology.get_property_domains(DTYPE_PROP1)
+
+
+def test_apply_delta_rejects_schema_removals(ontology):
+    with pytest.raises(UnsupportedDeltaException):
+        ontology.apply_delta(added=[], removed=[(CLS2, RDFS.subClassOf, CLS1)])
+
+    assert CLS2 in ontology.get_subclasses_of(CLS1)
+
+
+def test_columns_are_built_on_demand(knowledge_source):
+    columns = knowledge_source.columns
+
+    assert not any(columns.is_materialized(key) for key in columns)
+    assert columns.get_column_classes(PERSON_CLS) == (TypedIDColumn,)
+
+    person_column = columns[PERSON_CLS]
+
+    assert columns.is_materialized(PERSON_CLS)
+    assert not columns.is_materialized(BASS_GUITAR_CLS)
+    assert columns[PERSON_CLS] is person_column
+    assert columns.get_column_classes(PERSON_CLS) == (TypedIDColumn,)
+
+
+def test_get_comparable_columns(knowledge_source):
+    columns = knowledge_source.columns
+    comparable_columns = knowledge_source.get_comparable_columns(
+        IntegerColumn('age', 18, 42.5, 99, 20))
+
+    # the string column cannot be compared and hence is not built
+    assert comparable_columns == []
+    assert not columns.is_materialized('hasName')
+
+    comparable_columns = knowledge_source.get_comparable_columns(
+        TypedIDColumn('id', 0, 0, 0))
+
+    assert {id(c) for c in comparable_columns} == \
+           {id(columns[key]) for key in [PERSON_CLS, BASS_GUITAR_CLS, PICK_UP_SETTING_CLS]}
+    assert not columns.is_materialized('hasName')
+
+
+def test_build_columns(knowledge_source):
+    knowledge_source.build_columns(n_jobs=2)
+
+    assert all(knowledge_source.columns.is_materialized(key) for key in knowledge_source.columns)
+    assert isinstance(knowledge_source.columns['hasName'], StringColumn)
+
+
+def test_graphs_are_memoized(knowledge_source):
+    graph = knowledge_source.get_csr_graph()
+
+    assert knowledge_source.get_csr_graph() is graph
+    assert knowledge_source.get_graph() is knowledge_source.get_graph()
+
+    knowledge_source.apply_delta(
+        added=[(URIRef(EX + 'lena'), RDF.type, PERSON_CLS)],
+        removed=[]
+    )
+
+    assert knowledge_source.get_csr_graph() is not graph
+
+
+def test_csr_graph_does_not_build_columns(knowledge_source):
+    from util.steiner import CSRGraph
+
+    graph = knowledge_source.get_csr_graph()
+    columns = knowledge_source.columns
+
+    assert not any(columns.is_materialized(key) for key in columns)
+
+    # the same graph as the one of the built columns
+    built_graph = CSRGraph.from_columns(
+        list(columns.values()),
+        knowledge_source.type_inferencer.get_edge_weights()
+    )
+
+    def get_weighted_edges(g):
+        return sorted((*g.get_edge_triple(idx), g.weights[idx]) for idx in range(g.get_num_edges()))
+
+    assert graph.node_ids == built_graph.node_ids
+    assert get_weighted_edges(graph) == get_weighted_edges(built_graph)
+
+
+def test_edge_weights_reflect_usage(knowledge_source):
+    weights = knowledge_source.type_inferencer.get_edge_weights()
+
+    # ex:plays is used by every person, foaf:knows only by some of them
+    assert weights[('Person', 'plays', 'BassGuitar')] < weights[('Person', 'knows', 'Person')]
+    assert all(0 < weight <= 1 for weight in weights.values())
+
+    graph = knowledge_source.get_csr_graph()
+    for idx in range(graph.get_num_edges()):
+        source, target, key = graph.get_edge_triple(idx)
+        assert graph.weights[idx] == weights[(source, key, target)]
+
+
+def test_class_closure_is_computed_once(monkeypatch):
+    from util.classhierarchy import ClassHierarchy
+
+    num_closures = 0
+    compute_closure = ClassHierarchy.compute_closure
+
+    def counting_compute_closure(self):
+        nonlocal num_closures
+        num_closures += 1
+        compute_closure(self)
+
+    monkeypatch.setattr(ClassHierarchy, 'compute_closure', counting_compute_closure)
+    ontology = KnowledgeSource('tests/util/test_ontology.ttl', sample_portion=1)
+
+    assert num_closures == 1
+    assert ontology.get_subclasses_of(CLS1)
+    assert num_closures == 1
+
+
+def test_subclass_tests_are_deferred_until_closure(ontology, monkeypatch):
+    from util.classhierarchy import ClassHierarchy
+
+    num_searches = 0
+    get_reachable_bits = ClassHierarchy._get_reachable_bits
+
+    def counting_get_reachable_bits(self, subclass_idx):
+        nonlocal num_searches
+        num_searches += 1
+        return get_reachable_bits(self, subclass_idx)
+
+    monkeypatch.setattr(ClassHierarchy, '_get_reachable_bits', counting_get_reachable_bits)
+
+    inst1, inst2, inst3 = URIRef(EX + 'inst1'), URIRef(EX + 'inst2'), URIRef(EX + 'inst3')
+    changed_keys = ontology.apply_delta(
+        added=[
+            (inst3, RDF.type, CLS5),
+            (inst3, OBJ_PROP9, inst2),
+            (inst1, OBJ_PROP9, inst2),
+            (CLS7, RDFS.subClassOf, CLS6),
+            (inst1, RDF.type, CLS7),
+            (inst2, RDF.type, CLS6)
+        ],
+        removed=[]
+    )
+
+    # the subclass tests of the statements about the untyped resources are
+    # only done after the closure was computed
+    assert num_searches == 0
+    assert {CLS5, CLS7} <= ontology.get_property_domains(OBJ_PROP9)
+    assert CLS6 in ontology.get_property_ranges(OBJ_PROP9)
+    assert CLS7 in changed_keys
+
+
+def test_apply_delta_counts_statements_about_untyped_resources(ontology):
+    inst1 = URIRef(EX + 'inst1')
+    new_prop = URIRef(EX + 'newProp')
+    statements = [(inst1, new_prop, Literal(value)) for value in range(3)]
+
+    # the statements are pending until inst1 gets typed
+    ontology.apply_delta(added=statements, removed=[])
+    ontology.apply_delta(added=[], removed=statements[:1])
+    ontology.apply_delta(added=[(inst1, RDF.type, CLS5)], removed=[])
+    assert ontology.get_property_domains(new_prop) == {CLS5}
+
+    ontology.apply_delta(added=[], removed=statements[1:2])
+    assert ontology.get_property_domains(new_prop) == {CLS5}
+
+    ontology.apply_delta(added=[], removed=statements[2:])
+    assert ontology.get_property_domains(new_prop) == set()
+
+
+def test_apply_delta_ignores_removed_sampled_out_statements():
+    ontology = KnowledgeSource('tests/util/test_ontology.ttl', sample_portion=0.5)
+    inst1 = URIRef(EX + 'inst1')
+    new_prop = URIRef(EX + 'newProp')
+
+    statements = [(inst1, new_prop, Literal(value)) for value in range(20)]
+    sampled = [triple for triple in statements if ontology._is_sampled(*triple)]
+    sampled_out = [triple for triple in statements if not ontology._is_sampled(*triple)]
+    assert sampled and sampled_out
+
+    ontology.apply_delta(added=[(inst1, RDF.type, CLS5), sampled[0], sampled_out[0]], removed=[])
+    assert ontology.get_property_domains(new_prop) == {CLS5}
+
+    ontology.apply_delta(added=[], removed=[sampled_out[0]])
+    assert ontology.get_property_domains(new_prop) == {CLS5}
+
+    ontology.apply_delta(added=[], removed=[sampled[0]])
+    assert ontology.get_property_domains(new_prop) == set()
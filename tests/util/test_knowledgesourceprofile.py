@@ -0,0 +1,148 @@
+import os
+import shutil
+
+import pytest
+from rdflib import URIRef
+
+from semanticlabeling.labeledcolumn import TypedIDColumn
+from util import knowledgesourceprofile
+from util.knowledgesource import KnowledgeSource
+from util.knowledgesourceprofile import IncompatibleProfileException
+
+
+EX = 'http://example.org/'
+
+CLS1 = URIRef(EX + 'Cls1')
+
+
+def _get_column_signature(knowledge_source: KnowledgeSource):
+    signature = dict()
+    for key, column in knowledge_source.columns.items():
+        links = {
+            (link_name, str(target))
+            for link_name, targets in column.links.items()
+            for target in targets
+        }
+        signature[key] = (type(column), str(column), frozenset(links))
+
+    return signature
+
+
+@pytest.fixture(params=[
+    'tests/util/test_ontology.ttl',
+    'tests/util/test_knowledge_source.ttl'
+])
+def knowledge_source_and_profile(request, tmp_path):
+    knowledge_source = KnowledgeSource(request.param, sample_portion=1)
+
+    profile_dir_path = str(tmp_path / 'profile')
+    knowledgesourceprofile.save(knowledge_source, profile_dir_path)
+
+    return knowledge_source, knowledgesourceprofile.load(profile_dir_path)
+
+
+def test_columns_are_restored(knowledge_source_and_profile):
+    knowledge_source, restored = knowledge_source_and_profile
+
+    assert _get_column_signature(knowledge_source) == _get_column_signature(restored)
+    assert str(knowledge_source.label_column) == str(restored.label_column)
+    assert str(knowledge_source.comment_column) == str(restored.comment_column)
+
+
+def test_hierarchy_is_restored(knowledge_source_and_profile):
+    knowledge_source, restored = knowledge_source_and_profile
+
+    assert knowledge_source.get_classes() == restored.get_classes()
+    assert knowledge_source.get_object_properties() == restored.get_object_properties()
+    assert knowledge_source.get_datatype_properties() == restored.get_datatype_properties()
+
+    for cls in knowledge_source.get_classes():
+        assert knowledge_source.get_subclasses_of(cls) == restored.get_subclasses_of(cls)
+        assert knowledge_source.get_superclasses_of(cls) == restored.get_superclasses_of(cls)
+
+    for prop in knowledge_source.get_object_properties() | knowledge_source.get_datatype_properties():
+        assert knowledge_source.get_property_domains(prop) == restored.get_property_domains(prop)
+        assert knowledge_source.get_property_ranges(prop) == restored.get_property_ranges(prop)
+        assert knowledge_source.get_subproperties_of(prop) == restored.get_subproperties_of(prop)
+
+
+def test_graph_is_restored(knowledge_source_and_profile):
+    knowledge_source, restored = knowledge_source_and_profile
+    graph = knowledge_source.get_csr_graph()
+    restored_graph = restored.get_csr_graph()
+
+    def get_edge_triples(g):
+        return sorted(g.get_edge_triple(idx) for idx in range(g.get_num_edges()))
+
+    assert restored_graph is not graph
+    assert restored_graph.node_ids == graph.node_ids
+    assert get_edge_triples(restored_graph) == get_edge_triples(graph)
+    assert restored_graph.adj_nodes.tolist() == graph.adj_nodes.tolist()
+
+
+def test_restored_type_column_is_shared_with_type_handler(knowledge_source_and_profile):
+    _, restored = knowledge_source_and_profile
+
+    for type_iri, type_ in restored.type_inferencer.types_handler.types.items():
+        column = restored.columns.get(type_iri)
+        if column is not None:
+            assert isinstance(column, TypedIDColumn)
+            assert column is type_.get_id_column()
+
+
+def test_instance_data_is_not_stored(knowledge_source_and_profile):
+    _, restored = knowledge_source_and_profile
+
+    for type_ in restored.type_inferencer.types_handler.types.values():
+        assert len(type_.instances) == 0
+
+    for datatype_ in restored.type_inferencer.types_handler.datatypes.values():
+        assert len(datatype_.values) == 0
+
+
+def test_incompatible_profile_version(tmp_path, monkeypatch):
+    knowledge_source = KnowledgeSource('tests/util/test_ontology.ttl', sample_portion=1)
+    profile_dir_path = str(tmp_path / 'profile')
+    knowledgesourceprofile.save(knowledge_source, profile_dir_path)
+
+    monkeypatch.setattr(
+        knowledgesourceprofile,
+        'PROFILE_VERSION',
+        knowledgesourceprofile.PROFILE_VERSION + 1
+    )
+
+    with pytest.raises(IncompatibleProfileException):
+        knowledgesourceprofile.load(profile_dir_path)
+
+
+def test_load_or_create_detects_file_changes(tmp_path):
+    knowledge_source_file_path = str(tmp_path / 'ontology.ttl')
+    shutil.copy('tests/util/test_ontology.ttl', knowledge_source_file_path)
+    cache_dir = str(tmp_path / 'cache')
+
+    knowledgesourceprofile.load_or_create(knowledge_source_file_path, 1.0, cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # cache hit
+    knowledge_source = knowledgesourceprofile.load_or_create(
+        knowledge_source_file_path, 1.0, cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    assert CLS1 in knowledge_source.get_classes()
+
+    with open(knowledge_source_file_path, 'a') as f:
+        f.write('\n<http://example.org/Cls8> <http://www.w3.org/2000/01/rdf-schema#subClassOf> '
+                '<http://example.org/Cls1> .\n')
+
+    knowledge_source = knowledgesourceprofile.load_or_create(
+        knowledge_source_file_path, 1.0, cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+    assert URIRef(EX + 'Cls8') in knowledge_source.get_subclasses_of(CLS1)
+
+
+def test_edge_weights_are_restored(knowledge_source_and_profile):
+    knowledge_source, restored = knowledge_source_and_profile
+
+    assert knowledge_source.type_inferencer.get_edge_weights() == \
+           restored.type_inferencer.get_edge_weights()
+    assert restored.get_csr_graph().weights.tolist() == \
+           knowledge_source.get_csr_graph().weights.tolist()
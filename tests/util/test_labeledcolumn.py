@@ -0,0 +1,71 @@
+import pickle
+
+import pandas as pd
+
+from semanticlabeling.labeledcolumn import CategoriesColumn, DateTimeColumn, \
+    IntegerColumn, TextColumn, TypedIDColumn, UntypedIDColumn, \
+    WGS84LatitudeColumn, YetUnknownTypeColumn
+
+
+def _get_columns():
+    return [
+        TypedIDColumn('City', 3, 4.5, 6),
+        UntypedIDColumn(),
+        TextColumn('name', 1, 2.5, 4),
+        IntegerColumn('population', 10, 20.5, 30, 1.5),
+        WGS84LatitudeColumn('lat', -1.5, 0.0, 1.5, 0.2),
+        CategoriesColumn('kind', ['town', 'city']),
+        DateTimeColumn('founded', pd.Timestamp('1203-05-01'), pd.NaT, pd.Timestamp('2001-12-24')),
+        YetUnknownTypeColumn('unknown')
+    ]
+
+
+def test_columns_have_no_instance_dict():
+    for column in _get_columns():
+        assert not hasattr(column, '__dict__')
+
+
+def test_links_are_allocated_lazily():
+    city = TypedIDColumn('City')
+    name = TextColumn('name', 1, 2.5, 4)
+
+    assert list(city.iter_links()) == []
+    assert city._links is None
+
+    city.add_link_to_other_column('name', name)
+    assert city.links == {'name': {name}}
+    assert list(city.iter_links()) == [('name', {name})]
+
+    city.clear_links()
+    assert list(city.iter_links()) == []
+    assert city._links is None
+
+
+def test_links_of_column_without_links_are_mutable():
+    city = TypedIDColumn('City')
+    name = TextColumn('name', 1, 2.5, 4)
+
+    city.links['name'] = {name}
+
+    assert city.links == {'name': {name}}
+    assert list(city.iter_links()) == [('name', {name})]
+
+
+def test_pickle_round_trip():
+    columns = _get_columns()
+    columns[0].add_link_to_other_column('name', columns[2])
+    columns[0].add_link_to_other_column('twinCity', columns[0])
+
+    restored = pickle.loads(pickle.dumps(columns))
+
+    for column, restored_column in zip(columns, restored):
+        assert type(restored_column) is type(column)
+        assert restored_column.column_name == column.column_name
+
+        if not isinstance(column, (UntypedIDColumn, YetUnknownTypeColumn)):
+            assert str(restored_column) == str(column)
+
+    city = restored[0]
+    assert city.links['name'] == {restored[2]}
+    assert city.links['twinCity'] == {city}
+    assert len(restored[2].links) == 0
@@ -0,0 +1,169 @@
+from rdflib import URIRef
+
+from semanticlabeling.labeledcolumn import StringColumn
+from util import knowledgesourceprofile
+from util.knowledgesource import KnowledgeSource
+from util.mergedgraphbuilder import MergedGraphBuilder
+from util.steiner import MehlhornSolver
+
+EX = 'http://example.org/'
+
+
+def _get_edge_triples(graph):
+    return {graph.get_edge_triple(idx) for idx in range(graph.get_num_edges())}
+
+
+def test_single_knowledge_source():
+    knowledge_source = KnowledgeSource('tests/util/test_knowledge_source.ttl', sample_portion=1)
+    builder = MergedGraphBuilder()
+
+    assert builder.add_knowledge_source(knowledge_source) == 0
+
+    graph = builder.get_graph()
+    ks_graph = knowledge_source.get_csr_graph()
+
+    assert graph.get_num_nodes() == ks_graph.get_num_nodes()
+    assert graph.get_num_edges() == ks_graph.get_num_edges()
+    assert builder.get_node_id(0, 'Person') == EX + 'Person'
+    assert builder.get_node_id(0, 'hasName') == '0:hasName'
+    # the edges are labeled with the property IRIs
+    assert (EX + 'Person', EX + 'BassGuitar', EX + 'plays') in _get_edge_triples(graph)
+
+
+def test_shared_classes_are_merged():
+    knowledge_source = KnowledgeSource('tests/util/test_knowledge_source.ttl', sample_portion=1)
+    ontology = KnowledgeSource('tests/util/test_ontology.ttl', sample_portion=1)
+
+    builder = MergedGraphBuilder()
+    builder.add_knowledge_source(knowledge_source)
+    graph = builder.get_graph()
+    builder.add_knowledge_source(knowledge_source)
+
+    merged_graph = builder.get_graph()
+    assert merged_graph is not graph
+
+    # the classes are shared, the datatype columns are not
+    assert builder.get_node_id(1, 'Person') == builder.get_node_id(0, 'Person')
+    assert builder.get_node_id(1, 'hasName') == '1:hasName'
+    assert merged_graph.get_num_nodes() == graph.get_num_nodes() + 1
+    assert merged_graph.get_num_edges() == graph.get_num_edges() + 1
+
+    builder.add_knowledge_source(ontology)
+    merged_graph = builder.get_graph()
+
+    assert len(set(merged_graph.node_ids)) == merged_graph.get_num_nodes()
+    assert all(
+        source in merged_graph.node_idxs and target in merged_graph.node_idxs
+        for source, target, _ in _get_edge_triples(merged_graph)
+    )
+
+
+def test_solve_across_knowledge_sources():
+    knowledge_source = KnowledgeSource('tests/util/test_knowledge_source.ttl', sample_portion=1)
+    builder = MergedGraphBuilder()
+    builder.add_knowledge_source(knowledge_source)
+    builder.add_knowledge_source(knowledge_source)
+
+    # the names of the first and the pick up settings of the second source
+    terminal_nodes = {
+        builder.get_node_id(0, 'hasName'),
+        builder.get_node_id(1, 'PickupSetting')
+    }
+    solution = MehlhornSolver(builder.get_graph(), terminal_nodes).run()[0]
+
+    assert {(e.source, e.target, e.key) for e in solution.graph.iter_edges()} == {
+        (EX + 'Person', '0:hasName', EX + 'hasName'),
+        (EX + 'Person', EX + 'BassGuitar', EX + 'plays'),
+        (EX + 'BassGuitar', EX + 'PickupSetting', EX + 'hasPickupSetting')
+    }
+
+
+def _write_ttl(file_path, prefixes, triples):
+    file_path.write_text(
+        ''.join(f'@prefix {prefix}: <{iri}> .\n' for prefix, iri in prefixes.items()) + triples
+    )
+    return str(file_path)
+
+
+_PREFIXES = {
+    'a': 'http://a.org/',
+    'b': 'http://b.org/',
+    'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+    'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
+    'owl': 'http://www.w3.org/2002/07/owl#'
+}
+
+
+def test_class_and_datatype_property_with_same_local_name(tmp_path):
+    file_path = _write_ttl(tmp_path / 'clash.ttl', _PREFIXES, """
+a:name rdf:type owl:Class .
+a:City rdf:type owl:Class .
+b:name rdf:type owl:DatatypeProperty ; rdfs:domain a:City .
+a:hasName rdf:type owl:ObjectProperty ; rdfs:domain a:City ; rdfs:range a:name .
+a:hamburg rdf:type a:City ; b:name "Hamburg" ; a:hasName a:hamburg_name .
+a:hamburg_name rdf:type a:name .
+""")
+    knowledge_source = KnowledgeSource(file_path, sample_portion=1)
+    builder = MergedGraphBuilder()
+    builder.add_knowledge_source(knowledge_source)
+
+    knowledge_source.build_columns()
+    class_column_name = knowledge_source.columns[URIRef('http://a.org/name')].column_name
+    string_column_name, = [
+        column.column_name for key, column in knowledge_source.columns.items()
+        if not isinstance(key, URIRef)
+    ]
+    # either of them is called 'name', depending on the order of the triples
+    assert {class_column_name, string_column_name} == {'name', 'name_1'}
+
+    # the string column and the class column are separate nodes
+    assert builder.get_node_id(0, string_column_name) == f'0:{string_column_name}'
+    assert builder.get_node_id(0, class_column_name) == 'http://a.org/name'
+    assert _get_edge_triples(builder.get_graph()) == {
+        ('http://a.org/City', f'0:{string_column_name}', 'http://b.org/name'),
+        ('http://a.org/City', 'http://a.org/name', 'http://a.org/hasName')
+    }
+
+
+def test_properties_with_same_local_name_are_not_merged(tmp_path):
+    def write_knowledge_source(file_name, prefix):
+        return _write_ttl(tmp_path / file_name, _PREFIXES, f"""
+a:City rdf:type owl:Class .
+a:Country rdf:type owl:Class .
+{prefix}:in rdf:type owl:ObjectProperty ; rdfs:domain a:City ; rdfs:range a:Country .
+a:hamburg rdf:type a:City ; {prefix}:in a:germany .
+a:germany rdf:type a:Country .
+""")
+
+    builder = MergedGraphBuilder()
+    builder.add_knowledge_source(KnowledgeSource(write_knowledge_source('a.ttl', 'a'), sample_portion=1))
+    builder.add_knowledge_source(KnowledgeSource(write_knowledge_source('b.ttl', 'b'), sample_portion=1))
+
+    assert _get_edge_triples(builder.get_graph()) == {
+        ('http://a.org/City', 'http://a.org/Country', 'http://a.org/in'),
+        ('http://a.org/City', 'http://a.org/Country', 'http://b.org/in')
+    }
+
+
+def test_only_comparable_columns_are_built(tmp_path):
+    # the steps of bin/infermapping: load the knowledge source (once without
+    # and once with a cached profile), merge the graphs and match an input column
+    cache_dir = str(tmp_path / 'cache')
+    input_column = StringColumn('name', 3, 5.5, 11)
+
+    knowledge_source = KnowledgeSource('tests/util/test_knowledge_source.ttl', sample_portion=1)
+    knowledgesourceprofile.load_or_create(
+        'tests/util/test_knowledge_source.ttl', 1.0, cache_dir)
+    restored = knowledgesourceprofile.load_or_create(
+        'tests/util/test_knowledge_source.ttl', 1.0, cache_dir)
+
+    for ks in [knowledge_source, restored]:
+        MergedGraphBuilder().add_knowledge_source(ks)
+        assert not ks.columns.is_materialized('hasName')
+
+        assert [c.column_name for c in ks.get_comparable_columns(input_column)] == ['hasName']
+        assert ks.columns.is_materialized('hasName')
+
+    # the restored profile creates the ID columns of its type handlers upfront
+    assert [key for key in knowledge_source.columns
+            if knowledge_source.columns.is_materialized(key)] == ['hasName']
@@ -0,0 +1,223 @@
+import csv
+
+import pytest
+from rdflib import Literal, URIRef
+
+from util import rdf2csv
+
+EX = 'http://example.org/'
+GEO = 'http://www.opengis.net/ont/geosparql#'
+RDFS_LABEL = '<http://www.w3.org/2000/01/rdf-schema#label>'
+
+# the triples of ex:hamburg are split in two runs
+TRIPLES = f'''
+<{EX}hamburg> {RDFS_LABEL} "Hamburg"@en .
+<{EX}hamburg> <{GEO}hasGeometry> <{EX}hamburg_geom> .
+<{EX}berlin> {RDFS_LABEL} "Berlin"@en .
+<{EX}berlin> <{EX}country> <{EX}Germany> .
+<{EX}berlin> <{EX}population> "3677472" .
+<{EX}berlin> <{GEO}hasGeometry> <{EX}berlin_geom> .
+<{EX}hamburg> <{EX}country> <{EX}Germany> .
+<{EX}berlin_geom> <{GEO}asWKT> "Point(13.383333333 52.516666666)" .
+<{EX}hamburg_geom> <{GEO}asWKT> "Point(10.0 53.55)" .
+<{EX}leipzig> {RDFS_LABEL} "Leipzig"@en .
+<{EX}leipzig> <{GEO}hasGeometry> <{EX}leipzig_geom> .
+'''
+
+
+def _read_csv(file_path):
+    with open(file_path) as csv_file:
+        rows = list(csv.reader(csv_file))
+
+    header = rows[0]
+    return {row[0]: dict(zip(header, row)) for row in rows[1:]}, header
+
+
+def test_convert_ntriples(tmp_path):
+    input_file_path = tmp_path / 'cities.nt'
+    input_file_path.write_text(TRIPLES)
+
+    output_file_path = tmp_path / 'streamed.csv'
+    rdf2csv.convert_ntriples(
+        str(input_file_path),
+        str(output_file_path),
+        max_buffered_rows=2,
+        tmp_dir_path=str(tmp_path)
+    )
+    rows, header = _read_csv(output_file_path)
+
+    assert header[0] == 'id' and header[-1] == 'date'
+    assert sorted(header[1:-1]) == ['country', 'label', 'lat', 'lon']
+    # ex:leipzig has no coordinates
+    assert set(rows) == {'berlin', 'hamburg', 'leipzig'}
+    assert rows['hamburg']['label'] == 'Hamburg'
+    assert rows['hamburg']['country'] == 'Germany'
+    assert float(rows['hamburg']['lat']) == 53.55
+    assert float(rows['berlin']['lon']) == 13.383333333
+    assert rows['leipzig']['lat'] == ''
+
+    # the spilled runs are removed
+    assert {path.name for path in tmp_path.iterdir()} == {'cities.nt', 'streamed.csv'}
+
+
+def test_convert_ntriples_matches_convert(tmp_path):
+    input_file_path = tmp_path / 'cities.nt'
+    input_file_path.write_text(TRIPLES)
+
+    rdf2csv.convert(str(input_file_path), str(tmp_path / 'parsed.csv'))
+    rdf2csv.convert_ntriples(str(input_file_path), str(tmp_path / 'streamed.csv'))
+
+    parsed_rows, parsed_header = _read_csv(tmp_path / 'parsed.csv')
+    streamed_rows, streamed_header = _read_csv(tmp_path / 'streamed.csv')
+
+    assert sorted(parsed_header) == sorted(streamed_header)
+    for key, row in parsed_rows.items():
+        assert {col: float(v) if col in ('lat', 'lon') and v else v for col, v in row.items()} == \
+               {col: float(v) if col in ('lat', 'lon') and v else v for col, v in streamed_rows[key].items()}
+
+
+def test_merge_sorted(tmp_path):
+    runs = [[(i, run_idx) for i in range(run_idx, 100, 7)] for run_idx in range(7)]
+    streams = [rdf2csv._read_run(rdf2csv._write_run(str(tmp_path), run)) for run in runs]
+
+    merged = list(rdf2csv._merge_sorted(streams, str(tmp_path), fan_in=2))
+
+    assert merged == sorted(record for run in runs for record in run)
+
+
+def test_convert_ntriples_bounds_open_runs(tmp_path, monkeypatch):
+    num_open_runs = 0
+    max_open_runs = 0
+    read_run = rdf2csv._read_run
+
+    def counting_read_run(file_path):
+        nonlocal num_open_runs, max_open_runs
+        num_open_runs += 1
+        max_open_runs = max(max_open_runs, num_open_runs)
+        try:
+            yield from read_run(file_path)
+        finally:
+            num_open_runs -= 1
+
+    monkeypatch.setattr(rdf2csv, '_read_run', counting_read_run)
+    monkeypatch.setattr(rdf2csv, 'MAX_MERGE_FAN_IN', 2)
+
+    input_file_path = tmp_path / 'cities.nt'
+    input_file_path.write_text(TRIPLES)
+    rdf2csv.convert_ntriples(str(input_file_path), str(tmp_path / 'streamed.csv'), max_buffered_rows=1)
+    rdf2csv.convert(str(input_file_path), str(tmp_path / 'parsed.csv'))
+
+    assert max_open_runs <= 2
+    assert _read_csv(tmp_path / 'streamed.csv')[0].keys() == _read_csv(tmp_path / 'parsed.csv')[0].keys()
+    assert _read_csv(tmp_path / 'streamed.csv')[0]['hamburg']['country'] == 'Germany'
+
+
+def test_column_registry():
+    registry = rdf2csv.ColumnRegistry()
+
+    assert registry.get_column_id(URIRef('http://foo.com/name')) == 'name'
+    assert registry.get_column_id(URIRef('http://bar.com/ns#name')) == 'name1'
+    assert registry.get_column_id(URIRef('http://foo.com/name1')) == 'name11'
+    assert registry.get_column_id(URIRef('http://baz.com/name')) == 'name2'
+    assert registry.get_column_id(URIRef('http://bar.com/ns#name')) == 'name1'
+
+    # conversions do not share their column IDs
+    assert rdf2csv.ColumnRegistry().get_column_id(URIRef('http://baz.com/name')) == 'name'
+
+    with pytest.raises(Exception):
+        registry.get_column_id(Literal('name'))
+
+
+def test_column_registry_scales_linearly():
+    registry = rdf2csv.ColumnRegistry()
+    properties = [URIRef(f'http://example.org/ns{i}#name') for i in range(20000)]
+
+    column_ids = [registry.get_column_id(p) for p in properties]
+
+    assert column_ids[:3] == ['name', 'name1', 'name2']
+    assert len(set(column_ids)) == len(properties)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 3])
+def test_convert_files(tmp_path, n_jobs):
+    lines = TRIPLES.strip().split('\n')
+    # ex:hamburg and its geometry are spread over both files
+    (tmp_path / 'part1.nt').write_text('\n'.join(lines[:5]) + '\n')
+    (tmp_path / 'part2.nt').write_text('\n'.join(lines[5:]) + '\n')
+    (tmp_path / 'all.nt').write_text(TRIPLES)
+
+    rdf2csv.convert_ntriples(str(tmp_path / 'all.nt'), str(tmp_path / 'expected.csv'))
+    expected_rows, expected_header = _read_csv(tmp_path / 'expected.csv')
+
+    rdf2csv.convert_files(
+        [str(tmp_path / 'part1.nt'), str(tmp_path / 'part2.nt')],
+        str(tmp_path / 'files.csv'),
+        n_jobs=n_jobs,
+        max_buffered_rows=2
+    )
+    # shards of a single file
+    rdf2csv.convert_files([str(tmp_path / 'all.nt')], str(tmp_path / 'shards.csv'), n_jobs=n_jobs)
+
+    for file_name in ['files.csv', 'shards.csv']:
+        rows, header = _read_csv(tmp_path / file_name)
+
+        assert sorted(header) == sorted(expected_header)
+        assert rows == expected_rows
+
+
+def test_shard_reader(tmp_path):
+    file_path = tmp_path / 'lines.txt'
+    file_path.write_bytes(b'a\nbb\nccc\ndddd\n')
+
+    def read_shard(start, end):
+        with open(file_path, 'rb') as f:
+            return rdf2csv._ShardReader(f, start, end).read()
+
+    # each line belongs to the shard it starts in
+    assert [read_shard(0, 3), read_shard(3, 6), read_shard(6, 14)] == \
+           [b'a\nbb\n', b'ccc\n', b'dddd\n']
+    assert read_shard(0, 2) + read_shard(2, 14) == file_path.read_bytes()
+
+
+def test_typed_frame():
+    df = rdf2csv._get_typed_frame(
+        ['label', 'population', 'founded', 'lat'],
+        iter([
+            ('berlin', {'label': 'Berlin', 'population': '3677472', 'founded': '1990-10-03', 'lat': 52.5}),
+            ('hamburg', {'label': 'Hamburg', 'founded': '2001-05-07', 'lat': 53.55})
+        ])
+    )
+
+    assert list(df['id']) == ['berlin', 'hamburg']
+    assert df['lat'].dtype == float
+    assert df['population'].dtype == float
+    assert str(df['founded'].dtype).startswith('datetime64')
+    assert df['label'].dtype == object
+
+
+def test_convert_files_to_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+
+    (tmp_path / 'all.nt').write_text(TRIPLES)
+    rdf2csv.convert_files([str(tmp_path / 'all.nt')], str(tmp_path / 'cities.parquet'))
+
+    import pandas as pd
+    df = pd.read_parquet(tmp_path / 'cities.parquet')
+
+    assert set(df['id']) == {'berlin', 'hamburg', 'leipzig'}
+    assert df['lat'].dtype == float
+
+
+def test_convert_files_to_feather(tmp_path):
+    pytest.importorskip('pyarrow')
+
+    (tmp_path / 'all.nt').write_text(TRIPLES)
+    rdf2csv.convert_files([str(tmp_path / 'all.nt')], str(tmp_path / 'cities.feather'))
+
+    import pandas as pd
+    df = pd.read_feather(tmp_path / 'cities.feather').set_index('id')
+
+    assert set(df.columns) == {'label', 'country', 'lat', 'lon'}
+    assert df.loc['hamburg', 'lat'] == 53.55
+    assert pd.isna(df.loc['leipzig', 'lat'])
+    assert df.loc['berlin', 'country'] == 'Germany'
@@ -0,0 +1,239 @@
+import random
+
+from steiner_tree.bank import BankEdge, BankGraph, BankNode, BankSolver, Solution
+
+from semanticlabeling.labeledcolumn import IDColumn, StringColumn
+from util.steiner import CSRGraph, MehlhornSolver, _MehlhornSearch, reduce_graph
+
+
+def _get_edge_triples(solution: Solution):
+    return {(e.source, e.target, e.key) for e in solution.graph.iter_edges()}
+
+
+def test_csr_adjacency():
+    graph = CSRGraph(['a', 'b'], [('a', 'b', 'p', 1.), ('b', 'c', 'q', 2.), ('a', 'c', 'r', 3.)])
+
+    assert graph.node_ids == ['a', 'b', 'c']
+    assert graph.get_num_edges() == 3
+    assert graph.get_edge_triple(1) == ('b', 'c', 'q')
+
+    neighbours = {
+        graph.node_ids[node_idx]: {
+            graph.node_ids[other]
+            for other in graph.adj_nodes[graph.indptr[node_idx]:graph.indptr[node_idx + 1]]
+        }
+        for node_idx in range(graph.get_num_nodes())
+    }
+    assert neighbours == {'a': {'b', 'c'}, 'b': {'a', 'c'}, 'c': {'a', 'b'}}
+
+
+def test_graph_from_columns():
+    person = IDColumn('Person', 3, 4., 5)
+    city = IDColumn('City', 3, 4., 5)
+    name = StringColumn('name', 3, 4., 5)
+    person.add_link_to_other_column('livesIn', city)
+    person.add_link_to_other_column('name', name)
+    city.add_link_to_other_column('name', name)
+
+    graph = CSRGraph.from_columns([person, city, name, None])
+
+    assert graph.node_ids == ['Person', 'City', 'name']
+    assert {graph.get_edge_triple(idx) for idx in range(graph.get_num_edges())} == {
+        ('Person', 'City', 'livesIn'),
+        ('Person', 'name', 'name'),
+        ('City', 'name', 'name')
+    }
+
+
+def test_steiner_tree():
+    #  t1 --1-- a --1-- t2
+    #   \               /
+    #    5 -- t3 --- 5
+    #           \
+    #            1 -- a
+    graph = CSRGraph([], [
+        ('t1', 'a', 'p1', 1.),
+        ('a', 't2', 'p2', 1.),
+        ('t1', 't3', 'p3', 5.),
+        ('t3', 't2', 'p4', 5.),
+        ('t3', 'a', 'p5', 1.),
+        ('a', 'b', 'p6', 1.)
+    ])
+
+    solutions = MehlhornSolver(graph, {'t1', 't2', 't3', 'missing'}).run()
+
+    assert len(solutions) == 1
+    assert isinstance(solutions[0].graph, BankGraph)
+    assert solutions[0].weight == 3.
+    assert _get_edge_triples(solutions[0]) == {('t1', 'a', 'p1'), ('a', 't2', 'p2'), ('t3', 'a', 'p5')}
+
+
+def test_disconnected_terminals():
+    graph = CSRGraph([], [('a', 'b', 'p', 1.), ('b', 'c', 'p', 1.), ('x', 'y', 'p', 1.), ('y', 'z', 'p', 1.)])
+
+    solution = MehlhornSolver(graph, {'a', 'c', 'x', 'z'}).run()[0]
+
+    assert solution.weight == 4.
+    assert _get_edge_triples(solution) == {
+        ('a', 'b', 'p'), ('b', 'c', 'p'), ('x', 'y', 'p'), ('y', 'z', 'p')
+    }
+
+
+def test_single_terminal():
+    graph = CSRGraph([], [('a', 'b', 'p', 1.)])
+
+    solution = MehlhornSolver(graph, {'a'}).run()[0]
+
+    assert solution.weight == 0
+    assert solution.graph.num_edges() == 0
+
+
+def test_tree_is_optimal_on_trees():
+    rnd = random.Random(42)
+    bank_graph = BankGraph()
+    edges = []
+
+    for node_idx in range(60):
+        bank_graph.add_node(BankNode(f'n{node_idx}'))
+        if node_idx > 0:
+            edges.append((f'n{rnd.randrange(node_idx)}', f'n{node_idx}', 'p', 1.))
+
+    for source, target, key, weight in edges:
+        bank_graph.add_edge(BankEdge(-1, source, target, key, weight, 1))
+
+    terminal_nodes = {f'n{rnd.randrange(60)}' for _ in range(6)}
+
+    bank_solver = BankSolver(bank_graph, terminal_nodes, weight_fn=lambda e: e.weight)
+    bank_trees, bank_solutions = bank_solver.run()
+    solution = MehlhornSolver(CSRGraph.from_bank_graph(bank_graph), terminal_nodes).run()[0]
+
+    # the solution graphs of the BankSolver may contain contracted paths
+    assert _get_edge_triples(solution) == {(e.source, e.target, e.key) for e in bank_trees[0].iter_edges()}
+    assert solution.weight == bank_solutions[0].weight
+
+
+def test_reduce_graph():
+    #  t1 - a - b - t2 - c - d
+    #       |
+    #       e - f
+    graph = CSRGraph([], [
+        ('t1', 'a', 'p1', 1.),
+        ('a', 'b', 'p2', 1.),
+        ('t2', 'b', 'p3', 1.),
+        ('t2', 'c', 'p4', 1.),
+        ('c', 'd', 'p5', 1.),
+        ('a', 'e', 'p6', 1.),
+        ('e', 'f', 'p7', 1.),
+        ('f', 'f', 'self', 1.)
+    ])
+
+    reduction = reduce_graph(graph, {'t1', 't2'})
+
+    # the branches c - d and e - f are pruned, t1 - a - b - t2 becomes one edge
+    assert set(reduction.graph.node_ids) == {'t1', 't2'}
+    assert reduction.graph.get_num_edges() == 1
+    assert reduction.graph.weights[0] == 3.
+    assert reduction.get_original_edges([0]) in ([0, 1, 2], [2, 1, 0])
+
+    assert [(name, nodes, edges) for name, nodes, edges in reduction.stats.stages] == [
+        ('input', 8, 8),
+        ('bfs balls', 8, 7),
+        ('leaf pruning', 4, 3),
+        ('path contraction', 2, 1)
+    ]
+
+
+def test_reduce_graph_with_max_depth():
+    graph = CSRGraph([], [(f'n{i}', f'n{i + 1}', 'p', 1.) for i in range(10)])
+
+    reduction = reduce_graph(graph, {'n0', 'n2'}, max_depth=1, contract_paths=False)
+
+    assert set(reduction.graph.node_ids) == {'n0', 'n1', 'n2'}
+    assert {reduction.graph.get_edge_triple(idx) for idx in range(reduction.graph.get_num_edges())} == {
+        ('n0', 'n1', 'p'), ('n1', 'n2', 'p')
+    }
+
+
+def test_reduced_graph_gives_same_tree():
+    rnd = random.Random(42)
+    edges = [(f'n{rnd.randrange(i)}', f'n{i}', f'p{i}', float(rnd.randint(1, 3))) for i in range(1, 500)]
+    edges += [(f'n{rnd.randrange(500)}', f'n{rnd.randrange(500)}', 'q', float(rnd.randint(1, 3))) for _ in range(100)]
+    graph = CSRGraph([], edges)
+    terminal_nodes = {f'n{rnd.randrange(500)}' for _ in range(8)}
+
+    # the tree of the whole graph
+    search = _MehlhornSearch(graph)
+    tree = search.get_tree_edges(sorted(graph.node_idxs[node_id] for node_id in terminal_nodes))
+
+    for max_depth in [None, 1000]:
+        solver = MehlhornSolver(graph, terminal_nodes, max_depth=max_depth)
+        reduced_solution = solver.run()[0]
+
+        # the graph is reduced by default, too
+        assert solver.reduction_stats.get_num_nodes() < graph.get_num_nodes()
+        assert reduced_solution.weight == search.get_weight(tree)
+    # the tree consists of edges of the original graph
+    assert _get_edge_triples(reduced_solution) <= {(s, t, k) for s, t, k, _ in edges}
+
+
+def test_save_and_load(tmp_path):
+    graph = CSRGraph(['a'], [('a', 'b', 'p', 1.), ('b', 'ü', 'q', 2.)])
+    graph.save(str(tmp_path))
+
+    loaded = CSRGraph.load(str(tmp_path))
+
+    assert loaded.node_ids == ['a', 'b', 'ü']
+    assert loaded.node_idxs == graph.node_idxs
+    assert [loaded.get_edge_triple(idx) for idx in range(loaded.get_num_edges())] == \
+           [('a', 'b', 'p'), ('b', 'ü', 'q')]
+    assert MehlhornSolver(loaded, {'a', 'ü'}).run()[0].weight == 3.
+
+
+def _get_grid_graph(size: int) -> CSRGraph:
+    edges = []
+    for x in range(size):
+        for y in range(size):
+            if x + 1 < size:
+                edges.append((f'{x},{y}', f'{x + 1},{y}', 'right', 1.))
+            if y + 1 < size:
+                edges.append((f'{x},{y}', f'{x},{y + 1}', 'down', 1.))
+
+    return CSRGraph([], edges)
+
+
+def test_iter_solutions():
+    # many shortest paths between opposite corners of a grid
+    graph = _get_grid_graph(4)
+    solver = MehlhornSolver(graph, {'0,0', '3,3'})
+
+    solutions = list(solver.iter_solutions(top_k=5))
+
+    assert len(solutions) == 5
+    assert solver.solutions == solutions
+    assert len({s.id for s in solutions}) == 5
+    assert all(s.weight == 6. for s in solutions)
+
+    assert [s.id for s in solver.run()] == [solutions[0].id]
+
+
+def test_iter_solutions_respects_budget():
+    graph = _get_grid_graph(4)
+
+    solver = MehlhornSolver(graph, {'0,0', '3,3'})
+    assert len(list(solver.iter_solutions(top_k=5, max_expansions=0))) == 1
+
+    solver = MehlhornSolver(graph, {'0,0', '3,3'}, max_depth=3)
+    # the first solution is always computed
+    assert len(list(solver.iter_solutions(top_k=5, time_budget=0))) == 1
+
+    solutions = list(solver.iter_solutions(top_k=5, max_expansions=2))
+    assert 1 < len(solutions) <= 3
+
+
+def test_iter_solutions_keeps_terminals_connected():
+    # the bridge b - c is needed to connect a and d
+    graph = CSRGraph([], [('a', 'b', 'p', 1.), ('b', 'c', 'p', 1.), ('c', 'd', 'p', 1.), ('a', 'c', 'q', 5.)])
+
+    solutions = list(MehlhornSolver(graph, {'a', 'd'}).iter_solutions(top_k=5))
+
+    assert [s.weight for s in solutions] == [3., 6.]
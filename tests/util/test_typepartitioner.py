@@ -0,0 +1,140 @@
+import pytest
+from rdflib import Graph, Literal, RDF, URIRef
+
+from util import typepartitioner
+
+EX = 'http://example.org/'
+
+
+def _get_test_graph() -> Graph:
+    g = Graph()
+    for i in range(10):
+        person = URIRef(f'{EX}person{i}')
+        g.add((person, RDF.type, URIRef(EX + 'Person')))
+        g.add((person, URIRef(EX + 'name'), Literal(f'Person\n{i}', lang='en')))
+
+        if i % 2 == 0:
+            g.add((person, RDF.type, URIRef(EX + 'Musician')))
+            g.add((person, URIRef(EX + 'plays'), URIRef(f'{EX}guitar{i}')))
+
+        # types of other namespaces get a distinct file name
+        g.add((URIRef(f'{EX}guitar{i}'), RDF.type, URIRef('http://other.org/Person')))
+
+    # untyped subject
+    g.add((URIRef(EX + 'untyped'), URIRef(EX + 'name'), Literal('untyped')))
+
+    return g
+
+
+@pytest.mark.parametrize('file_name, file_format', [('kg.nt', 'nt'), ('kg.ttl', 'turtle')])
+def test_partition_by_type(tmp_path, file_name, file_format):
+    g = _get_test_graph()
+    g.serialize(tmp_path / file_name, format=file_format, encoding='utf-8')
+
+    # only one file may be open at a time, i.e. files are reopened
+    file_paths = typepartitioner.partition_by_type(
+        str(tmp_path / file_name),
+        str(tmp_path / 'types'),
+        max_open_files=1
+    )
+
+    assert {str(t) for t in file_paths} == {EX + 'Person', EX + 'Musician', 'http://other.org/Person'}
+    assert sorted(path.rsplit('/', 1)[-1] for path in file_paths.values()) == \
+           ['Musician.nt', 'Person.nt', 'Person1.nt']
+
+    for type_iri, file_path in file_paths.items():
+        type_graph = Graph()
+        type_graph.parse(file_path, format='nt')
+
+        subjects = set(g.subjects(RDF.type, type_iri))
+        expected_triples = {t for t in g if t[0] in subjects}
+
+        assert set(type_graph) == expected_triples
+
+
+def test_sample_by_type(tmp_path):
+    g = _get_test_graph()
+    g.serialize(tmp_path / 'kg.nt', format='nt', encoding='utf-8')
+
+    def sample(seed):
+        file_paths = typepartitioner.partition_by_type(
+            str(tmp_path / 'kg.nt'),
+            str(tmp_path / f'sample_{seed}'),
+            max_subjects_per_type=3,
+            seed=seed
+        )
+
+        type_graphs = dict()
+        for type_iri, file_path in file_paths.items():
+            type_graphs[type_iri] = Graph()
+            type_graphs[type_iri].parse(file_path, format='nt')
+
+        return type_graphs
+
+    type_graphs = sample(seed=1)
+
+    for type_iri, type_graph in type_graphs.items():
+        subjects = set(type_graph.subjects())
+
+        assert len(subjects) == 3
+        # all triples of the sampled subjects are kept
+        assert set(type_graph) == {t for t in g if t[0] in subjects}
+
+    # the samples are deterministic
+    assert {t: set(tg) for t, tg in sample(seed=1).items()} == \
+           {t: set(tg) for t, tg in type_graphs.items()}
+
+
+def test_reservoir_sampling_is_uniform():
+    counts = dict()
+
+    for seed in range(2000):
+        reservoirs = typepartitioner._TypeReservoirs(max_subjects=2, seed=seed)
+        for i in range(10):
+            reservoirs.add(URIRef(f'{EX}s{i}'), URIRef(EX + 'Type'))
+
+        for subject in reservoirs.subjects[URIRef(EX + 'Type')]:
+            counts[subject] = counts.get(subject, 0) + 1
+
+    # each subject is sampled with a probability of 2/10
+    assert len(counts) == 10
+    assert all(300 < count < 500 for count in counts.values())
+
+
+def test_duplicate_type_triples_are_sampled_once(tmp_path):
+    type_line = f'<{EX}s{{i}}> <{RDF.type}> <{EX}Type> .\n'
+    name_line = f'<{EX}s{{i}}> <{EX}name> "s{{i}}" .\n'
+    # concatenated dumps repeat the type triples
+    lines = [type_line.format(i=i) for i in range(20)] * 3 + [name_line.format(i=i) for i in range(20)]
+    (tmp_path / 'kg.nt').write_text(''.join(lines))
+
+    for seed in range(20):
+        file_paths = typepartitioner.partition_by_type(
+            str(tmp_path / 'kg.nt'),
+            str(tmp_path / f'sample_{seed}'),
+            max_subjects_per_type=5,
+            seed=seed
+        )
+        type_graph = Graph()
+        type_graph.parse(file_paths[URIRef(EX + 'Type')], format='nt')
+
+        assert len(set(type_graph.subjects())) == 5
+
+
+def test_reservoirs_ignore_duplicates():
+    type_iri = URIRef(EX + 'Type')
+    reservoirs = typepartitioner._TypeReservoirs(max_subjects=50, seed=0)
+
+    for _ in range(3):
+        for i in range(1000):
+            reservoirs.add(URIRef(f'{EX}s{i}'), type_iri)
+
+    assert len(reservoirs.subjects[type_iri]) == 50
+    # the number of distinct subjects is estimated from the sample
+    assert 700 < reservoirs.get_num_subjects(type_iri) < 1400
+
+    small_reservoirs = typepartitioner._TypeReservoirs(max_subjects=50, seed=0)
+    for i in list(range(10)) * 2:
+        small_reservoirs.add(URIRef(f'{EX}s{i}'), type_iri)
+
+    assert small_reservoirs.get_num_subjects(type_iri) == 10
@@ -0,0 +1,288 @@
+"""
+Transitive closure of the rdfs:subClassOf hierarchy.
+
+Only the asserted subclass edges are collected while a knowledge source is
+loaded. The closure is computed once, after loading (compute_closure()), by
+condensing the strongly connected components (e.g. classes declared as
+owl:equivalentClass) and propagating along the condensation in topological
+order. The sub- and superclasses of each class are stored as bitsets (Python
+ints) over dense class indices, so subclass tests are bit tests.
+
+Subclass tests while loading, i.e. while edges are added which are not part
+of the closure yet, search the asserted edges instead of recomputing the
+closure, since subClassOf triples are usually interleaved with the instance
+data. The superclasses found are memoized until the next edge is added. The
+knowledge source itself defers its subclass tests until the closure is
+computed (see NotFullyTypedStatementsHandler).
+"""
+from typing import Dict, Iterator, List, Set, Tuple
+
+from rdflib import URIRef
+
+from util.iriinterner import IRIInterner, IRIID
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    while bits:
+        lowest_bit = bits & -bits
+        yield lowest_bit.bit_length() - 1
+        bits ^= lowest_bit
+
+
+class ClassHierarchy:
+    def __init__(self, interner: IRIInterner):
+        self._interner = interner
+
+        # interned IRI ID -> dense class index and back
+        self._class_idxs: Dict[IRIID, int] = dict()
+        self._class_iri_ids: List[IRIID] = []
+
+        # asserted edges: class index -> indices of its direct superclasses
+        self._direct_superclasses: Dict[int, Set[int]] = dict()
+
+        self._superclass_bits: List[int] = []
+        self._subclass_bits: List[int] = []
+        self._is_dirty = False
+
+        # class index -> superclass bits, memoized while dirty
+        self._reachable_bits: Dict[int, int] = dict()
+
+    def _get_class_idx(self, iri: URIRef) -> int:
+        iri_id = self._interner.get_id(iri)
+        idx = self._class_idxs.get(iri_id)
+
+        if idx is None:
+            idx = len(self._class_iri_ids)
+            self._class_idxs[iri_id] = idx
+            self._class_iri_ids.append(iri_id)
+
+        return idx
+
+    def _find_class_idx(self, iri: URIRef) -> int | None:
+        iri_id = self._interner.find_id(iri)
+
+        if iri_id is None:
+            return None
+
+        return self._class_idxs.get(iri_id)
+
+    def add_subclass(self, superclass_iri: URIRef, subclass_iri: URIRef) -> None:
+        superclass_idx = self._get_class_idx(superclass_iri)
+        subclass_idx = self._get_class_idx(subclass_iri)
+
+        if subclass_idx not in self._direct_superclasses:
+            self._direct_superclasses[subclass_idx] = set()
+
+        if superclass_idx not in self._direct_superclasses[subclass_idx]:
+            self._direct_superclasses[subclass_idx].add(superclass_idx)
+            self._is_dirty = True
+            self._reachable_bits = dict()
+
+    def is_closure_computed(self) -> bool:
+        """Whether all added edges are part of the closure"""
+        return not self._is_dirty
+
+    def get_subclass_edges(self) -> Iterator[Tuple[URIRef, URIRef]]:
+        """Yields the asserted (superclass, subclass) pairs"""
+        for subclass_idx, superclass_idxs in self._direct_superclasses.items():
+            for superclass_idx in superclass_idxs:
+                yield self._get_iri(superclass_idx), self._get_iri(subclass_idx)
+
+    def _get_iri(self, idx: int) -> URIRef:
+        return self._interner.get_iri(self._class_iri_ids[idx])
+
+    def _get_strongly_connected_components(self) -> List[List[int]]:
+        """
+        Iterative version of Tarjan's algorithm. The components are returned
+        in reverse topological order, i.e. the components of the
+        superclasses come before those of their subclasses.
+        """
+        num_classes = len(self._class_iri_ids)
+        index = [-1] * num_classes
+        low_link = [0] * num_classes
+        on_stack = [False] * num_classes
+        stack: List[int] = []
+        components: List[List[int]] = []
+        cntr = 0
+
+        for root in range(num_classes):
+            if index[root] != -1:
+                continue
+
+            index[root] = low_link[root] = cntr
+            cntr += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, iter(self._direct_superclasses.get(root, ())))]
+
+            while work:
+                node, successors = work[-1]
+                descended = False
+
+                for successor in successors:
+                    if index[successor] == -1:
+                        index[successor] = low_link[successor] = cntr
+                        cntr += 1
+                        stack.append(successor)
+                        on_stack[successor] = True
+                        work.append(
+                            (successor, iter(self._direct_superclasses.get(successor, ())))
+                        )
+                        descended = True
+                        break
+
+                    elif on_stack[successor]:
+                        low_link[node] = min(low_link[node], index[successor])
+
+                if descended:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+
+                if low_link[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+
+                        if member == node:
+                            break
+
+                    components.append(component)
+
+        return components
+
+    def compute_closure(self) -> None:
+        num_classes = len(self._class_iri_ids)
+        components = self._get_strongly_connected_components()
+
+        component_of = [0] * num_classes
+        for component_idx, component in enumerate(components):
+            for member in component:
+                component_of[member] = component_idx
+
+        direct_subclasses: Dict[int, Set[int]] = dict()
+        for subclass_idx, superclass_idxs in self._direct_superclasses.items():
+            for superclass_idx in superclass_idxs:
+                if superclass_idx not in direct_subclasses:
+                    direct_subclasses[superclass_idx] = set()
+                direct_subclasses[superclass_idx].add(subclass_idx)
+
+        superclass_bits = [0] * num_classes
+        subclass_bits = [0] * num_classes
+
+        # classes in a cycle, e.g. equivalent classes, are sub- and
+        # superclasses of themselves
+        is_cyclic = [
+            len(component) > 1
+            or component[0] in self._direct_superclasses.get(component[0], ())
+            for component in components
+        ]
+
+        # superclasses first
+        for component_idx, component in enumerate(components):
+            bits = 0
+            for member in component:
+                for superclass_idx in self._direct_superclasses.get(member, ()):
+                    if component_of[superclass_idx] != component_idx:
+                        bits |= superclass_bits[superclass_idx] | (1 << superclass_idx)
+
+            if is_cyclic[component_idx]:
+                for member in component:
+                    bits |= 1 << member
+
+            for member in component:
+                superclass_bits[member] = bits
+
+        # subclasses first
+        for component_idx in range(len(components) - 1, -1, -1):
+            component = components[component_idx]
+            bits = 0
+            for member in component:
+                for subclass_idx in direct_subclasses.get(member, ()):
+                    if component_of[subclass_idx] != component_idx:
+                        bits |= subclass_bits[subclass_idx] | (1 << subclass_idx)
+
+            if is_cyclic[component_idx]:
+                for member in component:
+                    bits |= 1 << member
+
+            for member in component:
+                subclass_bits[member] = bits
+
+        self._superclass_bits = superclass_bits
+        self._subclass_bits = subclass_bits
+        self._is_dirty = False
+        self._reachable_bits = dict()
+
+    def _get_bits(self, iri: URIRef, get_superclasses: bool) -> int:
+        if self._is_dirty:
+            self.compute_closure()
+
+        idx = self._find_class_idx(iri)
+        if idx is None or idx >= len(self._superclass_bits):
+            return 0
+
+        if get_superclasses:
+            return self._superclass_bits[idx]
+        else:
+            return self._subclass_bits[idx]
+
+    def _get_reachable_bits(self, subclass_idx: int) -> int:
+        """
+        Depth-first search along the asserted edges, for the classes which
+        are reachable via at least one edge. Memoized until the next edge is
+        added.
+        """
+        bits = self._reachable_bits.get(subclass_idx)
+
+        if bits is None:
+            bits = 0
+            stack = list(self._direct_superclasses.get(subclass_idx, ()))
+
+            while stack:
+                idx = stack.pop()
+
+                if not (bits >> idx) & 1:
+                    bits |= 1 << idx
+                    stack.extend(self._direct_superclasses.get(idx, ()))
+
+            self._reachable_bits[subclass_idx] = bits
+
+        return bits
+
+    def is_subclass_of(self, subclass_iri: URIRef, superclass_iri: URIRef) -> bool:
+        """
+        Whether subclass_iri is a (direct or indirect) subclass of
+        superclass_iri. A class is only a subclass of itself if it is part of
+        a cycle in the hierarchy.
+        """
+        superclass_idx = self._find_class_idx(superclass_iri)
+
+        if superclass_idx is None:
+            return False
+
+        # the closure is not recomputed while edges are being added
+        if self._is_dirty:
+            subclass_idx = self._find_class_idx(subclass_iri)
+
+            return subclass_idx is not None and \
+                (self._get_reachable_bits(subclass_idx) >> superclass_idx) & 1 == 1
+
+        return (self._get_bits(subclass_iri, get_superclasses=True) >> superclass_idx) & 1 == 1
+
+    def get_superclasses_of(self, subclass_iri: URIRef) -> Set[URIRef]:
+        return {
+            self._get_iri(idx)
+            for idx in _iter_bits(self._get_bits(subclass_iri, get_superclasses=True))
+        }
+
+    def get_subclasses_of(self, superclass_iri: URIRef) -> Set[URIRef]:
+        return {
+            self._get_iri(idx)
+            for idx in _iter_bits(self._get_bits(superclass_iri, get_superclasses=False))
+        }
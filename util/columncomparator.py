@@ -1,12 +1,34 @@
-from typing import List
+from typing import List, Type
 
-from semanticlabeling.labeledcolumn import LabeledColumn
+from semanticlabeling.labeledcolumn import LabeledColumn, IDColumn, TextColumn, \
+    StringColumn, BooleanColumn, CategoriesColumn, IntegerColumn, FloatColumn, \
+    DateTimeColumn
 
 
 class IncomparableLabeledColumnException(Exception):
     """Thrown when two labeled columns of incomparable type are being compared"""
 
 
+# columns of classes of the same group can be compared (see the __sub__
+# methods of the column classes)
+_COMPARABLE_COLUMN_CLASSES = [
+    (IDColumn,),
+    (TextColumn, StringColumn),
+    (BooleanColumn,),
+    (CategoriesColumn,),
+    (IntegerColumn, FloatColumn),
+    (DateTimeColumn,),
+]
+
+
+def are_comparable(column_cls: Type[LabeledColumn], other_column_cls: Type[LabeledColumn]) -> bool:
+    for column_classes in _COMPARABLE_COLUMN_CLASSES:
+        if issubclass(column_cls, column_classes) and issubclass(other_column_cls, column_classes):
+            return True
+
+    return False
+
+
 def get_closest_n(compare_column: LabeledColumn, other_columns: List[LabeledColumn], n) -> List[LabeledColumn]:
     def compare(column: LabeledColumn) -> float:
         try:
@@ -0,0 +1,462 @@
+"""
+Columnar on-disk storage of labeled columns.
+
+The statistics of all columns of one column class are stored as one NumPy
+structured array with one field per statistic, so integer statistics are kept
+exactly as int64 and only fractional ones as float64. Column names, column
+keys, link names and categories go into string tables, i.e. a UTF-8 blob plus
+an offsets array, and the links between columns are stored in compressed
+sparse row form. All arrays are opened
+memory-mapped and read-only, so several processes working with the same
+store share the pages, and opening a store does not depend on the number or
+size of the stored columns. Column objects are only created when accessed.
+"""
+import json
+import math
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple, Type
+
+import numpy as np
+import pandas as pd
+from rdflib import URIRef
+
+from semanticlabeling.labeledcolumn import LabeledColumn, IDColumn, \
+    TypedIDColumn, TextColumn, StringColumn, BooleanColumn, CategoriesColumn, \
+    IntegerColumn, FloatColumn, WGS84LatitudeColumn, WGS84LongitudeColumn, \
+    DateTimeColumn
+
+ColumnKey = URIRef | str
+
+_META_FILE_NAME = 'meta.json'
+
+_ID_FEATURES = (('min_id_length', int), ('avg_id_length', float), ('max_id_length', int))
+_FLOAT_FEATURES = (
+    ('min_value', float), ('avg_value', float), ('max_value', float), ('value_stddev', float)
+)
+
+# column class -> (statistics field, field type) of the columns of that class
+_FEATURES: Dict[type, Tuple[Tuple[str, type], ...]] = {
+    IDColumn: _ID_FEATURES,
+    TextColumn: (
+        ('min_text_length', int), ('avg_text_length', float), ('max_text_length', int)
+    ),
+    StringColumn: (
+        ('min_str_length', int), ('avg_str_length', float), ('max_str_length', int)
+    ),
+    BooleanColumn: (('portion_true', float), ('portion_false', float)),
+    CategoriesColumn: (('categories', list),),
+    IntegerColumn: (
+        ('min_value', int), ('avg_value', float), ('max_value', int), ('value_stddev', float)
+    ),
+    FloatColumn: _FLOAT_FEATURES,
+    DateTimeColumn: (
+        ('min_date_time', pd.Timestamp),
+        ('mean_date_time', pd.Timestamp),
+        ('max_date_time', pd.Timestamp)
+    ),
+}
+
+_COLUMN_CLASSES: Dict[str, type] = {
+    cls.__name__: cls
+    for cls in [
+        IDColumn, TypedIDColumn, TextColumn, StringColumn, BooleanColumn,
+        CategoriesColumn, IntegerColumn, FloatColumn, WGS84LatitudeColumn,
+        WGS84LongitudeColumn, DateTimeColumn
+    ]
+}
+
+
+class UnstorableColumnException(Exception):
+    """Thrown when a column of a class without known statistics fields is stored"""
+
+
+def _get_features(column_cls: type) -> Tuple[Tuple[str, type], ...]:
+    for cls in column_cls.__mro__:
+        features = _FEATURES.get(cls)
+        if features is not None:
+            return features
+
+    raise UnstorableColumnException(
+        f'Columns of type {column_cls.__name__} cannot be stored')
+
+
+# stands for a NaN integer statistic, like NaT does for time stamps
+_INT_NAN = np.iinfo(np.int64).min
+
+
+def _get_dtype(features: Tuple[Tuple[str, type], ...]) -> np.dtype:
+    # time stamps (as microseconds), category offsets and integer statistics
+    # are stored as int64, everything else as float64
+    fields = []
+    for field, field_type in features:
+        if field_type is list:
+            fields.append((f'{field}_start', np.int64))
+            fields.append((f'{field}_end', np.int64))
+
+        elif field_type in (pd.Timestamp, int):
+            fields.append((field, np.int64))
+
+        else:
+            fields.append((field, np.float64))
+
+    return np.dtype(fields)
+
+
+def _to_int64(value: Any) -> int | None:
+    """The value as stored in an int64 field, None if it does not fit"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _INT_NAN
+
+    value = int(value)
+    if _INT_NAN < value <= np.iinfo(np.int64).max:
+        return value
+
+    return None
+
+
+def write_string_table(strings: List[str], dir_path: str, name: str) -> None:
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+
+    np.save(os.path.join(dir_path, f'{name}.offsets.npy'), offsets)
+    np.save(
+        os.path.join(dir_path, f'{name}.blob.npy'),
+        np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    )
+
+
+class StringTable:
+    """Read-only, memory-mapped list of strings"""
+    def __init__(self, dir_path: str, name: str):
+        self._offsets = np.load(os.path.join(dir_path, f'{name}.offsets.npy'), mmap_mode='r')
+        self._blob = np.load(os.path.join(dir_path, f'{name}.blob.npy'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        start = int(self._offsets[idx])
+        end = int(self._offsets[idx + 1])
+
+        return self._blob[start:end].tobytes().decode('utf-8')
+
+    def to_list(self) -> List[str]:
+        """All strings, decoded at once"""
+        text = self._blob.tobytes().decode('utf-8')
+        offsets = self._offsets.tolist()
+
+        if text.isascii():
+            # byte offsets are character offsets
+            return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+        blob = self._blob.tobytes()
+        return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def _to_timestamp_us(value: Any) -> int:
+    # Microseconds instead of nanoseconds to also cover historic dates. NaT is
+    # mapped to the smallest int64, just like pandas does internally.
+    timestamp = pd.Timestamp(value) if value is not None else pd.NaT
+
+    if timestamp is pd.NaT:
+        return pd.NaT.value
+
+    return int(timestamp.as_unit('us').asm8.view(np.int64))
+
+
+def _from_timestamp_us(value: int) -> pd.Timestamp:
+    if value == pd.NaT.value:
+        return pd.NaT
+
+    return pd.Timestamp(np.datetime64(int(value), 'us'))
+
+
+def write(
+        columns: List[LabeledColumn],
+        keys: List[Tuple[ColumnKey, int]],
+        dir_path: str
+) -> None:
+    """
+    Writes the given columns and their links to the directory at dir_path.
+    Links to columns which are not contained in columns are dropped. The keys
+    list assigns a column key (a type IRI or a datatype ID) to the column
+    with the given index.
+    """
+    os.makedirs(dir_path, exist_ok=True)
+
+    column_idxs = {id(column): idx for idx, column in enumerate(columns)}
+    class_names: List[str] = []
+    class_codes = np.zeros(len(columns), dtype=np.int16)
+    class_rows = np.zeros(len(columns), dtype=np.int64)
+    class_features: Dict[str, List[List[Any]]] = dict()
+    categories: List[str] = []
+    # integer statistics that do not fit into int64, by column index
+    big_ints: Dict[str, Dict[str, str]] = dict()
+
+    link_offsets = np.zeros(len(columns) + 1, dtype=np.int64)
+    link_name_idxs: Dict[str, int] = dict()
+    link_names: List[int] = []
+    link_targets: List[int] = []
+
+    for idx, column in enumerate(columns):
+        class_name = column.__class__.__name__
+        if class_name not in class_features:
+            class_features[class_name] = []
+            class_names.append(class_name)
+        class_codes[idx] = class_names.index(class_name)
+
+        rows = class_features[class_name]
+        class_rows[idx] = len(rows)
+
+        row = []
+        for field, field_type in _get_features(column.__class__):
+            value = getattr(column, field)
+
+            if field_type is pd.Timestamp:
+                row.append(_to_timestamp_us(value))
+
+            elif field_type is list:
+                row.append(len(categories))
+                categories.extend(json.dumps(_to_json_value(v), default=str) for v in value)
+                row.append(len(categories))
+
+            elif field_type is int:
+                int_value = _to_int64(value)
+                if int_value is None:
+                    big_ints.setdefault(str(idx), dict())[field] = str(int(value))
+                    int_value = 0
+                row.append(int_value)
+
+            else:
+                row.append(float(value))
+        rows.append(tuple(row))
+
+        for link_name, target_columns in column.iter_links():
+            for target_column in target_columns:
+                target_idx = column_idxs.get(id(target_column))
+                if target_idx is None:
+                    continue
+
+                if link_name not in link_name_idxs:
+                    link_name_idxs[link_name] = len(link_name_idxs)
+                link_names.append(link_name_idxs[link_name])
+                link_targets.append(target_idx)
+
+        link_offsets[idx + 1] = len(link_targets)
+
+    for class_name, rows in class_features.items():
+        dtype = _get_dtype(_get_features(_COLUMN_CLASSES[class_name]))
+        np.save(os.path.join(dir_path, f'features_{class_name}.npy'), np.array(rows, dtype=dtype))
+
+    np.save(os.path.join(dir_path, 'class_codes.npy'), class_codes)
+    np.save(os.path.join(dir_path, 'class_rows.npy'), class_rows)
+    np.save(os.path.join(dir_path, 'link_offsets.npy'), link_offsets)
+    np.save(os.path.join(dir_path, 'link_names.npy'), np.array(link_names, dtype=np.int32))
+    np.save(os.path.join(dir_path, 'link_targets.npy'), np.array(link_targets, dtype=np.int64))
+
+    write_string_table([column.column_name for column in columns], dir_path, 'names')
+    write_string_table(categories, dir_path, 'categories')
+    write_string_table(list(link_name_idxs.keys()), dir_path, 'link_name_table')
+
+    key_strs = [str(key) for key, _ in keys]
+    write_string_table(key_strs, dir_path, 'keys')
+    np.save(
+        os.path.join(dir_path, 'key_is_iri.npy'),
+        np.array([isinstance(key, URIRef) for key, _ in keys], dtype=bool)
+    )
+    np.save(
+        os.path.join(dir_path, 'key_columns.npy'),
+        np.array([column_idx for _, column_idx in keys], dtype=np.int64)
+    )
+    # sorted key order for binary search lookups
+    np.save(
+        os.path.join(dir_path, 'key_order.npy'),
+        np.array(sorted(range(len(keys)), key=lambda i: key_strs[i]), dtype=np.int64)
+    )
+
+    with open(os.path.join(dir_path, _META_FILE_NAME), 'w') as meta_file:
+        json.dump(
+            {'classes': class_names, 'num_columns': len(columns), 'big_ints': big_ints},
+            meta_file
+        )
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
+class ColumnStore(Mapping):
+    """
+    Read-only mapping from column keys to the columns of a column store
+    directory. Columns are created on first access and memoized. The link
+    targets of a column are created as well, but only get their own links
+    attached once they are accessed via the store.
+    """
+    def __init__(self, dir_path: str):
+        with open(os.path.join(dir_path, _META_FILE_NAME)) as meta_file:
+            meta = json.load(meta_file)
+
+        def load(file_name: str) -> np.ndarray:
+            return np.load(os.path.join(dir_path, file_name), mmap_mode='r')
+
+        self._class_names: List[str] = meta['classes']
+        self._num_columns: int = meta['num_columns']
+        self._big_ints: Dict[str, Dict[str, str]] = meta['big_ints']
+        self._features = {
+            class_name: load(f'features_{class_name}.npy')
+            for class_name in self._class_names
+        }
+        self._class_codes = load('class_codes.npy')
+        self._class_rows = load('class_rows.npy')
+        self._link_offsets = load('link_offsets.npy')
+        self._link_names = load('link_names.npy')
+        self._link_targets = load('link_targets.npy')
+
+        self._names = StringTable(dir_path, 'names')
+        self._categories = StringTable(dir_path, 'categories')
+        self._link_name_table = StringTable(dir_path, 'link_name_table')
+
+        self._keys = StringTable(dir_path, 'keys')
+        self._key_is_iri = load('key_is_iri.npy')
+        self._key_columns = load('key_columns.npy')
+        self._key_order = load('key_order.npy')
+
+        self._columns: Dict[int, LabeledColumn] = dict()
+        self._linked_columns = set()
+
+    def get_num_columns(self) -> int:
+        """Number of stored columns, including columns without a key"""
+        return self._num_columns
+
+    def get_features(self, class_name: str) -> np.ndarray | None:
+        """
+        The (memory-mapped) structured array of the statistics of all columns
+        of a class
+        """
+        return self._features.get(class_name)
+
+    def _create_column(self, idx: int) -> LabeledColumn:
+        column = self._columns.get(idx)
+
+        if column is None:
+            class_name = self._class_names[self._class_codes[idx]]
+            column_cls = _COLUMN_CLASSES[class_name]
+            row = self._features[class_name][self._class_rows[idx]]
+
+            big_ints = self._big_ints.get(str(idx), dict())
+
+            stats = dict()
+            for field, field_type in _get_features(column_cls):
+                if field_type is pd.Timestamp:
+                    stats[field] = _from_timestamp_us(row[field])
+
+                elif field_type is list:
+                    start, end = int(row[f'{field}_start']), int(row[f'{field}_end'])
+                    stats[field] = [json.loads(self._categories[i]) for i in range(start, end)]
+
+                elif field_type is int:
+                    if field in big_ints:
+                        stats[field] = int(big_ints[field])
+                    elif row[field] == _INT_NAN:
+                        stats[field] = float('nan')
+                    else:
+                        stats[field] = int(row[field])
+
+                else:
+                    stats[field] = float(row[field])
+
+            column = column_cls(self._names[idx], **stats)
+            self._columns[idx] = column
+
+        return column
+
+    def get_column_by_index(self, idx: int) -> LabeledColumn:
+        column = self._create_column(idx)
+
+        if idx not in self._linked_columns:
+            self._linked_columns.add(idx)
+
+            for link_idx in range(self._link_offsets[idx], self._link_offsets[idx + 1]):
+                column.add_link_to_other_column(
+                    self._link_name_table[self._link_names[link_idx]],
+                    self._create_column(int(self._link_targets[link_idx]))
+                )
+
+        return column
+
+    def get_column_object(self, idx: int) -> LabeledColumn:
+        """The column object with the given index without resolving its links"""
+        return self._create_column(idx)
+
+    def _get_key(self, key_idx: int) -> ColumnKey:
+        key = self._keys[key_idx]
+
+        if self._key_is_iri[key_idx]:
+            return URIRef(key)
+        else:
+            return key
+
+    def _find_key(self, key: ColumnKey) -> int | None:
+        key_str = str(key)
+        low, high = 0, len(self._key_order)
+
+        while low < high:
+            middle = (low + high) // 2
+            if self._keys[self._key_order[middle]] < key_str:
+                low = middle + 1
+            else:
+                high = middle
+
+        # several keys may have the same string representation, e.g. a type
+        # IRI and a datatype ID
+        while low < len(self._key_order):
+            key_idx = int(self._key_order[low])
+            if self._keys[key_idx] != key_str:
+                break
+            if bool(self._key_is_iri[key_idx]) == isinstance(key, URIRef):
+                return key_idx
+            low += 1
+
+        return None
+
+    def get_column_classes(self, key: ColumnKey) -> Tuple[Type[LabeledColumn], ...]:
+        """The class of the column with the given key without creating it"""
+        key_idx = self._find_key(key)
+
+        if key_idx is None:
+            raise KeyError(key)
+
+        idx = int(self._key_columns[key_idx])
+        return _COLUMN_CLASSES[self._class_names[self._class_codes[idx]]],
+
+    def is_materialized(self, key: ColumnKey) -> bool:
+        """Whether the column with the given key was created already"""
+        key_idx = self._find_key(key)
+
+        if key_idx is None:
+            raise KeyError(key)
+
+        return int(self._key_columns[key_idx]) in self._columns
+
+    def __getitem__(self, key: ColumnKey) -> LabeledColumn:
+        key_idx = self._find_key(key)
+
+        if key_idx is None:
+            raise KeyError(key)
+
+        return self.get_column_by_index(int(self._key_columns[key_idx]))
+
+    def __contains__(self, key) -> bool:
+        return self._find_key(key) is not None
+
+    def __iter__(self) -> Iterator[ColumnKey]:
+        for key_idx in range(len(self._keys)):
+            yield self._get_key(key_idx)
+
+    def __len__(self) -> int:
+        return len(self._keys)
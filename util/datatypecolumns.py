@@ -0,0 +1,157 @@
+"""
+Construction of the columns of datatypes, optionally distributed over a pool
+of processes.
+
+Building a datatype column is CPU-bound and independent of all other columns.
+To not pickle the (possibly millions of) values of each datatype, homogeneous
+value lists are handed over to the worker processes as NumPy buffers in shared
+memory: integers and floats as int64/float64 arrays, strings as one UTF-8
+encoded text plus the character offsets of the strings. Only mixed value lists
+are pickled.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List
+
+import numpy as np
+import pandas as pd
+from rdflib import URIRef
+
+from semanticlabeling.labeledcolumn import LabeledColumn
+from util import columninferencer
+from util import datatypeinferencer
+from util.type import TypeHandler
+
+_INT64_MIN = np.iinfo(np.int64).min
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def build_datatype_column(datatype: TypeHandler) -> LabeledColumn:
+    dtype_column = datatypeinferencer.get_column(datatype)
+
+    if dtype_column is None:
+        dtype_column = columninferencer.transform_series(
+            pd.Series(datatype.values),
+            datatype.id_
+        )
+
+    return dtype_column
+
+
+class _SharedArray:
+    """Picklable reference to a one-dimensional NumPy array in shared memory"""
+    def __init__(self, shared_memory: SharedMemory, dtype: np.dtype, length: int):
+        self.name = shared_memory.name
+        self.dtype = dtype
+        self.length = length
+
+    @staticmethod
+    def create(array: np.ndarray, shared_memories: List[SharedMemory]) -> '_SharedArray':
+        shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared_memories.append(shared_memory)
+
+        np.ndarray(array.shape, array.dtype, buffer=shared_memory.buf)[:] = array
+
+        return _SharedArray(shared_memory, array.dtype, len(array))
+
+    def _read(self, convert: Callable[[np.ndarray], Any]) -> Any:
+        # the resource tracker is shared with the creating process, which
+        # unlinks the shared memory
+        shared_memory = SharedMemory(name=self.name)
+
+        try:
+            array = np.ndarray((self.length,), self.dtype, buffer=shared_memory.buf)
+            result = convert(array)
+            del array
+        finally:
+            shared_memory.close()
+
+        return result
+
+    def to_list(self) -> list:
+        return self._read(np.ndarray.tolist)
+
+    def to_bytes(self) -> bytes:
+        return self._read(np.ndarray.tobytes)
+
+
+class _SharedStrings:
+    def __init__(self, text: _SharedArray, offsets: _SharedArray):
+        self.text = text
+        self.offsets = offsets
+
+    def to_list(self) -> list:
+        text = self.text.to_bytes().decode('utf-8')
+        offsets = self.offsets.to_list()
+
+        return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def _share_values(values: list, shared_memories: List[SharedMemory]):
+    """
+    Returns an object with a to_list() method restoring the values in a
+    worker process, or the values themselves if they cannot be shared.
+    """
+    if len(values) == 0:
+        return values
+
+    value_types = {type(value) for value in values}
+
+    if value_types == {int}:
+        if _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+            return _SharedArray.create(np.array(values, dtype=np.int64), shared_memories)
+
+    elif value_types == {float}:
+        return _SharedArray.create(np.array(values, dtype=np.float64), shared_memories)
+
+    elif value_types == {str}:
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in values], out=offsets[1:])
+        text = ''.join(values).encode('utf-8')
+
+        return _SharedStrings(
+            _SharedArray.create(np.frombuffer(text, dtype=np.uint8), shared_memories),
+            _SharedArray.create(offsets, shared_memories)
+        )
+
+    return values
+
+
+def _build_shared_datatype_column(datatype_iri: URIRef, datatype_id: str, values) -> LabeledColumn:
+    datatype = TypeHandler(datatype_iri, datatype_id)
+    datatype.is_datatype = True
+    datatype.values = values if isinstance(values, list) else values.to_list()
+
+    return build_datatype_column(datatype)
+
+
+def build_datatype_columns(datatypes: List[TypeHandler], n_jobs: int = 1) -> List[LabeledColumn]:
+    """
+    Builds the columns of the given datatypes in n_jobs worker processes. The
+    columns are returned in the order of the datatypes.
+    """
+    if n_jobs <= 1 or len(datatypes) <= 1:
+        return [build_datatype_column(datatype) for datatype in datatypes]
+
+    shared_memories: List[SharedMemory] = []
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = dict()
+
+            # the largest datatypes first to keep all workers busy until the end
+            for idx in sorted(range(len(datatypes)), key=lambda i: -len(datatypes[i].values)):
+                datatype = datatypes[idx]
+                futures[idx] = executor.submit(
+                    _build_shared_datatype_column,
+                    datatype.iri,
+                    datatype.id_,
+                    _share_values(datatype.values, shared_memories)
+                )
+
+            return [futures[idx].result() for idx in range(len(datatypes))]
+
+    finally:
+        for shared_memory in shared_memories:
+            shared_memory.close()
+            shared_memory.unlink()
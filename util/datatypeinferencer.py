@@ -1,4 +1,5 @@
 from datetime import time
+from typing import Tuple, Type
 
 import numpy as np
 from pandas import Timestamp, Series
@@ -45,8 +46,41 @@ def get_literal_type(literal: Literal) -> URIRef:
                     return XSD.string
 
 
+_INTEGER_DATATYPES = [XSD.int, XSD.positiveInteger, XSD.integer, XSD.nonNegativeInteger]
+_FLOAT_DATATYPES = [XSD.decimal, XSD.float, XSD.double]
+_DATE_TIME_DATATYPES = [XSD.dateTime, XSD.date]
+
+
+def get_column_classes(dtype: TypeHandler) -> Tuple[Type[LabeledColumn], ...]:
+    """
+    The classes the column returned by get_column() may have, determined
+    without looking at the values. Empty if get_column() does not support the
+    datatype.
+    """
+    if dtype.iri in _INTEGER_DATATYPES:
+        return IntegerColumn,
+
+    elif dtype.iri in _FLOAT_DATATYPES:
+        return FloatColumn,
+
+    elif dtype.iri in _DATE_TIME_DATATYPES:
+        return DateTimeColumn,
+
+    elif dtype.iri == XSD.boolean:
+        return BooleanColumn,
+
+    elif dtype.iri == XSD.string:
+        return StringColumn, TextColumn
+
+    elif dtype.iri == XSD.anyURI:
+        return TypedIDColumn,
+
+    else:
+        return ()
+
+
 def get_column(dtype: TypeHandler) -> LabeledColumn:
-    if dtype.iri in [XSD.int, XSD.positiveInteger, XSD.integer, XSD.nonNegativeInteger]:
+    if dtype.iri in _INTEGER_DATATYPES:
 
         if len(dtype.values) > 0:
             int_values = []
@@ -73,7 +107,7 @@ def get_column(dtype: TypeHandler) -> LabeledColumn:
         else:
             return IntegerColumn(dtype.id_, 0, 0., 0, 0.)
 
-    elif dtype.iri in [XSD.decimal, XSD.float, XSD.double]:
+    elif dtype.iri in _FLOAT_DATATYPES:
         if len(dtype.values) > 0:
             float_values = []
 
@@ -100,7 +134,7 @@ def get_column(dtype: TypeHandler) -> LabeledColumn:
         else:
             return FloatColumn(dtype.id_, 0., 0., 0., 0.)
 
-    elif dtype.iri in [XSD.dateTime, XSD.date]:
+    elif dtype.iri in _DATE_TIME_DATATYPES:
         if len(dtype.values) > 0:
 
             timestamp_values = []
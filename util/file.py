@@ -43,6 +43,12 @@ class InputFile(ABC):
         elif file_format_str == 'sampled_csv':
             return SampledCSVInputFile
 
+        elif file_format_str == 'parquet':
+            return ParquetInputFile
+
+        elif file_format_str in ('feather', 'arrow'):
+            return FeatherInputFile
+
         else:
             raise RuntimeError(f'Unknown file format: {file_format_str}')
 
@@ -66,33 +72,14 @@ class CSVInputFile(InputFile):
         raise NotImplementedError()
 
 
-class SampledCSVInputFile(CSVInputFile):
-    def __init__(
-            self,
-            input_file_path: str,
-            has_header: bool = False,
-            max_rows: int = 10000
-    ):
-        super().__init__(input_file_path, has_header)
-        self.columns: List[LabeledColumn] = []
-
-        # FIXME: Assumes Unix
-        wc_out = subprocess.check_output(['wc', '-l', input_file_path])
-        num_lines = int(wc_out.strip().split(b' ')[0])
-
-        if num_lines > max_rows:
-            drop_probability = max_rows / num_lines
-
-            df = pd.read_csv(
-                filepath_or_buffer=input_file_path,
-                skiprows=lambda i: i > 0 and random.random() > drop_probability,
-            )
-
-        else:
-            df = pd.read_csv(
-                filepath_or_buffer=input_file_path,
-            )
+class _DataFrameColumnsMixin:
+    """
+    Labeled columns of an input file read into a data frame, whose first
+    column is the ID column
+    """
+    columns: List[LabeledColumn]
 
+    def _init_columns(self, df: pd.DataFrame) -> None:
         is_first_column = True
         for column_name in df.columns:
             series = df[column_name]
@@ -134,3 +121,75 @@ class SampledCSVInputFile(CSVInputFile):
     # FIXME: Is this needed?
     def get_avg(self, column_id: str) -> float:
         raise NotImplementedError()
+
+
+class SampledCSVInputFile(_DataFrameColumnsMixin, CSVInputFile):
+    def __init__(
+            self,
+            input_file_path: str,
+            has_header: bool = False,
+            max_rows: int = 10000
+    ):
+        super().__init__(input_file_path, has_header)
+        self.columns: List[LabeledColumn] = []
+
+        # FIXME: Assumes Unix
+        wc_out = subprocess.check_output(['wc', '-l', input_file_path])
+        num_lines = int(wc_out.strip().split(b' ')[0])
+
+        if num_lines > max_rows:
+            drop_probability = max_rows / num_lines
+
+            df = pd.read_csv(
+                filepath_or_buffer=input_file_path,
+                skiprows=lambda i: i > 0 and random.random() > drop_probability,
+            )
+
+        else:
+            df = pd.read_csv(
+                filepath_or_buffer=input_file_path,
+            )
+
+        self._init_columns(df)
+
+
+class ParquetInputFile(_DataFrameColumnsMixin, InputFile):
+    """
+    Typed table, e.g. written by util.rdf2csv.convert_files(), whose values
+    do not have to be parsed from text. Requires pyarrow.
+    """
+    def __init__(
+            self,
+            input_file_path: str,
+            has_header: bool = True,
+            max_rows: int = 10000
+    ):
+        super().__init__(input_file_path, has_header)
+        self.columns: List[LabeledColumn] = []
+
+        df = pd.read_parquet(input_file_path)
+        if len(df) > max_rows:
+            df = df.sample(n=max_rows).sort_index()
+
+        self._init_columns(df)
+
+
+class FeatherInputFile(_DataFrameColumnsMixin, InputFile):
+    """
+    Typed table in the Arrow IPC (Feather) format, e.g. written by
+    util.rdf2csv.convert_files(). Requires pyarrow.
+    """
+    def __init__(
+            self,
+            input_file_path: str,
+            has_header: bool = True,
+            max_rows: int = 10000
+    ):
+        super().__init__(input_file_path, has_header)
+        self.columns: List[LabeledColumn] = []
+
+        df = pd.read_feather(input_file_path)
+        if len(df) > max_rows:
+            df = df.sample(n=max_rows).sort_index()
+
+        self._init_columns(df)
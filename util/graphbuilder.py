@@ -1,9 +1,32 @@
-from typing import List
+import math
+from typing import Dict, List, Tuple
 
 from steiner_tree.bank import BankNode, BankGraph, BankEdge
 
 from semanticlabeling.labeledcolumn import LabeledColumn
 
+# (source column name, link name, target column name) -> edge weight
+EdgeWeights = Dict[Tuple[str, str, str], float]
+
+DEFAULT_EDGE_WEIGHT = 1.
+# links of (inverse) functional properties identify their target, so they are
+# preferred over other links with the same usage
+FUNCTIONAL_EDGE_WEIGHT_FACTOR = .8
+
+
+def get_edge_weight(num_uses: int, is_functional: bool = False) -> float:
+    """
+    Returns the weight of a link used by num_uses statements of the knowledge
+    source. Unused links get the default weight; the weight decreases
+    logarithmically with the usage but always stays positive.
+    """
+    weight = DEFAULT_EDGE_WEIGHT / (1 + math.log1p(max(num_uses, 0)))
+
+    if is_functional:
+        weight *= FUNCTIONAL_EDGE_WEIGHT_FACTOR
+
+    return weight
+
 
 class SemanticLabelNode(BankNode):
     def __init__(self, identifier: str, labeled_column: LabeledColumn):
@@ -18,13 +41,24 @@ class SemanticLabelNode(BankNode):
             and self.labeled_column == other.labeled_column
 
 
-def build(labeled_columns: List[LabeledColumn]):
+def build(labeled_columns: List[LabeledColumn], weights: EdgeWeights | None = None):
+    """
+    Builds the graph of the columns and their links. Links without a weight
+    in weights get the default weight.
+    """
+    if weights is None:
+        weights = dict()
+
     graph = BankGraph()
 
     # init nodes
     for column in labeled_columns:
         if column is not None:
-            column_id = column.column_name  # assuming it's unique --> FIXME
+            # column names are unique within a knowledge source, since the
+            # IDs of classes and datatype properties share one registry (see
+            # util.type.TypesHandler); see util.mergedgraphbuilder for the
+            # graph of several knowledge sources
+            column_id = column.column_name
             node = SemanticLabelNode(column_id, column)
             graph.add_node(node)
 
@@ -35,7 +69,7 @@ def build(labeled_columns: List[LabeledColumn]):
             continue
 
         source_node_id = column.column_name
-        for link_name, target_columns in column.links.items():
+        for link_name, target_columns in column.iter_links():
             # E.g.:
             # 'altLabel': [<semanticlabeling.labeledcolumn.TextColumn object at 0x117c39100>],
             for target_column in target_columns:
@@ -46,7 +80,10 @@ def build(labeled_columns: List[LabeledColumn]):
                     target=target_node_id,
                     key=link_name,
                     n_edges=1,
-                    weight=1
+                    weight=weights.get(
+                        (source_node_id, link_name, target_node_id),
+                        DEFAULT_EDGE_WEIGHT
+                    )
                 )
                 graph.add_edge(edge)
                 edge_counter += 1
@@ -0,0 +1,194 @@
+"""
+Compact sets of non-negative integer IDs, e.g. interned IRI IDs.
+
+The set follows the idea of roaring bitmaps: IDs are partitioned by their
+upper bits into chunks of 2^16 IDs. Each chunk stores its lower 16 bits either
+as a sorted array of unsigned shorts (2 bytes per ID) as long as it is sparse,
+or as a bitmap of 8 KiB once it holds more than 4096 IDs (i.e. less than
+2 bytes per ID). In contrast to a Python set of ints, which takes ~60-100
+bytes per entry, a set of many IDs hence needs at most 2 bytes per ID.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator
+
+_CHUNK_BITS = 16
+_LOW_MASK = (1 << _CHUNK_BITS) - 1
+_BITMAP_SIZE = (1 << _CHUNK_BITS) // 8
+
+# an array chunk with more entries needs more memory than a bitmap
+_MAX_ARRAY_SIZE = _BITMAP_SIZE // 2
+
+
+class _BitmapChunk:
+    __slots__ = ('bits', 'cnt')
+
+    def __init__(self, lows: Iterable[int] = ()):
+        self.bits = bytearray(_BITMAP_SIZE)
+        self.cnt = 0
+
+        for low in lows:
+            self.add(low)
+
+    def __contains__(self, low: int) -> bool:
+        return bool(self.bits[low >> 3] & (1 << (low & 7)))
+
+    def add(self, low: int) -> bool:
+        byte_idx = low >> 3
+        mask = 1 << (low & 7)
+
+        if self.bits[byte_idx] & mask:
+            return False
+
+        self.bits[byte_idx] |= mask
+        self.cnt += 1
+
+        return True
+
+    def discard(self, low: int) -> bool:
+        byte_idx = low >> 3
+        mask = 1 << (low & 7)
+
+        if not self.bits[byte_idx] & mask:
+            return False
+
+        self.bits[byte_idx] &= ~mask
+        self.cnt -= 1
+
+        return True
+
+    def __iter__(self) -> Iterator[int]:
+        for byte_idx, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield (byte_idx << 3) | bit
+
+    def __len__(self):
+        return self.cnt
+
+
+class CompactIDSet:
+    """
+    A set of non-negative integer IDs which needs at most 2 bytes per ID
+    (plus a small constant overhead per chunk of 2^16 IDs) and iterates in
+    ascending order.
+    """
+    __slots__ = ('_chunks', '_len')
+
+    def __init__(self, ids: Iterable[int] = ()):
+        # upper bits -> sorted array('H') or _BitmapChunk
+        self._chunks: Dict[int, array | _BitmapChunk] = dict()
+        self._len = 0
+
+        for id_ in ids:
+            self.add(id_)
+
+    def __contains__(self, id_: int) -> bool:
+        chunk = self._chunks.get(id_ >> _CHUNK_BITS)
+
+        if chunk is None:
+            return False
+
+        low = id_ & _LOW_MASK
+
+        if isinstance(chunk, array):
+            idx = bisect_left(chunk, low)
+            return idx < len(chunk) and chunk[idx] == low
+
+        return low in chunk
+
+    def add(self, id_: int) -> None:
+        if id_ < 0:
+            raise ValueError(f'IDs have to be non-negative, got {id_}')
+
+        high = id_ >> _CHUNK_BITS
+        low = id_ & _LOW_MASK
+        chunk = self._chunks.get(high)
+
+        if chunk is None:
+            self._chunks[high] = array('H', [low])
+            self._len += 1
+
+        elif isinstance(chunk, array):
+            idx = bisect_left(chunk, low)
+
+            if idx < len(chunk) and chunk[idx] == low:
+                return
+
+            if len(chunk) < _MAX_ARRAY_SIZE:
+                chunk.insert(idx, low)
+            else:
+                bitmap = _BitmapChunk(chunk)
+                bitmap.add(low)
+                self._chunks[high] = bitmap
+
+            self._len += 1
+
+        elif chunk.add(low):
+            self._len += 1
+
+    def discard(self, id_: int) -> None:
+        high = id_ >> _CHUNK_BITS
+        low = id_ & _LOW_MASK
+        chunk = self._chunks.get(high)
+
+        if chunk is None:
+            return
+
+        if isinstance(chunk, array):
+            idx = bisect_left(chunk, low)
+
+            if idx == len(chunk) or chunk[idx] != low:
+                return
+
+            del chunk[idx]
+
+        elif chunk.discard(low):
+            if len(chunk) <= _MAX_ARRAY_SIZE // 2:
+                # shrink again, with some hysteresis to not convert back and
+                # forth when adding and removing around the threshold
+                self._chunks[high] = array('H', chunk)
+
+        else:
+            return
+
+        self._len -= 1
+
+        if len(self._chunks[high]) == 0:
+            del self._chunks[high]
+
+    def remove(self, id_: int) -> None:
+        if id_ not in self:
+            raise KeyError(id_)
+
+        self.discard(id_)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._chunks.keys()):
+            offset = high << _CHUNK_BITS
+
+            for low in self._chunks[high]:
+                yield offset | low
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __eq__(self, other):
+        if isinstance(other, CompactIDSet):
+            return len(self) == len(other) and list(self) == list(other)
+
+        return NotImplemented
+
+    def __repr__(self):
+        return f'CompactIDSet({list(self)})'
+
+    def get_num_bytes(self) -> int:
+        """Returns the number of bytes of the chunk payloads"""
+        return sum(
+            len(chunk) * chunk.itemsize if isinstance(chunk, array) else _BITMAP_SIZE
+            for chunk in self._chunks.values()
+        )
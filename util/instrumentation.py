@@ -0,0 +1,272 @@
+"""
+Stage-level profiling of the mapping pipeline.
+
+A StageProfiler measures the wall and CPU time of named stages, optionally the
+peak of the memory traced by tracemalloc during each stage, and collects
+counters like the number of processed triples. Stages may be nested; the name
+of a nested stage is prefixed with the names of the enclosing stages, e.g.
+'load/parse'. Stages entered several times, e.g. once per knowledge source,
+are accumulated. The results are reported as JSON. Optionally, each
+outermost stage is run under cProfile and its statistics are written to a
+file per stage.
+
+A disabled profiler only costs a method call per stage, so code paths can be
+instrumented unconditionally.
+
+Long running loops, like the one over the triples of a knowledge source,
+report their progress to a ProgressHook. The loop counts in local variables
+and only hands a LoadProgress snapshot to the hook every `interval` items, so
+that the reporting can stay enabled.
+"""
+import cProfile
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class _StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.
+        self.cpu_seconds = 0.
+        self.peak_traced_bytes = 0
+
+    def to_dict(self, trace_memory: bool) -> dict:
+        stats = {
+            'calls': self.calls,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds
+        }
+        if trace_memory:
+            stats['peak_traced_mb'] = self.peak_traced_bytes / 2 ** 20
+
+        return stats
+
+
+class _Frame:
+    """A stage which is currently running"""
+    def __init__(self, name: str):
+        self.name = name
+        self.peak_traced_bytes = 0
+
+
+class StageProfiler:
+    def __init__(
+            self,
+            enabled: bool = True,
+            trace_memory: bool = False,
+            cprofile_dir_path: str | None = None
+    ):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.cprofile_dir_path = cprofile_dir_path if enabled else None
+
+        self.stages: Dict[str, _StageStats] = dict()
+        self.counters: Dict[str, int] = dict()
+
+        self._frames: List[_Frame] = []
+        self._start_wall_time = time.perf_counter()
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        if self._frames:
+            name = f'{self._frames[-1].name}/{name}'
+
+        if self.trace_memory:
+            if self._frames:
+                # the peak is reset for this stage, so the one reached by the
+                # enclosing stage so far has to be kept
+                parent = self._frames[-1]
+                parent.peak_traced_bytes = max(
+                    parent.peak_traced_bytes,
+                    tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+
+        frame = _Frame(name)
+        # cProfile does not support nested profilers
+        profiler = None
+        if self.cprofile_dir_path is not None and not self._frames:
+            profiler = cProfile.Profile()
+
+        self._frames.append(frame)
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            yield
+
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+            wall_seconds = time.perf_counter() - start_wall_time
+            cpu_seconds = time.process_time() - start_cpu_time
+            self._frames.pop()
+
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = _StageStats()
+                self.stages[name] = stats
+
+            stats.calls += 1
+            stats.wall_seconds += wall_seconds
+            stats.cpu_seconds += cpu_seconds
+
+            if self.trace_memory:
+                frame.peak_traced_bytes = max(
+                    frame.peak_traced_bytes,
+                    tracemalloc.get_traced_memory()[1]
+                )
+                stats.peak_traced_bytes = max(stats.peak_traced_bytes, frame.peak_traced_bytes)
+
+                # the memory of a nested stage is memory of the enclosing one
+                if self._frames:
+                    parent = self._frames[-1]
+                    parent.peak_traced_bytes = max(parent.peak_traced_bytes, frame.peak_traced_bytes)
+
+            if profiler is not None:
+                os.makedirs(self.cprofile_dir_path, exist_ok=True)
+                profiler.dump_stats(
+                    os.path.join(self.cprofile_dir_path, f'{name.replace("/", "_")}.prof')
+                )
+
+    def count(self, name: str, num: int = 1) -> None:
+        """Adds num to the counter with the given name"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + num
+
+    def get_report(self) -> dict:
+        return {
+            'total_wall_seconds': time.perf_counter() - self._start_wall_time,
+            'stages': {
+                name: stats.to_dict(self.trace_memory)
+                for name, stats in self.stages.items()
+            },
+            'counters': dict(self.counters)
+        }
+
+    def write_report(self, file_path: str) -> None:
+        with open(file_path, 'w') as report_file:
+            json.dump(self.get_report(), report_file, indent=2)
+
+
+# profiler of code paths which are not profiled
+NULL_PROFILER = StageProfiler(enabled=False)
+
+
+def get_rss_mb() -> float:
+    """
+    Returns the current resident set size of the process in MB, or the peak
+    one where the current one is not available
+    """
+    try:
+        with open('/proc/self/statm') as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+    except (OSError, ValueError, IndexError):
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # kilobytes on Linux, bytes on macOS
+        if sys.platform == 'darwin':
+            return peak_rss / 2 ** 20
+
+        return peak_rss / 2 ** 10
+
+
+class LoadProgress:
+    """Progress of loading the triples of a knowledge source"""
+    def __init__(self, total_triples: int | None):
+        self.total_triples = total_triples
+        self.processed_triples = 0
+        # kind of predicate, e.g. 'type' or 'statement' -> number of triples
+        self.predicate_class_counts: Dict[str, int] = dict()
+        self.rss_mb = 0.
+
+        self._start_time = time.perf_counter()
+
+    def update(self, processed_triples: int, predicate_class_counts: Dict[str, int]) -> None:
+        self.processed_triples = processed_triples
+        self.predicate_class_counts = dict(predicate_class_counts)
+        self.rss_mb = get_rss_mb()
+
+    def get_elapsed_seconds(self) -> float:
+        return time.perf_counter() - self._start_time
+
+    def get_triples_per_second(self) -> float:
+        elapsed_seconds = self.get_elapsed_seconds()
+
+        return self.processed_triples / elapsed_seconds if elapsed_seconds > 0 else 0.
+
+    def to_dict(self) -> dict:
+        return {
+            'total_triples': self.total_triples,
+            'processed_triples': self.processed_triples,
+            'elapsed_seconds': self.get_elapsed_seconds(),
+            'triples_per_second': self.get_triples_per_second(),
+            'rss_mb': self.rss_mb,
+            'predicate_classes': dict(self.predicate_class_counts)
+        }
+
+
+class ProgressHook:
+    """
+    Receives the progress of a load every interval triples and once it is
+    finished. Subclasses override on_progress and on_finish.
+    """
+    def __init__(self, interval: int = 100000):
+        self.interval = interval
+
+    def on_progress(self, progress: LoadProgress) -> None:
+        pass
+
+    def on_finish(self, progress: LoadProgress) -> None:
+        pass
+
+
+class LoggingProgressHook(ProgressHook):
+    def on_progress(self, progress: LoadProgress) -> None:
+        if progress.total_triples:
+            done = f'{progress.processed_triples}/{progress.total_triples} triples ' \
+                   f'({100 * progress.processed_triples / progress.total_triples:.0f}%)'
+        else:
+            done = f'{progress.processed_triples} triples'
+
+        logger.info(
+            f'{done} processed, {progress.get_triples_per_second():.0f} triples/s, '
+            f'{progress.rss_mb:.0f} MB RSS, by kind: {progress.predicate_class_counts}'
+        )
+
+    def on_finish(self, progress: LoadProgress) -> None:
+        logger.info(
+            f'Processed {progress.processed_triples} triples in '
+            f'{progress.get_elapsed_seconds():.1f} s '
+            f'({progress.get_triples_per_second():.0f} triples/s), '
+            f'{progress.rss_mb:.0f} MB RSS, by kind: {progress.predicate_class_counts}'
+        )
+
+
+# progress hook of loads which are not reported
+NULL_PROGRESS_HOOK = ProgressHook(interval=sys.maxsize)
+# default progress hook, logging every 100000 triples
+LOGGING_PROGRESS_HOOK = LoggingProgressHook()
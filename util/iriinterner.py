@@ -0,0 +1,106 @@
+from typing import Dict, List, Iterator, Tuple
+
+from rdflib import URIRef
+
+IRIID = int
+
+
+def get_local_name(iri: URIRef) -> str:
+    return iri.split('/')[-1].split('#')[-1]
+
+
+class IRIInterner:
+    """
+    Maps IRIs to dense integer IDs, so that each IRI is stored only once and
+    handlers can keep the (much smaller and faster to hash) integer IDs in
+    their sets and arrays.
+    """
+    def __init__(self):
+        self._iri_to_id: Dict[URIRef, IRIID] = dict()
+        self._iris: List[URIRef] = []
+
+    def get_id(self, iri: URIRef) -> IRIID:
+        iri_id = self._iri_to_id.get(iri)
+
+        if iri_id is None:
+            iri_id = len(self._iris)
+            self._iri_to_id[iri] = iri_id
+            self._iris.append(iri)
+
+        return iri_id
+
+    def find_id(self, iri: URIRef) -> IRIID | None:
+        """Like get_id(), but does not intern IRIs which are not known, yet"""
+        return self._iri_to_id.get(iri)
+
+    def get_iri(self, iri_id: IRIID) -> URIRef:
+        return self._iris[iri_id]
+
+    def __len__(self):
+        return len(self._iris)
+
+
+class LocalNameRegistry:
+    """
+    Assigns unique names to IRIs which are derived from their local names.
+    Name collisions are resolved by appending a counter, i.e. the second IRI
+    with the local name 'name' is called 'name<separator>1', the third one
+    'name<separator>2', and so on. The next counter value is kept per local
+    name, so that a collision does not require probing all previously
+    assigned suffixes.
+    """
+    def __init__(self, interner: IRIInterner, separator: str = ''):
+        self._interner = interner
+        self._separator = separator
+
+        self._id_to_name: Dict[IRIID, str] = dict()
+        self._name_to_id: Dict[str, IRIID] = dict()
+        self._next_suffix: Dict[str, int] = dict()
+
+    def get_name(self, iri: URIRef) -> str:
+        iri_id = self._interner.get_id(iri)
+        name = self._id_to_name.get(iri_id)
+
+        if name is None:
+            local_name = get_local_name(iri)
+            name = local_name
+            cntr = self._next_suffix.get(local_name, 1)
+
+            # suffixed names may also be taken by IRIs whose local name
+            # happens to look like a suffixed one, e.g. 'name_1'
+            while name in self._name_to_id:
+                name = f'{local_name}{self._separator}{cntr}'
+                cntr += 1
+
+            if name != local_name:
+                self._next_suffix[local_name] = cntr
+
+            self.add(iri, name)
+
+        return name
+
+    def add(self, iri: URIRef, name: str) -> None:
+        """Registers an already assigned name, e.g. when restoring a profile"""
+        iri_id = self._interner.get_id(iri)
+        self._id_to_name[iri_id] = name
+        self._name_to_id[name] = iri_id
+
+    def contains_iri(self, iri: URIRef) -> bool:
+        iri_id = self._interner.find_id(iri)
+
+        return iri_id is not None and iri_id in self._id_to_name
+
+    def get_iri(self, name: str) -> URIRef | None:
+        iri_id = self._name_to_id.get(name)
+
+        if iri_id is None:
+            return None
+
+        return self._interner.get_iri(iri_id)
+
+    def items(self) -> Iterator[Tuple[URIRef, str]]:
+        for iri_id, name in self._id_to_name.items():
+            yield self._interner.get_iri(iri_id), name
+
+    def __len__(self):
+        return len(self._id_to_name)
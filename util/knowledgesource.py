@@ -1,14 +1,62 @@
-import random
+import hashlib
 from abc import ABC
-from typing import Set, Dict
+from typing import Set, Dict, Iterable, Tuple, List
 
-from rdflib import Graph, URIRef, RDF, RDFS, OWL, IdentifiedNode
+from rdflib import Graph, URIRef, RDF, RDFS, OWL, IdentifiedNode, BNode
 from rdflib.term import Node, Literal
+from steiner_tree.bank import BankGraph
 
 import util.graphbuilder
 from semanticlabeling.typeinferencer import TypeInferencer
 from semanticlabeling.labeledcolumn import TextColumn, LabeledColumn, YetUnknownTypeColumn, \
     UntypedIDColumn
+from util import columncomparator
+from util.columnstore import ColumnStore
+from util.instrumentation import LOGGING_PROGRESS_HOOK, LoadProgress, NULL_PROFILER, \
+    ProgressHook, StageProfiler
+from util.lazycolumns import LazyColumns
+from util.steiner import CSRGraph
+
+
+_IGNORED_PREDICATES = {
+    RDFS.seeAlso,
+    OWL.priorVersion,
+    OWL.imports,
+    OWL.deprecated,
+    URIRef('http://purl.org/vocab/vann/preferredNamespacePrefix'),
+    OWL.versionInfo
+}
+
+_SCHEMA_PREDICATES = {
+    RDFS.subClassOf,
+    RDFS.range,
+    RDFS.domain,
+    RDFS.subPropertyOf,
+    OWL.inverseOf,
+    OWL.someValuesFrom,
+    OWL.hasSelf,
+    OWL.onProperty,
+    OWL.equivalentClass
+}
+
+_SCHEMA_TYPES = {
+    OWL.DatatypeProperty,
+    OWL.ObjectProperty,
+    OWL.Class,
+    RDFS.Class,
+    OWL.Restriction,
+    OWL.FunctionalProperty,
+    OWL.InverseFunctionalProperty,
+    OWL.AnnotationProperty,
+    OWL.Ontology,
+    RDFS.Datatype
+}
+
+Triple = Tuple[Node, Node, Node]
+
+
+class UnsupportedDeltaException(Exception):
+    """Thrown when a delta cannot be applied incrementally"""
 
 
 class KnowledgeSource:
@@ -19,15 +67,22 @@ class KnowledgeSource:
     properties.
     One assumption here is, that the ontology will fit into RAM and can be
     processed as is using the rdflib.
+
+    If no knowledge source file path is given, an empty knowledge source is
+    created, e.g. to be filled from a stored profile (see
+    util.knowledgesourceprofile).
     """
     def __init__(
             self,
-            knowledge_source_file_path: str,
+            knowledge_source_file_path: str | None,
             sample_portion: float,
-            min_column_rows: int = 0
+            min_column_rows: int = 0,
+            profiler: StageProfiler = NULL_PROFILER,
+            progress_hook: ProgressHook = LOGGING_PROGRESS_HOOK
     ):
         self.cls_restrictions: Dict[IdentifiedNode, OWLRestriction] = dict()
 
+        self.sample_portion = sample_portion
         self.min_column_rows = min_column_rows
         self.type_inferencer = TypeInferencer()
         self._uri_to_column_name: Dict[URIRef, str] = dict()
@@ -40,7 +95,8 @@ class KnowledgeSource:
         self.tmp_id_columns: Dict[str, YetUnknownTypeColumn] = dict()
 
         # self.id_columns: Dict[str, TypedIDColumn] = dict()
-        self.columns: Dict[str, LabeledColumn] = dict()
+        # columns are only built when they are accessed
+        self.columns: LazyColumns | ColumnStore = LazyColumns()
 
         # add name column for rdfs:label
         self.label_column = TextColumn('name', 0, 0, 0)
@@ -48,173 +104,305 @@ class KnowledgeSource:
         # add comment column for rdfs:comment
         self.comment_column = TextColumn('comment', 0, 0, 0)
 
-        g_ = Graph()
-        g_.parse(knowledge_source_file_path)
-        g = g_.skolemize()
-        del g_
+        # profiles do not contain instance data, so deltas cannot be applied
+        # to knowledge sources restored from them
+        self.has_instance_data = True
 
-        for s, p, o in g:
-            assert isinstance(s, URIRef)
-            assert isinstance(p, URIRef)
-            assert isinstance(o, Node)
+        # memoized graphs of the columns
+        self._graph: BankGraph | None = None
+        self._csr_graph: CSRGraph | None = None
 
-            if p == RDF.type:
-                assert isinstance(o, URIRef)
+        if knowledge_source_file_path is None:
+            return
 
-                self._process_type_information(s, o)
+        with profiler.stage('parse'):
+            g_ = Graph()
+            g_.parse(knowledge_source_file_path)
 
-            elif p == RDFS.label:
-                assert isinstance(o, Literal)
+        with profiler.stage('skolemize'):
+            g = g_.skolemize()
+            del g_
+        profiler.count('triples', len(g))
 
-                label_length = len(str(o))
-                self.label_column.update_stats(label_length)
-                continue
+        with profiler.stage('process_triples'):
+            progress = self._process_triples(g, progress_hook)
 
-            elif p == RDFS.seeAlso:
-                continue
+        for predicate_class, num_triples in progress.predicate_class_counts.items():
+            profiler.count(f'triples/{predicate_class}', num_triples)
 
-            elif p == RDFS.comment:
-                assert isinstance(o, Literal)
+        with profiler.stage('post_process'):
+            self.type_inferencer.compute_class_closure()
+            self._post_process_subproperties()
+            self._post_process_inverse_of()
+            self._post_process_columns()
+            self.type_inferencer.clear_changes()
 
-                comment_length = len(str(o))
-                self.comment_column.update_stats(comment_length)
-                continue
+        del g
 
-            elif p == OWL.priorVersion:
-                continue
+    def _process_triples(self, g: Graph, progress_hook: ProgressHook) -> LoadProgress:
+        progress = LoadProgress(len(g))
+        # counted locally and only handed to the hook every interval triples
+        predicate_class_counts: Dict[str, int] = dict()
+        interval = progress_hook.interval
+        next_report = interval
+        num_triples = 0
 
-            elif p == OWL.imports:
-                continue
+        for s, p, o in g:
+            predicate_class = self._process_triple(s, p, o)
+            predicate_class_counts[predicate_class] = predicate_class_counts.get(predicate_class, 0) + 1
+            num_triples += 1
 
-            elif p == OWL.deprecated:
-                continue
+            if num_triples == next_report:
+                progress.update(num_triples, predicate_class_counts)
+                progress_hook.on_progress(progress)
+                next_report += interval
 
-            elif p == URIRef('http://purl.org/vocab/vann/preferredNamespacePrefix'):
-                continue
+        progress.update(num_triples, predicate_class_counts)
+        progress_hook.on_finish(progress)
 
-            elif p == OWL.versionInfo:
-                continue
+        return progress
 
-            elif p == RDFS.subClassOf:
-                assert isinstance(o, URIRef)
+    def _process_triple(self, s: URIRef, p: URIRef, o: Node) -> str:
+        """
+        Processes the triple and returns the kind of its predicate, which is
+        counted by the progress reporting
+        """
+        assert isinstance(s, URIRef)
+        assert isinstance(p, URIRef)
+        assert isinstance(o, Node)
 
-                self.type_inferencer.add_subclass(o, s)
-                continue
+        if p == RDF.type:
+            assert isinstance(o, URIRef)
 
-            elif p == RDFS.range:
-                assert isinstance(o, URIRef)
+            self._process_type_information(s, o)
+            return 'type'
 
-                self.type_inferencer.add_property_range(s, o)
-                continue
+        elif p == RDFS.label:
+            assert isinstance(o, Literal)
 
-            elif p == RDFS.domain:
-                assert isinstance(o, URIRef)
+            label_length = len(str(o))
+            self.label_column.update_stats(label_length)
+            return 'annotation'
 
-                self.type_inferencer.add_property_domain(s, o)
-                continue
+        elif p in _IGNORED_PREDICATES:
+            return 'ignored'
 
-            elif p == RDFS.subPropertyOf:
-                assert isinstance(o, URIRef)
+        elif p == RDFS.comment:
+            assert isinstance(o, Literal)
 
-                self.type_inferencer.add_subproperty(o, s)
-                continue
+            comment_length = len(str(o))
+            self.comment_column.update_stats(comment_length)
+            return 'annotation'
 
-            elif p == OWL.inverseOf:
-                assert isinstance(o, URIRef)
+        elif p == RDFS.subClassOf:
+            assert isinstance(o, URIRef)
 
-                self.type_inferencer.add_inverse_properties(s, o)
-                continue
+            self.type_inferencer.add_subclass(o, s)
+            return 'schema'
 
-            elif p == OWL.someValuesFrom:
-                assert isinstance(o, URIRef)
+        elif p == RDFS.range:
+            assert isinstance(o, URIRef)
 
-                partially_initialized_restriction = self.cls_restrictions.get(s)
+            self.type_inferencer.add_property_range(s, o)
+            return 'schema'
 
-                # In case the OWL.onProperty triple was processed before (at
-                # that time not knowing whether it belongs to an existential,
-                # universal or other kind of restriction) it was temporarily
-                # stored as YetUnknownOWLRestriction
-                if partially_initialized_restriction is not None:
-                    assert isinstance(
-                        partially_initialized_restriction, YetUnknownOWLRestriction
-                    )
+        elif p == RDFS.domain:
+            assert isinstance(o, URIRef)
 
-                    restriction = OWLSomeValuesFrom(s)
-                    restriction.set_property(
-                        partially_initialized_restriction.property)
-                    restriction.set_filler(o)
-                    self.cls_restrictions[s] = restriction
-                    del partially_initialized_restriction
+            self.type_inferencer.add_property_domain(s, o)
+            return 'schema'
 
-                else:
-                    restriction = OWLSomeValuesFrom(s)
-                    restriction.set_filler(o)
-                    self.cls_restrictions[s] = restriction
+        elif p == RDFS.subPropertyOf:
+            assert isinstance(o, URIRef)
 
-                continue
+            self.type_inferencer.add_subproperty(o, s)
+            return 'schema'
 
-            elif p == OWL.hasSelf:
-                assert isinstance(o, Literal)
+        elif p == OWL.inverseOf:
+            assert isinstance(o, URIRef)
 
-                partially_initialized_restriction = self.cls_restrictions.get(s)
+            self.type_inferencer.add_inverse_properties(s, o)
+            return 'schema'
 
-                # In case the OWL.onProperty triple was processed before (at
-                # that time not knowing whether it belongs to an existential,
-                # universal or other kind of restriction) it was temporarily
-                # stored as YetUnknownOWLRestriction
-                if partially_initialized_restriction is not None:
-                    assert isinstance(
-                        partially_initialized_restriction, YetUnknownOWLRestriction
-                    )
+        elif p == OWL.someValuesFrom:
+            assert isinstance(o, URIRef)
+
+            partially_initialized_restriction = self.cls_restrictions.get(s)
 
-                    restriction = OWLHasSelf(s)
-                    restriction.set_property(
-                        partially_initialized_restriction.property)
-                    self.cls_restrictions[s] = restriction
-                    del partially_initialized_restriction
+            # In case the OWL.onProperty triple was processed before (at
+            # that time not knowing whether it belongs to an existential,
+            # universal or other kind of restriction) it was temporarily
+            # stored as YetUnknownOWLRestriction
+            if partially_initialized_restriction is not None:
+                assert isinstance(
+                    partially_initialized_restriction, YetUnknownOWLRestriction
+                )
 
-                else:
-                    restriction = OWLHasSelf(s)
-                    self.cls_restrictions[s] = restriction
+                restriction = OWLSomeValuesFrom(s)
+                restriction.set_property(
+                    partially_initialized_restriction.property)
+                restriction.set_filler(o)
+                self.cls_restrictions[s] = restriction
+                del partially_initialized_restriction
 
-                continue
+            else:
+                restriction = OWLSomeValuesFrom(s)
+                restriction.set_filler(o)
+                self.cls_restrictions[s] = restriction
+
+            return 'restriction'
 
-            elif p == OWL.onProperty:
-                assert isinstance(o, URIRef)
+        elif p == OWL.hasSelf:
+            assert isinstance(o, Literal)
 
-                cls_restr = self.cls_restrictions.get(s)
+            partially_initialized_restriction = self.cls_restrictions.get(s)
 
-                if cls_restr is None:
-                    cls_restr = YetUnknownOWLRestriction(s)
-                    cls_restr.set_property(p)
-                    self.cls_restrictions[s] = cls_restr
+            # In case the OWL.onProperty triple was processed before (at
+            # that time not knowing whether it belongs to an existential,
+            # universal or other kind of restriction) it was temporarily
+            # stored as YetUnknownOWLRestriction
+            if partially_initialized_restriction is not None:
+                assert isinstance(
+                    partially_initialized_restriction, YetUnknownOWLRestriction
+                )
 
-                else:
-                    cls_restr.set_property(p)
+                restriction = OWLHasSelf(s)
+                restriction.set_property(
+                    partially_initialized_restriction.property)
+                self.cls_restrictions[s] = restriction
+                del partially_initialized_restriction
 
-                continue
+            else:
+                restriction = OWLHasSelf(s)
+                self.cls_restrictions[s] = restriction
 
-            elif p == OWL.equivalentClass:
-                assert isinstance(o, URIRef)
+            return 'restriction'
 
-                self.type_inferencer.add_subclass(s, o)
-                self.type_inferencer.add_subclass(o, s)
-                continue
+        elif p == OWL.onProperty:
+            assert isinstance(o, URIRef)
 
-            elif p == OWL.intersectionOf:
-                # ignored for now
-                # TODO: implement
-                continue
+            cls_restr = self.cls_restrictions.get(s)
+
+            if cls_restr is None:
+                cls_restr = YetUnknownOWLRestriction(s)
+                cls_restr.set_property(p)
+                self.cls_restrictions[s] = cls_restr
 
             else:
-                if random.random() <= sample_portion:
-                    self.type_inferencer.add_statement(s, p, o)
+                cls_restr.set_property(p)
+
+            return 'restriction'
+
+        elif p == OWL.equivalentClass:
+            assert isinstance(o, URIRef)
+
+            self.type_inferencer.add_subclass(s, o)
+            self.type_inferencer.add_subclass(o, s)
+            return 'schema'
+
+        elif p == OWL.intersectionOf:
+            # ignored for now
+            # TODO: implement
+            return 'ignored'
+
+        else:
+            if self._is_sampled(s, p, o):
+                self.type_inferencer.add_statement(s, p, o)
+                return 'statement'
+
+            return 'sampled_out_statement'
+
+    def _is_sampled(self, s: URIRef, p: URIRef, o: Node) -> bool:
+        """
+        Whether the statement is part of the sample. The decision is derived
+        from a hash of the statement, so that a removed statement is only
+        reverted if it was counted when it was added.
+        """
+        if self.sample_portion >= 1:
+            return True
+
+        digest = hashlib.blake2b(f'{s} {p} {o}'.encode('utf-8'), digest_size=8).digest()
+
+        return int.from_bytes(digest, 'little') < self.sample_portion * 2 ** 64
+
+    def _process_removed_triple(self, s: URIRef, p: URIRef, o: Node):
+        assert isinstance(s, URIRef)
+        assert isinstance(p, URIRef)
+        assert isinstance(o, Node)
+
+        if p == RDF.type:
+            self.type_inferencer.remove_instance_of_type(s, o)
+
+        elif p == RDFS.label:
+            self.label_column.revert_stats(len(str(o)))
+
+        elif p == RDFS.comment:
+            self.comment_column.revert_stats(len(str(o)))
+
+        elif p in _IGNORED_PREDICATES or p == OWL.intersectionOf:
+            pass
+
+        elif self._is_sampled(s, p, o):
+            self.type_inferencer.remove_statement(s, p, o)
+
+    @staticmethod
+    def _is_schema_triple(p: URIRef, o: Node) -> bool:
+        if p == RDF.type:
+            return o in _SCHEMA_TYPES
+
+        return p in _SCHEMA_PREDICATES
+
+    @staticmethod
+    def _skolemize(triple: Triple) -> Triple:
+        return tuple(n.skolemize() if isinstance(n, BNode) else n for n in triple)
 
+    def apply_delta(
+            self,
+            added: Iterable[Triple],
+            removed: Iterable[Triple]
+    ) -> Set[str | URIRef]:
+        """
+        Updates the knowledge source with the triples added to and removed
+        from the knowledge graph, e.g. from a daily diff, instead of
+        rebuilding it. Only the columns affected by the delta are rebuilt
+        (the next time they are accessed).
+        Returns the keys of these columns; keys of columns which do not exist
+        any more were removed from the columns.
+
+        Removed triples are processed before the added ones. Added statements
+        are sampled like the statements of the knowledge source file.
+        Removing schema triples, e.g. class declarations or rdfs:subClassOf
+        axioms, is not supported and requires a rebuild.
+        """
+        if not self.has_instance_data:
+            raise UnsupportedDeltaException(
+                'Deltas cannot be applied to a knowledge source without '
+                'instance data, e.g. one loaded from a profile')
+
+        removed = [self._skolemize(triple) for triple in removed]
+
+        for s, p, o in removed:
+            if self._is_schema_triple(p, o):
+                raise UnsupportedDeltaException(
+                    f'Cannot remove schema triple ({s}, {p}, {o})')
+
+        for s, p, o in removed:
+            self._process_removed_triple(s, p, o)
+
+        for triple in added:
+            self._process_triple(*self._skolemize(triple))
+
+        self.type_inferencer.compute_class_closure()
         self._post_process_subproperties()
         self._post_process_inverse_of()
-        self._post_process_columns()
 
-        del g
+        changed_keys = self.type_inferencer.pop_changed_column_keys()
+        built_keys = self._set_column_factories(keys=changed_keys)
+
+        for key in changed_keys - built_keys:
+            self.columns.pop(key, None)
+
+        return changed_keys
 
     def get_object_properties(self) -> Set[URIRef]:
         return self.type_inferencer.get_object_property_iris()
@@ -334,13 +522,104 @@ class KnowledgeSource:
             self._process_typed_instance(s, type_)
 
     def _post_process_columns(self):
-        for id_, column in self.type_inferencer.get_columns(min_instances=self.min_column_rows):
-            self.columns[id_] = column
+        self._set_column_factories()
+
+    def _set_column_factories(self, keys: Iterable[str | URIRef] | None = None) -> Set[str | URIRef]:
+        factories = self.type_inferencer.get_column_factories(
+            min_instances=self.min_column_rows,
+            keys=keys
+        )
+
+        for key, build, column_classes in factories:
+            self.columns.set_factory(key, build, column_classes)
+
+        # the graphs are built from the columns
+        self._graph = None
+        self._csr_graph = None
+
+        return {key for key, _, _ in factories}
+
+    def build_columns(self, n_jobs: int = 1) -> None:
+        """
+        Builds all columns which were not accessed, yet, e.g. before all
+        columns are needed anyway. The datatype columns are built in n_jobs
+        processes.
+        """
+        if not isinstance(self.columns, LazyColumns):
+            # columns restored from a profile are not built from the values
+            return
+
+        pending_keys = [key for key in self.columns if not self.columns.is_materialized(key)]
+
+        for key, column in self.type_inferencer.get_columns(
+                min_instances=self.min_column_rows,
+                keys=pending_keys,
+                n_jobs=n_jobs
+        ):
+            self.columns[key] = column
+
+    def get_comparable_columns(self, column: LabeledColumn) -> List[LabeledColumn]:
+        """
+        Returns the columns the given column can be compared to. Columns
+        which cannot be comparable because of their class are not built.
+        """
+        comparable_columns = []
+
+        for key in self.columns:
+            column_classes = self.columns.get_column_classes(key)
+
+            if not column_classes:
+                # class only known once the column is built
+                column_classes = type(self.columns[key]),
+
+            if any(columncomparator.are_comparable(type(column), cls) for cls in column_classes):
+                comparable_columns.append(self.columns[key])
+
+        return comparable_columns
+
+    def get_graph(self) -> BankGraph:
+        """The graph of the columns and their links, built once"""
+        if self._graph is None:
+            self._graph = util.graphbuilder.build(
+                list(self.columns.values()),
+                self.type_inferencer.get_edge_weights()
+            )
+
+        return self._graph
+
+    def get_csr_graph(self) -> CSRGraph:
+        """
+        The graph of the columns and their links as CSRGraph, built once or
+        restored from a profile. Columns which are not built, yet, are not
+        built for the graph.
+        """
+        if self._csr_graph is None:
+            weights = self.type_inferencer.get_edge_weights()
+
+            if isinstance(self.columns, LazyColumns):
+                keys = list(self.columns)
+                self._csr_graph = CSRGraph(
+                    (self.type_inferencer.get_column_name(key) for key in keys),
+                    (
+                        (source, target, link_name, weights.get(
+                            (source, link_name, target),
+                            util.graphbuilder.DEFAULT_EDGE_WEIGHT
+                        ))
+                        for source, link_name, target in self.type_inferencer.get_column_links(
+                            keys,
+                            min_instances=self.min_column_rows
+                        )
+                    )
+                )
+
+            else:
+                self._csr_graph = CSRGraph.from_columns(list(self.columns.values()), weights)
 
-    def get_graph(self):
-        columns = list(self.columns.values())
+        return self._csr_graph
 
-        return util.graphbuilder.build(columns)
+    def set_csr_graph(self, csr_graph: CSRGraph) -> None:
+        """Sets the graph of the columns, e.g. one restored from a profile"""
+        self._csr_graph = csr_graph
 
 
 class OWLRestriction(ABC):
@@ -0,0 +1,373 @@
+"""
+Persisted knowledge source profiles.
+
+A profile only contains what is needed for semantic labeling and modeling,
+i.e. the column statistics, the links between the columns and the class and
+property hierarchy. Instance data like the typed resources or the raw literal
+values is not stored, which keeps profiles small and fast to load.
+
+A profile is a directory holding the class and property hierarchy as JSON,
+the columns as a memory-mapped column store (see util.columnstore) and the
+graph of the columns (see util.steiner.CSRGraph), so that it does not have to
+be rebuilt for every mapping.
+
+Profiles are keyed by a hash of the knowledge source file content and the
+profile version. Hence, edits of the knowledge source file are detected and
+profiles written by an incompatible version of the code are not picked up.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, List
+
+from rdflib import URIRef
+
+from semanticlabeling.labeledcolumn import LabeledColumn
+from util import columnstore
+from util.columnstore import ColumnStore
+from util.instrumentation import NULL_PROFILER, StageProfiler
+from util.knowledgesource import KnowledgeSource
+from util.property import PropertyHandler
+from util.steiner import CSRGraph
+from util.type import TypeHandler
+
+logger = logging.getLogger(__name__)
+
+# Has to be increased whenever the profile layout or the way the profiled
+# columns are computed changes. Profiles of other versions are not loaded.
+PROFILE_VERSION = 9
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class IncompatibleProfileException(Exception):
+    """Thrown when a stored profile was written with another profile version"""
+
+
+def get_file_hash(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def get_profile_key(
+        knowledge_source_file_path: str,
+        sample_portion: float,
+        min_column_rows: int = 0
+) -> str:
+    key = hashlib.sha256()
+    key.update(get_file_hash(knowledge_source_file_path).encode())
+    key.update(f'|{PROFILE_VERSION}|{sample_portion}|{min_column_rows}'.encode())
+
+    return key.hexdigest()[:32]
+
+
+def get_profile_path(
+        knowledge_source_file_path: str,
+        sample_portion: float,
+        cache_dir: str,
+        min_column_rows: int = 0
+) -> str:
+    profile_key = get_profile_key(
+        knowledge_source_file_path,
+        sample_portion,
+        min_column_rows
+    )
+    dir_name = f'{os.path.basename(knowledge_source_file_path)}_{profile_key}'
+
+    return os.path.join(cache_dir, dir_name)
+
+
+class _ProfileWriter:
+    """
+    Assigns an index to every column and type handler reachable from a
+    knowledge source so that shared objects (e.g. a column which is the
+    target of several links) are only written once and can be referenced.
+    """
+    def __init__(self):
+        self.columns: List[LabeledColumn] = []
+        self.type_handlers: List[dict] = []
+        self._column_idxs: Dict[int, int] = dict()
+        self._type_handler_idxs: Dict[int, int] = dict()
+
+    def add_column(self, column: LabeledColumn) -> int:
+        idx = self._column_idxs.get(id(column))
+
+        if idx is None:
+            idx = len(self.columns)
+            self._column_idxs[id(column)] = idx
+            self.columns.append(column)
+
+        return idx
+
+    def add_link_targets(self):
+        # link targets which were not registered, yet, are appended to the
+        # columns list and get their link targets registered in a later
+        # iteration
+        idx = 0
+        while idx < len(self.columns):
+            for _, target_columns in self.columns[idx].iter_links():
+                for target_column in target_columns:
+                    if target_column is not None:
+                        self.add_column(target_column)
+
+            idx += 1
+
+    def add_type_handler(self, type_handler: TypeHandler) -> int:
+        idx = self._type_handler_idxs.get(id(type_handler))
+
+        if idx is None:
+            idx = len(self.type_handlers)
+            self._type_handler_idxs[id(type_handler)] = idx
+            self.type_handlers.append({
+                'iri': str(type_handler.iri),
+                'id': type_handler.id_,
+                'is_datatype': type_handler.is_datatype,
+                'id_column': self.add_column(type_handler.id_column)
+            })
+
+        return idx
+
+
+def _write_profile(knowledge_source: KnowledgeSource, profile_dir_path: str) -> None:
+    writer = _ProfileWriter()
+    type_inferencer = knowledge_source.type_inferencer
+    types_handler = type_inferencer.types_handler
+    properties_handler = type_inferencer.properties_handler
+
+    column_keys = [
+        (key, writer.add_column(column))
+        for key, column in knowledge_source.columns.items()
+    ]
+
+    properties = []
+    for property_ in properties_handler.properties.values():
+        properties.append({
+            'iri': str(property_.iri),
+            'id': property_.id_,
+            'domains': [writer.add_type_handler(d) for d in property_.domains],
+            'ranges': [writer.add_type_handler(r) for r in property_.ranges],
+            'domain_support': [
+                [writer.add_type_handler(d), property_.get_domain_support(d)]
+                for d in property_.domains
+            ],
+            'range_support': [
+                [writer.add_type_handler(r), property_.get_range_support(r)]
+                for r in property_.ranges
+            ],
+            'is_object_property': property_.is_object_property,
+            'is_datatype_property': property_.is_datatype_property,
+            'is_functional': property_.is_functional,
+            'is_inverse_functional': property_.is_inverse_functional
+        })
+
+    types = [
+        [str(iri), writer.add_type_handler(type_)]
+        for iri, type_ in types_handler.types.items()
+    ]
+    datatypes = [
+        [property_id, writer.add_type_handler(datatype_)]
+        for property_id, datatype_ in types_handler.datatypes.items()
+    ]
+    label_column_idx = writer.add_column(knowledge_source.label_column)
+    comment_column_idx = writer.add_column(knowledge_source.comment_column)
+    writer.add_link_targets()
+
+    profile = {
+        'profile_version': PROFILE_VERSION,
+        'min_column_rows': knowledge_source.min_column_rows,
+        'label_column': label_column_idx,
+        'comment_column': comment_column_idx,
+        'types': types,
+        'datatypes': datatypes,
+        'class_iris': [str(iri) for iri in types_handler.class_iris],
+        'column_ids': [[str(iri), id_] for iri, id_ in types_handler.column_ids.items()],
+        'subclass_edges': [
+            [str(superclass_iri), str(subclass_iri)]
+            for superclass_iri, subclass_iri in types_handler.hierarchy.get_subclass_edges()
+        ],
+        'properties': properties,
+        'property_ids': [
+            [str(iri), id_] for iri, id_ in properties_handler.property_ids.items()
+        ],
+        'subproperties': {
+            str(iri): [str(p) for p in subproperties]
+            for iri, subproperties in properties_handler.subproperties.items()
+        },
+        'inverse_properties': [
+            [str(p1), str(p2)] for p1, p2 in properties_handler.inverse_properties
+        ],
+        'type_handlers': writer.type_handlers
+    }
+
+    columnstore.write(writer.columns, column_keys, os.path.join(profile_dir_path, 'columns'))
+    knowledge_source.get_csr_graph().save(os.path.join(profile_dir_path, 'graph'))
+
+    with open(os.path.join(profile_dir_path, 'profile.json'), 'w') as profile_file:
+        json.dump(profile, profile_file, separators=(',', ':'))
+
+
+def _from_profile_dict(profile: dict, columns: ColumnStore) -> KnowledgeSource:
+    knowledge_source = KnowledgeSource(
+        None,
+        sample_portion=1.0,
+        min_column_rows=profile['min_column_rows']
+    )
+
+    knowledge_source.has_instance_data = False
+    knowledge_source.columns = columns
+    knowledge_source.label_column = columns.get_column_by_index(profile['label_column'])
+    knowledge_source.comment_column = columns.get_column_by_index(profile['comment_column'])
+
+    type_handlers = []
+    for type_handler_dict in profile['type_handlers']:
+        type_handler = TypeHandler(
+            type_iri=URIRef(type_handler_dict['iri']),
+            type_id=type_handler_dict['id']
+        )
+        type_handler.is_datatype = type_handler_dict['is_datatype']
+        type_handler.id_column = columns.get_column_object(type_handler_dict['id_column'])
+        type_handlers.append(type_handler)
+
+    type_inferencer = knowledge_source.type_inferencer
+    types_handler = type_inferencer.types_handler
+    properties_handler = type_inferencer.properties_handler
+
+    for iri, type_handler_idx in profile['types']:
+        types_handler.types[URIRef(iri)] = type_handlers[type_handler_idx]
+
+    for property_id, type_handler_idx in profile['datatypes']:
+        types_handler.datatypes[property_id] = type_handlers[type_handler_idx]
+
+    types_handler.class_iris = {URIRef(iri) for iri in profile['class_iris']}
+
+    for iri, column_id in profile['column_ids']:
+        types_handler.column_ids.add(URIRef(iri), column_id)
+
+    for superclass_iri, subclass_iri in profile['subclass_edges']:
+        types_handler.hierarchy.add_subclass(URIRef(superclass_iri), URIRef(subclass_iri))
+    types_handler.compute_class_closure()
+
+    for property_dict in profile['properties']:
+        property_ = PropertyHandler(URIRef(property_dict['iri']), property_dict['id'])
+        property_.domains = {type_handlers[i] for i in property_dict['domains']}
+        property_.ranges = {type_handlers[i] for i in property_dict['ranges']}
+        for i, cnt in property_dict['domain_support']:
+            if cnt > 0:
+                property_.set_domain_support(type_handlers[i], cnt)
+        for i, cnt in property_dict['range_support']:
+            if cnt > 0:
+                property_.set_range_support(type_handlers[i], cnt)
+        property_.is_object_property = property_dict['is_object_property']
+        property_.is_datatype_property = property_dict['is_datatype_property']
+        property_.is_functional = property_dict['is_functional']
+        property_.is_inverse_functional = property_dict['is_inverse_functional']
+        properties_handler.properties[property_.iri] = property_
+
+    for iri, property_id in profile['property_ids']:
+        properties_handler.property_ids.add(URIRef(iri), property_id)
+
+    properties_handler.subproperties = {
+        URIRef(iri): {URIRef(p) for p in subproperties}
+        for iri, subproperties in profile['subproperties'].items()
+    }
+    properties_handler.inverse_properties = {
+        (URIRef(p1), URIRef(p2)) for p1, p2 in profile['inverse_properties']
+    }
+
+    return knowledge_source
+
+
+def save(knowledge_source: KnowledgeSource, profile_dir_path: str) -> None:
+    # write to a temporary directory first so that concurrent readers never
+    # see a partially written profile
+    parent_dir_path = os.path.dirname(os.path.abspath(profile_dir_path))
+    tmp_dir_path = tempfile.mkdtemp(dir=parent_dir_path, prefix='.tmp_profile_')
+
+    try:
+        _write_profile(knowledge_source, tmp_dir_path)
+        os.rename(tmp_dir_path, profile_dir_path)
+
+    except OSError:
+        # e.g. another process stored the same profile in the meantime
+        shutil.rmtree(tmp_dir_path, ignore_errors=True)
+
+        if not os.path.exists(profile_dir_path):
+            raise
+
+
+def load(profile_dir_path: str) -> KnowledgeSource:
+    with open(os.path.join(profile_dir_path, 'profile.json')) as profile_file:
+        profile = json.load(profile_file)
+
+    profile_version = profile.get('profile_version')
+    if profile_version != PROFILE_VERSION:
+        raise IncompatibleProfileException(
+            f'Profile {profile_dir_path} has version {profile_version}, '
+            f'expected {PROFILE_VERSION}'
+        )
+
+    columns = ColumnStore(os.path.join(profile_dir_path, 'columns'))
+    knowledge_source = _from_profile_dict(profile, columns)
+    knowledge_source.set_csr_graph(CSRGraph.load(os.path.join(profile_dir_path, 'graph')))
+
+    return knowledge_source
+
+
+def load_or_create(
+        knowledge_source_file_path: str,
+        sample_portion: float,
+        cache_dir: str,
+        min_column_rows: int = 0,
+        n_jobs: int = 1,
+        profiler: StageProfiler = NULL_PROFILER
+) -> KnowledgeSource:
+    """
+    Loads the profile of the given knowledge source file from the cache
+    directory. If there is no profile, yet, the knowledge source is processed
+    and its profile is stored in the cache directory. The datatype columns of
+    a processed knowledge source are built in n_jobs processes.
+
+    Storing the profile needs all columns, so they are all built when the
+    profile is created. The columns of a loaded profile are only created when
+    they are accessed.
+    """
+    profile_dir_path = get_profile_path(
+        knowledge_source_file_path,
+        sample_portion,
+        cache_dir,
+        min_column_rows
+    )
+
+    if os.path.exists(profile_dir_path):
+        try:
+            with profiler.stage('load_profile'):
+                return load(profile_dir_path)
+        except (IncompatibleProfileException, OSError, ValueError, KeyError) as e:
+            logger.warning(f'Could not load profile {profile_dir_path}: {e}')
+            shutil.rmtree(profile_dir_path, ignore_errors=True)
+
+    logger.info(f'No profile for {knowledge_source_file_path} in {cache_dir}')
+    knowledge_source = KnowledgeSource(
+        knowledge_source_file_path,
+        sample_portion=sample_portion,
+        min_column_rows=min_column_rows,
+        profiler=profiler
+    )
+    # storing the profile needs all columns
+    with profiler.stage('build_columns'):
+        knowledge_source.build_columns(n_jobs=n_jobs)
+    profiler.count('columns', len(knowledge_source.columns))
+
+    with profiler.stage('save_profile'):
+        os.makedirs(cache_dir, exist_ok=True)
+        save(knowledge_source, profile_dir_path)
+
+    return knowledge_source
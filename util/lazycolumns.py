@@ -0,0 +1,74 @@
+from typing import Callable, Dict, Iterator, MutableMapping, Tuple, Type
+
+from semanticlabeling.labeledcolumn import LabeledColumn
+from util.columnstore import ColumnKey
+
+ColumnFactory = Callable[[], LabeledColumn]
+
+
+class _PendingColumn:
+    __slots__ = ('build', 'column_classes')
+
+    def __init__(self, build: ColumnFactory, column_classes: Tuple[Type[LabeledColumn], ...]):
+        self.build = build
+        self.column_classes = column_classes
+
+
+class LazyColumns(MutableMapping):
+    """
+    Mapping from column keys to columns which are only built when they are
+    accessed for the first time and memoized afterwards. Besides the keys,
+    only the classes a column can have are known upfront, which allows to
+    skip columns that are not comparable to a given column without building
+    them (see get_column_classes()).
+    """
+    def __init__(self):
+        self._entries: Dict[ColumnKey, LabeledColumn | _PendingColumn] = dict()
+
+    def set_factory(
+            self,
+            key: ColumnKey,
+            build: ColumnFactory,
+            column_classes: Tuple[Type[LabeledColumn], ...] = ()
+    ) -> None:
+        """
+        Registers how to build the column with the given key, replacing a
+        previously built column. The column classes are the classes the
+        built column may have, or empty if they are not known in advance.
+        """
+        self._entries[key] = _PendingColumn(build, column_classes)
+
+    def is_materialized(self, key: ColumnKey) -> bool:
+        return not isinstance(self._entries[key], _PendingColumn)
+
+    def get_column_classes(self, key: ColumnKey) -> Tuple[Type[LabeledColumn], ...]:
+        entry = self._entries[key]
+
+        if isinstance(entry, _PendingColumn):
+            return entry.column_classes
+
+        return type(entry),
+
+    def __getitem__(self, key: ColumnKey) -> LabeledColumn:
+        entry = self._entries[key]
+
+        if isinstance(entry, _PendingColumn):
+            entry = entry.build()
+            self._entries[key] = entry
+
+        return entry
+
+    def __setitem__(self, key: ColumnKey, column: LabeledColumn) -> None:
+        self._entries[key] = column
+
+    def __delitem__(self, key: ColumnKey) -> None:
+        del self._entries[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[ColumnKey]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
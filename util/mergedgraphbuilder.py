@@ -0,0 +1,104 @@
+"""
+Union of the column graphs of several knowledge sources.
+
+Within a knowledge source, the nodes of the column graph are identified by the
+column names, which clash across knowledge sources, while the same class may be
+described by several of them. Hence, in the merged graph the node of a class
+column is identified by the class IRI, so that a class shared by several
+knowledge sources becomes a single node, and all other nodes are identified by
+the index of their knowledge source and their column name. Likewise, the edges
+are labeled with the IRIs of their properties instead of the property IDs,
+which are only unique within a knowledge source, so that links of different
+properties with the same local name are kept apart.
+
+The knowledge sources are added one after the other, reusing their (possibly
+cached) graphs instead of rebuilding the graph of all columns.
+"""
+from typing import Dict, List, Tuple
+
+from util.knowledgesource import KnowledgeSource
+from util.steiner import CSRGraph, EdgeTriple
+
+
+class MergedGraphBuilder:
+    def __init__(self):
+        self.node_ids: List[str] = []
+        self._node_idxs: Dict[str, int] = dict()
+
+        self._edges: List[Tuple[str, str, str, float]] = []
+        self._edge_idxs: Dict[EdgeTriple, int] = dict()
+
+        # per knowledge source: column name -> node ID
+        self._source_node_ids: List[Dict[str, str]] = []
+
+        self._graph: CSRGraph | None = None
+
+    def add_knowledge_source(self, knowledge_source: KnowledgeSource) -> int:
+        """
+        Adds the columns and links of the given knowledge source to the merged
+        graph and returns the index of the knowledge source
+        """
+        source_idx = len(self._source_node_ids)
+        class_node_ids = {
+            type_.id_: str(iri)
+            for iri, type_ in knowledge_source.type_inferencer.types_handler.types.items()
+        }
+        property_ids = knowledge_source.type_inferencer.properties_handler.property_ids
+        graph = knowledge_source.get_csr_graph()
+
+        node_ids: Dict[str, str] = dict()
+        for column_name in graph.node_ids:
+            node_id = class_node_ids.get(column_name)
+            if node_id is None:
+                node_id = f'{source_idx}:{column_name}'
+
+            node_ids[column_name] = node_id
+
+            if node_id not in self._node_idxs:
+                self._node_idxs[node_id] = len(self.node_ids)
+                self.node_ids.append(node_id)
+
+        # property ID -> property IRI
+        edge_keys: Dict[str, str] = dict()
+
+        for edge_idx in range(graph.get_num_edges()):
+            source, target, key = graph.get_edge_triple(edge_idx)
+
+            edge_key = edge_keys.get(key)
+            if edge_key is None:
+                property_iri = property_ids.get_iri(key)
+                edge_key = str(property_iri) if property_iri is not None else key
+                edge_keys[key] = edge_key
+
+            self._add_edge(node_ids[source], node_ids[target], edge_key, float(graph.weights[edge_idx]))
+
+        self._source_node_ids.append(node_ids)
+        self._graph = None
+
+        return source_idx
+
+    def _add_edge(self, source: str, target: str, key: str, weight: float) -> None:
+        edge_triple = source, target, key
+        edge_idx = self._edge_idxs.get(edge_triple)
+
+        if edge_idx is None:
+            self._edge_idxs[edge_triple] = len(self._edges)
+            self._edges.append((source, target, key, weight))
+
+        # a link of a shared class keeps the weight of its most used variant
+        elif weight < self._edges[edge_idx][3]:
+            self._edges[edge_idx] = (source, target, key, weight)
+
+    def get_node_id(self, source_idx: int, column_name: str) -> str:
+        """
+        Returns the ID of the node of the column with the given name of the
+        knowledge source with the given index
+        """
+        return self._source_node_ids[source_idx][column_name]
+
+    def get_graph(self) -> CSRGraph:
+        """The merged graph of all knowledge sources added so far"""
+        if self._graph is None:
+            self._graph = CSRGraph(self.node_ids, self._edges)
+
+        return self._graph
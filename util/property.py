@@ -2,6 +2,7 @@ from typing import Dict, Set, Tuple
 
 from rdflib import URIRef
 
+from util.iriinterner import LocalNameRegistry
 from util.type import TypesHandler, TypeHandler
 
 
@@ -13,6 +14,11 @@ class PropertyHandler:
         self.domains: Set[TypeHandler] = set()
         self.ranges: Set[TypeHandler] = set()
 
+        # number of declarations and statements a domain or range was derived
+        # from, so that it can be dropped again when they are removed
+        self._domain_support: Dict[TypeHandler, int] = dict()
+        self._range_support: Dict[TypeHandler, int] = dict()
+
         self.is_object_property = False
         self.is_datatype_property = False
         self.is_functional = False
@@ -21,11 +27,58 @@ class PropertyHandler:
     def get_column_name(self):
         return self.id_
 
-    def add_range(self, rnge: TypeHandler):
+    def add_range(self, rnge: TypeHandler, support: int = 1):
         self.ranges.add(rnge)
+        self._range_support[rnge] = self._range_support.get(rnge, 0) + support
 
-    def add_domain(self, domain: TypeHandler):
+    def add_domain(self, domain: TypeHandler, support: int = 1):
         self.domains.add(domain)
+        self._domain_support[domain] = self._domain_support.get(domain, 0) + support
+
+    def get_domain_support(self, domain: TypeHandler) -> int:
+        return self._domain_support.get(domain, 0)
+
+    def get_range_support(self, rnge: TypeHandler) -> int:
+        return self._range_support.get(rnge, 0)
+
+    def set_domain_support(self, domain: TypeHandler, cnt: int) -> None:
+        """Sets the support of an existing domain, e.g. restored from a profile"""
+        self._domain_support[domain] = cnt
+
+    def set_range_support(self, rnge: TypeHandler, cnt: int) -> None:
+        self._range_support[rnge] = cnt
+
+    def remove_range(self, rnge: TypeHandler) -> bool:
+        """
+        Removes one supporting statement of the given range. Returns True if
+        the range was dropped since no declaration or statement supports it
+        any more.
+        """
+        return self._remove_support(rnge, self._range_support, self.ranges)
+
+    def remove_domain(self, domain: TypeHandler) -> bool:
+        return self._remove_support(domain, self._domain_support, self.domains)
+
+    @staticmethod
+    def _remove_support(
+            type_: TypeHandler,
+            support: Dict[TypeHandler, int],
+            types: Set[TypeHandler]
+    ) -> bool:
+        cnt = support.get(type_)
+
+        if cnt is None:
+            # e.g. inherited from a superproperty or inverse property
+            return False
+
+        elif cnt > 1:
+            support[type_] = cnt - 1
+            return False
+
+        else:
+            del support[type_]
+            types.discard(type_)
+            return True
 
 
 class PropertiesHandler:
@@ -33,33 +86,17 @@ class PropertiesHandler:
         self.properties: Dict[str, PropertyHandler] = dict()
         self.types = types_handler
 
-        self._iri_to_property_id: Dict[URIRef, str] = dict()
-        self._property_id_to_iri: Dict[str, URIRef] = dict()
+        self.property_ids = LocalNameRegistry(types_handler.interner)
 
         self.subproperties: Dict[URIRef, Set[URIRef]] = dict()
         self.inverse_properties: Set[Tuple[URIRef, URIRef]] = set()
 
     def _compute_and_add_property_id(self, iri: URIRef):
-        property_id = self._iri_to_property_id.get(iri)
-
-        if property_id is None:
-            local_part = iri.split('/')[-1].split('#')[-1]
-            tmp = local_part[:]
-            cntr = 0
-            while tmp in self._property_id_to_iri.keys():
-                cntr += 1
-                tmp = local_part + str(cntr)
-
-            property_id = tmp
-
-            self._iri_to_property_id[iri] = property_id
-            self._property_id_to_iri[property_id] = iri
-
-        return property_id
+        return self.property_ids.get_name(iri)
 
     def add_property(self, property_iri: URIRef) -> None:
         assert \
-            property_iri not in self._iri_to_property_id.keys(), \
+            not self.property_ids.contains_iri(property_iri), \
             'Property was already added'
 
         property_id = self._compute_and_add_property_id(property_iri)
@@ -176,12 +213,12 @@ class PropertiesHandler:
         else:
             type_ = self.types.get_type(range_iri)
 
-        property_.ranges.add(type_)
+        property_.add_range(type_)
 
     def add_property_domain(self, property_iri: URIRef, domain: URIRef) -> None:
         property_ = self.get_property(property_iri)
         type_ = self.types.get_type(domain)
-        property_.domains.add(type_)
+        property_.add_domain(type_)
 
     def add_subproperty(self, superproperty: URIRef, subproperty: URIRef):
         assert isinstance(subproperty, URIRef)
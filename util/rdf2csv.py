@@ -1,11 +1,29 @@
+import bz2
 import csv
 import datetime
+import heapq
+import logging
+import os
+import pickle
 import random
-from typing import Union, Tuple
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Set, Union, Tuple
 
+import pandas as pd
 from rdflib import Graph, URIRef, IdentifiedNode, BNode
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
 from rdflib.term import Node, Literal
 
+logger = logging.getLogger(__name__)
+
+GEO_HAS_GEOMETRY = URIRef('http://www.opengis.net/ont/geosparql#hasGeometry')
+GEO_AS_WKT = URIRef('http://www.opengis.net/ont/geosparql#asWKT')
+
+# maximum number of sorted runs merged at the same time, i.e. of files open
+# for reading while merging
+MAX_MERGE_FAN_IN = 64
+
 
 def _get_key(resource: Node) -> str:
     if isinstance(resource, URIRef):
@@ -25,40 +43,56 @@ def _get_key(resource: Node) -> str:
         raise NotImplementedError()
 
 
-COLUMN_IDS = {
-    # hash of full URI: local part of URI
-}
+class ColumnRegistry:
+    """
+    Column IDs of the properties of one conversion. The ID of a property is
+    the local part of its IRI. If the ID is already taken by a property of a
+    different namespace, e.g. http://foo.com/name is known and
+    http://bar.com/name is added, a number is appended (name1), since the
+    values should not end up in the same column as their semantics might
+    differ.
+    """
+    def __init__(self):
+        self.column_ids: Dict[URIRef, str] = dict()
+        self._taken_column_ids: Set[str] = set()
+        # base column ID -> last number appended to it
+        self._counters: Dict[str, int] = dict()
 
+    def get_column_id(self, property: Node) -> str:
+        if not isinstance(property, URIRef):
+            raise Exception('Found property that is not a URI')
 
-def _get_col_id(property: Node) -> str:
-    if isinstance(property, URIRef):
-        property_hash = hash(property)
-        col_id = COLUMN_IDS.get(property_hash)
+        col_id = self.column_ids.get(property)
 
         if col_id is None:
             if '#' in property:
-                col_id = property.rsplit('#', 1)[-1]
+                base_col_id = property.rsplit('#', 1)[-1]
             else:
-                col_id = property.rsplit('/', 1)[-1]
-
-            # check if there is already a column ID stored in COLUMN_IDS, but
-            # from a different URI namespace, e.g. http://foo.com/name is
-            # already known, and now we have http:bar.com/name . In both cases
-            # the column ID would be 'name'. However, the values should not
-            # end up in the same column as their respective semantics might
-            # differ. Thus, we add a number to the newly found 'name' and make
-            # it 'name1'
-            base_col_id = col_id
-            counter = 0
-            while col_id in COLUMN_IDS.values():
+                base_col_id = property.rsplit('/', 1)[-1]
+
+            col_id = base_col_id
+            counter = self._counters.get(base_col_id, 0)
+            # only loops if a numbered ID is the local part of another IRI
+            while col_id in self._taken_column_ids:
                 counter += 1
                 col_id = base_col_id + str(counter)
 
-            COLUMN_IDS[property_hash] = col_id
+            self._counters[base_col_id] = counter
+            self._taken_column_ids.add(col_id)
+            self.column_ids[property] = col_id
 
         return col_id
-    else:
-        raise Exception('Found property that is not a URI')
+
+    def merge(self, column_ids: Dict[URIRef, str]) -> Dict[str, str]:
+        """
+        Adds the properties of another registry, given by its column_ids, and
+        returns a mapping from their column IDs in the other registry to the
+        ones in this registry
+        """
+        return {
+            col_id: self.get_column_id(property)
+            for property, col_id in column_ids.items()
+        }
 
 
 def _get_value(value: Node) -> Union[str, None]:
@@ -93,34 +127,38 @@ def _parse_coordinates(wkt_point_str: str) -> Tuple[float, float]:
     return float(lat_str), float(lon_str)
 
 
-def _resolve_geom(geom_uri: Node, g: Graph) -> Tuple[float, float]:
-    query_results = g.query(
-        f'SELECT ?wkt '
-        f'WHERE {{ '
-        f'  <{str(geom_uri)}> <http://www.opengis.net/ont/geosparql#asWKT> ?wkt '
-        f'}}')
+def _get_geometry_points(g: Graph) -> Dict[Node, Tuple[float, float]]:
+    """Returns the (lat, lon) coordinates of all geometries of the graph"""
+    return {
+        geom: _parse_coordinates(str(wkt))
+        for geom, wkt in g.subject_objects(GEO_AS_WKT)
+    }
 
-    for result in query_results:
-        # there should at most be one result
 
-        # get first projection value, i.e., ?wkt
-        result_literal = result[0]
-        lat, lon = _parse_coordinates(str(result_literal))
+def _resolve_geom(geom_uri: Node, points: Dict[Node, Tuple[float, float]]) -> Tuple[float, float]:
+    point = points.get(geom_uri)
 
-    if len(query_results) == 0:
+    if point is None:
         raise Exception(f'No coordinates found for {geom_uri}')
 
-    return lat, lon
+    return point
 
 
 def convert(input_file_path: str, output_file_path: str):
     g = Graph()
     g.parse(input_file_path)
 
+    # all coordinates are looked up in one pass instead of querying them per
+    # geometry
+    points = _get_geometry_points(g)
+
+    column_registry = ColumnRegistry()
+
     # nested dict to be converted into csv(s) later
     data = {}
     uris_to_skip = set()
     header = []
+    header_set = set()
 
     for s, p, o in g:
         # s is assumed to be a URI or blank node
@@ -131,9 +169,9 @@ def convert(input_file_path: str, output_file_path: str):
 
         # p is assumed to be a URI
         # special treatment of geometries
-        if p == URIRef('http://www.opengis.net/ont/geosparql#hasGeometry'):
+        if p == GEO_HAS_GEOMETRY:
             try:
-                lat, lon = _resolve_geom(o, g)
+                lat, lon = _resolve_geom(o, points)
             except Exception as e:
                 print(e)
                 continue
@@ -142,7 +180,8 @@ def convert(input_file_path: str, output_file_path: str):
             if data.get(key) is None:
                 data[key] = {}
 
-            if 'lat' not in header:
+            if 'lat' not in header_set:
+                header_set.update(('lat', 'lon'))
                 header.append('lat')
                 header.append('lon')
 
@@ -152,7 +191,7 @@ def convert(input_file_path: str, output_file_path: str):
             continue
 
         else:
-            column_id = _get_col_id(p)
+            column_id = column_registry.get_column_id(p)
         value = _get_value(o)
 
         if value is None:
@@ -160,7 +199,8 @@ def convert(input_file_path: str, output_file_path: str):
 
         if data.get(key) is None:
             data[key] = {}
-        if column_id not in header:
+        if column_id not in header_set:
+            header_set.add(column_id)
             header.append(column_id)
         data[key][column_id] = value
 
@@ -179,3 +219,468 @@ def convert(input_file_path: str, output_file_path: str):
             # row.append(datetime.date.fromtimestamp(
             #     int(random.gauss(1360000000, 400000000))).isoformat())
             csv_writer.writerow(row)
+
+
+def _write_run(dir_path: str, records: Iterator[tuple]) -> str:
+    """Writes the sorted records to a new run file in dir_path"""
+    fd, file_path = tempfile.mkstemp(dir=dir_path, suffix='.run')
+
+    with os.fdopen(fd, 'wb') as run_file:
+        for record in records:
+            pickle.dump(record, run_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return file_path
+
+
+def _read_run(file_path: str) -> Iterator[tuple]:
+    # the file is only opened once the first record is requested
+    with open(file_path, 'rb') as run_file:
+        while True:
+            try:
+                yield pickle.load(run_file)
+            except EOFError:
+                return
+
+
+def _merge_sorted(
+        streams: List[Iterator[tuple]],
+        dir_path: str,
+        fan_in: int | None = None
+) -> Iterator[tuple]:
+    """
+    Merges sorted streams which only open their run file once they are
+    started, like _read_run(). At most fan_in (by default MAX_MERGE_FAN_IN)
+    streams are merged at the same time: as long as there are more, groups
+    of fan_in streams are merged into intermediate runs in dir_path.
+    """
+    if fan_in is None:
+        fan_in = MAX_MERGE_FAN_IN
+
+    while len(streams) > fan_in:
+        merged_streams = []
+
+        for group_start in range(0, len(streams), fan_in):
+            group = streams[group_start:group_start + fan_in]
+
+            if len(group) == 1:
+                merged_streams.append(group[0])
+            else:
+                merged_streams.append(_read_run(_write_run(dir_path, heapq.merge(*group))))
+
+        streams = merged_streams
+
+    return heapq.merge(*streams)
+
+
+class _SortedSpillBuffer:
+    """
+    Sorts records (tuples) with bounded memory: the records are collected in
+    memory and written to a temporary file as a sorted run whenever
+    max_records are buffered. iter_sorted() merges the runs.
+    """
+    def __init__(self, dir_path: str, max_records: int):
+        self._dir_path = dir_path
+        self._max_records = max_records
+        self._records: List[tuple] = []
+        self._run_file_paths: List[str] = []
+
+    def add(self, record: tuple) -> None:
+        self._records.append(record)
+
+        if len(self._records) >= self._max_records:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._records.sort()
+        self._run_file_paths.append(_write_run(self._dir_path, self._records))
+        self._records = []
+
+    def get_run_file_paths(self) -> List[str]:
+        """Spills the buffered records and returns the files of all runs"""
+        if self._records:
+            self._spill()
+
+        return list(self._run_file_paths)
+
+    def get_streams(self) -> List[Iterator[tuple]]:
+        """
+        Returns a sorted stream per run and one of the records in memory, to
+        be merged with _merge_sorted()
+        """
+        self._records.sort()
+
+        return [_read_run(file_path) for file_path in self._run_file_paths] + [iter(self._records)]
+
+    def iter_sorted(self) -> Iterator[tuple]:
+        return _merge_sorted(self.get_streams(), self._dir_path)
+
+
+class _StreamingConverter:
+    """
+    Sink of the N-Triples parser. The triples of a subject are collected until
+    the subject changes, i.e. a row is complete with each run of triples of
+    the same subject. Complete rows are spilled to a sorted buffer on disk, so
+    that the rows of a subject occurring in several runs are merged in the
+    end. Geometries are joined the same way: the geometry references of the
+    subjects and the WKT points of the geometries are sorted by geometry.
+    """
+    def __init__(self, dir_path: str, max_buffered_rows: int):
+        # (key, sequence number, {column ID: value})
+        self.rows = _SortedSpillBuffer(dir_path, max_buffered_rows)
+        # (geometry, 0, lat, lon) and (geometry, 1, key), i.e. the point of
+        # a geometry is sorted before the subjects referencing it
+        self.geometries = _SortedSpillBuffer(dir_path, max_buffered_rows)
+
+        self.column_registry = ColumnRegistry()
+        self.header: List[str] = []
+
+        self._cntr = 0
+        self._subject: Node | None = None
+        self._values: Dict[str, str] = dict()
+        self._geometries: List[str] = []
+        self._wkt: str | None = None
+
+    def triple(self, s: Node, p: Node, o: Node) -> None:
+        if s != self._subject:
+            self.flush()
+            self._subject = s
+
+        if p == GEO_HAS_GEOMETRY:
+            self._geometries.append(str(o))
+
+        elif p == GEO_AS_WKT:
+            self._wkt = str(o)
+
+        else:
+            value = _get_value(o)
+
+            if value is not None:
+                is_new = p not in self.column_registry.column_ids
+                column_id = self.column_registry.get_column_id(p)
+                if is_new:
+                    self.header.append(column_id)
+
+                self._values[column_id] = value
+
+    def flush(self) -> None:
+        """Spills the row of the current subject"""
+        if self._wkt is not None:
+            # geometries are no rows on their own
+            lat, lon = _parse_coordinates(self._wkt)
+            self.geometries.add((str(self._subject), 0, lat, lon))
+
+        elif self._values or self._geometries:
+            key = _get_key(self._subject)
+
+            if self._values:
+                self.rows.add((key, self._cntr, self._values))
+                self._cntr += 1
+
+            for geometry in self._geometries:
+                self.geometries.add((geometry, 1, key))
+
+        self._values = dict()
+        self._geometries = []
+        self._wkt = None
+
+
+def _join_geometries(geometry_records: Iterator[tuple]) -> Iterator[Tuple[str, float, float]]:
+    """
+    Yields the key, lat and lon of each subject referencing a geometry, given
+    the geometry records of _StreamingConverter sorted by geometry
+    """
+    geometry = None
+    point = None
+
+    for record in geometry_records:
+        if record[0] != geometry:
+            geometry = record[0]
+            point = None
+
+        if record[1] == 0:
+            point = record[2:]
+
+        elif point is None:
+            logger.warning(f'No coordinates found for {geometry}')
+
+        else:
+            yield record[2], point[0], point[1]
+
+
+def _merge_rows(row_records: Iterator[tuple]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yields the keys and the merged values of all subjects, given row records
+    sorted by key whose last element are the values
+    """
+    key = None
+    values = dict()
+
+    for record in row_records:
+        if record[0] != key:
+            if key is not None:
+                yield key, values
+            key = record[0]
+            values = dict()
+
+        values.update(record[-1])
+
+    if key is not None:
+        yield key, values
+
+
+class _ShardReader:
+    """
+    Binary file-like object reading the lines of a file which start in the
+    byte range [start, end)
+    """
+    def __init__(self, file, start: int, end: int):
+        self._file = file
+        self._end = end
+
+        if start > 0:
+            # skip the line started in the previous shard
+            file.seek(start - 1)
+            file.readline()
+
+    def read(self, size: int = -1) -> bytes:
+        lines = []
+        num_bytes = 0
+
+        while self._file.tell() < self._end and (size < 0 or num_bytes < size):
+            line = self._file.readline()
+            if not line:
+                break
+
+            lines.append(line)
+            num_bytes += len(line)
+
+        return b''.join(lines)
+
+
+# input file path, start and end byte of the shard (None for whole files)
+_Part = Tuple[str, int | None, int | None]
+
+
+def _is_ntriples_file(file_path: str) -> bool:
+    return file_path.endswith('.nt') or file_path.endswith('.nt.bz2')
+
+
+def _get_parts(input_file_paths: List[str], n_jobs: int) -> List[_Part]:
+    """
+    Splits uncompressed N-Triples files into shards, so that a few large
+    files keep n_jobs workers busy as well
+    """
+    num_shards = max(n_jobs // len(input_file_paths), 1)
+    parts: List[_Part] = []
+
+    for file_path in input_file_paths:
+        if num_shards == 1 or not file_path.endswith('.nt'):
+            parts.append((file_path, None, None))
+            continue
+
+        file_size = os.path.getsize(file_path)
+        for shard_idx in range(num_shards):
+            parts.append((
+                file_path,
+                file_size * shard_idx // num_shards,
+                file_size * (shard_idx + 1) // num_shards
+            ))
+
+    return parts
+
+
+class _ConvertedPart:
+    def __init__(self, converter: _StreamingConverter):
+        self.column_ids: Dict[URIRef, str] = converter.column_registry.column_ids
+        self.header: List[str] = converter.header
+        self.row_file_paths = converter.rows.get_run_file_paths()
+        self.geometry_file_paths = converter.geometries.get_run_file_paths()
+
+
+def _convert_part(part: _Part, dir_path: str, max_buffered_rows: int) -> _ConvertedPart:
+    """
+    Converts a part of the input into sorted runs of rows and geometries in
+    dir_path
+    """
+    file_path, start, end = part
+    converter = _StreamingConverter(dir_path, max_buffered_rows)
+
+    if _is_ntriples_file(file_path):
+        open_input = bz2.open if file_path.endswith('.bz2') else open
+
+        with open_input(file_path, 'rb') as input_file:
+            if start is not None:
+                input_file = _ShardReader(input_file, start, end)
+
+            W3CNTriplesParser(sink=converter).parse(input_file)
+
+    else:
+        g = Graph()
+        g.parse(file_path)
+
+        for s in g.subjects(unique=True):
+            for p, o in g.predicate_objects(s):
+                converter.triple(s, p, o)
+
+    converter.flush()
+
+    return _ConvertedPart(converter)
+
+
+def _iter_run_rows(part_idx: int, run_file_path: str, column_ids: Dict[str, str]) -> Iterator[tuple]:
+    """
+    Yields the sorted rows of a run of a part with the column IDs of the
+    merged table. The part index keeps the rows of different parts apart.
+    """
+    for key, cntr, values in _read_run(run_file_path):
+        yield key, part_idx, cntr, {column_ids[col]: value for col, value in values.items()}
+
+
+def _get_typed_frame(header: List[str], rows: Iterator[Tuple[str, Dict]]) -> pd.DataFrame:
+    """
+    Returns the rows as data frame with float coordinates and numeric and
+    date time columns where all values can be parsed as such
+    """
+    df = pd.DataFrame.from_records(
+        ([key] + [values.get(col) for col in header] for key, values in rows),
+        columns=['id'] + header
+    )
+
+    for col in header:
+        if col in ('lat', 'lon'):
+            df[col] = df[col].astype(float)
+            continue
+
+        series = df[col]
+        values = series.dropna()
+        if len(values) == 0:
+            continue
+
+        try:
+            df[col] = pd.to_numeric(series)
+            continue
+        except (ValueError, TypeError):
+            pass
+
+        try:
+            pd.to_datetime(values, format='ISO8601')
+            df[col] = pd.to_datetime(series, format='ISO8601')
+        except (ValueError, TypeError):
+            pass
+
+    return df
+
+
+def _write_table(header: List[str], rows: Iterator[Tuple[str, Dict]], output_file_path: str) -> None:
+    if output_file_path.endswith('.parquet'):
+        # requires pyarrow (extra 'parquet')
+        _get_typed_frame(header, rows).to_parquet(output_file_path, index=False)
+
+    elif output_file_path.endswith('.arrow') or output_file_path.endswith('.feather'):
+        _get_typed_frame(header, rows).to_feather(output_file_path)
+
+    else:
+        with open(output_file_path, 'w') as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(['id'] + header + ['date'])
+
+            for key, values in rows:
+                csv_writer.writerow([key] + [values.get(col, '') for col in header])
+
+
+def convert_files(
+        input_file_paths: List[str],
+        output_file_path: str,
+        n_jobs: int = 1,
+        max_buffered_rows: int = 100000,
+        tmp_dir_path: str | None = None
+):
+    """
+    Converts several RDF files into one table like convert_ntriples(). The
+    files, and shards of uncompressed N-Triples files, are converted in n_jobs
+    worker processes and their column registries are merged afterwards, so
+    that the rows of a subject described in several files are merged as well.
+    Files which are not in N-Triples format are loaded into a graph.
+
+    The output format is chosen by the file extension of the output file:
+    .parquet or .arrow/.feather write a typed table (float coordinates,
+    numbers and date times), which requires pyarrow and holds the table in
+    memory. All other extensions write a CSV file.
+    """
+    with tempfile.TemporaryDirectory(dir=tmp_dir_path) as dir_path:
+        parts = _get_parts(input_file_paths, n_jobs)
+
+        if n_jobs <= 1 or len(parts) <= 1:
+            converted_parts = [
+                _convert_part(part, dir_path, max_buffered_rows) for part in parts
+            ]
+
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                converted_parts = list(executor.map(
+                    _convert_part,
+                    parts,
+                    [dir_path] * len(parts),
+                    [max_buffered_rows] * len(parts)
+                ))
+
+        column_registry = ColumnRegistry()
+        header: List[str] = []
+        header_set: Set[str] = set()
+        row_streams = []
+
+        for part_idx, part in enumerate(converted_parts):
+            # column ID of the part -> column ID of the merged table
+            column_ids = column_registry.merge(part.column_ids)
+
+            for col in part.header:
+                if column_ids[col] not in header_set:
+                    header_set.add(column_ids[col])
+                    header.append(column_ids[col])
+
+            row_streams.extend(
+                _iter_run_rows(part_idx, file_path, column_ids)
+                for file_path in part.row_file_paths
+            )
+
+        # the coordinates are merged last
+        coordinates = _SortedSpillBuffer(dir_path, max_buffered_rows)
+        geometry_records = _merge_sorted(
+            [
+                _read_run(file_path)
+                for part in converted_parts
+                for file_path in part.geometry_file_paths
+            ],
+            dir_path
+        )
+        has_coordinates = False
+        for cntr, (key, lat, lon) in enumerate(_join_geometries(geometry_records)):
+            coordinates.add((key, len(converted_parts), cntr, {'lat': lat, 'lon': lon}))
+            has_coordinates = True
+
+        if has_coordinates:
+            header.extend(col for col in ('lat', 'lon') if col not in header_set)
+        row_streams.extend(coordinates.get_streams())
+
+        _write_table(header, _merge_rows(_merge_sorted(row_streams, dir_path)), output_file_path)
+
+
+def convert_ntriples(
+        input_file_path: str,
+        output_file_path: str,
+        max_buffered_rows: int = 100000,
+        tmp_dir_path: str | None = None
+):
+    """
+    Converts an N-Triples file (optionally bz2 compressed) like convert(),
+    but streams the triples instead of loading them into a graph. Rows are
+    buffered on disk in sorted runs of at most max_buffered_rows rows, so
+    the memory used does not depend on the size of the input. Inputs sorted
+    by subject, like most dumps, need the fewest merges.
+    """
+    convert_files(
+        [input_file_path],
+        output_file_path,
+        max_buffered_rows=max_buffered_rows,
+        tmp_dir_path=tmp_dir_path
+    )
@@ -1,9 +1,10 @@
-from typing import Set, Dict
+from typing import Set, Dict, List, Tuple
 
 from rdflib import URIRef, Literal
 from rdflib.term import Node
 
 from util import datatypeinferencer
+from util.iriinterner import IRIInterner, IRIID
 from util.property import PropertiesHandler
 from util.type import TypeHandler, TypesHandler
 
@@ -13,56 +14,120 @@ ClassIRI = URIRef
 
 
 class NotFullyTypedStatementsHandler:
-    def __init__(self):
-        self.untyped_resources: Set[ResourceIRI] = set()
-        self.domain_instances: Dict[PropertyIRI, Set[ResourceIRI]] = dict()
-        self.range_instances: Dict[PropertyIRI, Set[ResourceIRI]] = dict()
+    def __init__(self, interner: IRIInterner):
+        self.interner = interner
+
+        # interned IDs of the resources
+        self.untyped_resources: Set[IRIID] = set()
+        # property -> untyped resource -> number of pending statements
+        self.domain_instances: Dict[PropertyIRI, Dict[IRIID, int]] = dict()
+        self.range_instances: Dict[PropertyIRI, Dict[IRIID, int]] = dict()
         self.range_values: Dict[URIRef, Set[Literal]] = dict()
 
+        # (property, type, whether the type is a domain or a range, number of
+        # statements)
+        self.deferred_assignments: List[Tuple[PropertyIRI, ClassIRI, bool, int]] = []
+
     def update_untyped_resource(
             self,
             resource: ResourceIRI,
             type_iri: ClassIRI,
             types_handler: TypesHandler,
             properties_handler: PropertiesHandler
-    ):
-        for property_iri, domain_instances in self.domain_instances.items():
-            if resource in domain_instances:
-                domain_instances.remove(resource)
-                property_domains = properties_handler.get_property(property_iri).domains
-                is_redundant = False
-
-                for p_dom in property_domains:
-                    superclasses = types_handler.superclasses_of.get(p_dom.iri)
-
-                    if superclasses is not None and type_iri in superclasses:
-                        is_redundant = True
-                        break
-
-                if not is_redundant:
-                    domain: TypeHandler = types_handler.get_type(type_iri)
-                    properties_handler.get_property(property_iri).add_domain(domain)
-
-        for property_iri, range_instances in self.range_instances.items():
-            if resource in range_instances:
-                range_instances.remove(resource)
-
-                property_ranges = properties_handler.get_property(property_iri).ranges
-                is_redundant = False
-
-                for p_range in property_ranges:
-                    superclasses = types_handler.superclasses_of.get(p_range.iri)
-
-                    if superclasses is not None and type_iri in superclasses:
-                        is_redundant = True
-                        break
-
-                if not is_redundant:
-                    rnge: TypeHandler = types_handler.get_type(type_iri)
-                    properties_handler.get_property(property_iri).add_range(rnge)
+    ) -> Set[PropertyIRI]:
+        """
+        Assigns the domains and ranges of the pending statements about the
+        given resource, which just got typed, with one unit of support per
+        statement. Returns the IRIs of the properties whose domains or ranges
+        were changed.
+
+        While the class hierarchy is being loaded, the assignments are
+        deferred until assign_deferred() is called after the closure of the
+        hierarchy was computed, so that the redundancy tests are bit tests.
+        """
+        changed_properties: Set[PropertyIRI] = set()
+        resource_id = self.interner.get_id(resource)
+        is_deferred = not types_handler.is_class_closure_computed()
+
+        for is_domain, instances in [(True, self.domain_instances), (False, self.range_instances)]:
+            for property_iri, property_instances in instances.items():
+                num_statements = property_instances.pop(resource_id, None)
+
+                if num_statements is None:
+                    continue
+
+                if is_deferred:
+                    self.deferred_assignments.append(
+                        (property_iri, type_iri, is_domain, num_statements)
+                    )
+
+                elif self._assign(
+                        property_iri,
+                        type_iri,
+                        is_domain,
+                        num_statements,
+                        types_handler,
+                        properties_handler
+                ):
+                    changed_properties.add(property_iri)
+
+        if resource_id in self.untyped_resources:
+            self.untyped_resources.remove(resource_id)
+
+        return changed_properties
+
+    def assign_deferred(
+            self,
+            types_handler: TypesHandler,
+            properties_handler: PropertiesHandler
+    ) -> Set[PropertyIRI]:
+        """
+        Assigns the deferred domains and ranges. Returns the IRIs of the
+        properties whose domains or ranges were changed.
+        """
+        changed_properties: Set[PropertyIRI] = set()
+
+        for property_iri, type_iri, is_domain, num_statements in self.deferred_assignments:
+            if self._assign(
+                    property_iri,
+                    type_iri,
+                    is_domain,
+                    num_statements,
+                    types_handler,
+                    properties_handler
+            ):
+                changed_properties.add(property_iri)
+
+        self.deferred_assignments = []
+
+        return changed_properties
+
+    @staticmethod
+    def _assign(
+            property_iri: PropertyIRI,
+            type_iri: ClassIRI,
+            is_domain: bool,
+            num_statements: int,
+            types_handler: TypesHandler,
+            properties_handler: PropertiesHandler
+    ) -> bool:
+        """
+        Adds the type as domain or range of the property, unless one of the
+        domains or ranges is already a subclass of it
+        """
+        property_ = properties_handler.get_property(property_iri)
+
+        for p_type in property_.domains if is_domain else property_.ranges:
+            if types_handler.is_subclass_of(p_type.iri, type_iri):
+                return False
+
+        type_: TypeHandler = types_handler.get_type(type_iri)
+        if is_domain:
+            property_.add_domain(type_, num_statements)
+        else:
+            property_.add_range(type_, num_statements)
 
-        if resource in self.untyped_resources:
-            self.untyped_resources.remove(resource)
+        return True
 
     def add_statement(
             self,
@@ -76,17 +141,18 @@ class NotFullyTypedStatementsHandler:
         property_ = properties.get_property(p)
 
         if s_type is None:
-            self.untyped_resources.add(s)
+            s_id = self.interner.get_id(s)
+            self.untyped_resources.add(s_id)
             p_dom_instances = self.domain_instances.get(p)
 
             if p_dom_instances is None:
-                self.domain_instances[p] = set()
+                self.domain_instances[p] = dict()
                 p_dom_instances = self.domain_instances.get(p)
 
-            p_dom_instances.add(s)
+            p_dom_instances[s_id] = p_dom_instances.get(s_id, 0) + 1
 
         else:
-            property_.domains.add(s_type)
+            property_.add_domain(s_type)
 
         if isinstance(o, Literal):
             if property_.is_object_property:
@@ -100,7 +166,7 @@ class NotFullyTypedStatementsHandler:
             o_type = types.get_datatype(p, type_iri)
 
             o_type.values.append(o.value)
-            property_.ranges.add(o_type)
+            property_.add_range(o_type)
 
         else:  # object property
             if property_.is_datatype_property:
@@ -116,10 +182,57 @@ class NotFullyTypedStatementsHandler:
                 p_range_instances = self.range_instances.get(p)
 
                 if p_range_instances is None:
-                    self.range_instances[p] = set()
+                    self.range_instances[p] = dict()
                     p_range_instances = self.range_instances.get(p)
 
-                p_range_instances.add(o)
+                o_id = self.interner.get_id(o)
+                p_range_instances[o_id] = p_range_instances.get(o_id, 0) + 1
 
             else:
-                property_.ranges.add(o_type)
+                property_.add_range(o_type)
+
+    def remove_statement(
+            self,
+            s: ResourceIRI,
+            p: PropertyIRI,
+            o: Node,
+            types: TypesHandler,
+            properties: PropertiesHandler
+    ) -> Set[TypeHandler]:
+        """
+        Reverts add_statement for a removed statement, apart from removing
+        literal values, which is left to the caller to do it in bulk. Returns
+        the types which are no domain or range of the property any more.
+        """
+        property_ = properties.get_property(p)
+        dropped_types: Set[TypeHandler] = set()
+
+        s_type: TypeHandler = types.get_type_for_instance(s)
+        if s_type is None:
+            self._remove_pending(s, self.domain_instances.get(p))
+
+        elif property_.remove_domain(s_type):
+            dropped_types.add(s_type)
+
+        if not isinstance(o, Literal):
+            o_type = types.get_type_for_instance(o)
+
+            if o_type is None:
+                self._remove_pending(o, self.range_instances.get(p))
+
+            elif property_.remove_range(o_type):
+                dropped_types.add(o_type)
+
+        return dropped_types
+
+    def _remove_pending(self, resource: ResourceIRI, instances: Dict[IRIID, int] | None) -> None:
+        """Removes one pending statement about the still untyped resource"""
+        resource_id = self.interner.find_id(resource)
+
+        if instances is None or resource_id not in instances:
+            return
+
+        if instances[resource_id] > 1:
+            instances[resource_id] -= 1
+        else:
+            del instances[resource_id]
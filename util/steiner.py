@@ -0,0 +1,745 @@
+"""
+Steiner tree approximation on a compact graph representation.
+
+The graph is stored as compressed sparse rows (CSR) over dense node indices:
+the edges of all nodes are stored in flat arrays and the edges of node i are
+the entries indptr[i]..indptr[i+1]. This avoids the per node and per edge
+objects of a BankGraph.
+
+The solver implements Mehlhorn's 2-approximation: A multi-source Dijkstra
+from all terminals assigns each node to its closest terminal. Every edge
+between the regions of two terminals is a candidate for connecting these
+terminals. The minimum spanning tree of the resulting terminal graph is
+expanded to the shortest paths it represents and, after another minimum
+spanning tree computation, non-terminal leaves are pruned. Edges are treated
+as undirected, i.e. the tree does not need a root from which all terminals
+are reachable (which the BankSolver establishes by adding a pseudo root).
+"""
+import os
+import time
+from heapq import heappop, heappush
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+import numpy as np
+from steiner_tree.bank import BankEdge, BankGraph, BankNode, Solution
+
+from semanticlabeling.labeledcolumn import LabeledColumn
+from util import columnstore
+from util.columnstore import StringTable
+from util.graphbuilder import DEFAULT_EDGE_WEIGHT, EdgeWeights
+
+EdgeTriple = Tuple[str, str, str]
+
+# arrays of a CSRGraph which are stored by CSRGraph.save()
+_ARRAY_NAMES = ('edge_sources', 'edge_targets', 'weights', 'indptr', 'adj_nodes', 'adj_edges')
+
+
+class CSRGraph:
+    """
+    Directed multigraph with string node IDs and edge keys. Besides the
+    edges, an undirected adjacency is kept in CSR format.
+    """
+    def __init__(self, node_ids: Iterable[str], edges: Iterable[Tuple[str, str, str, float]]):
+        self.node_idxs: Dict[str, int] = dict()
+        for node_id in node_ids:
+            self.node_idxs.setdefault(node_id, len(self.node_idxs))
+
+        sources, targets, self.edge_keys, weights = [], [], [], []
+        for source, target, key, weight in edges:
+            sources.append(source)
+            targets.append(target)
+            self.edge_keys.append(key)
+            weights.append(weight)
+
+        node_idxs = self.node_idxs
+        self.edge_sources = np.array(
+            [node_idxs.setdefault(source, len(node_idxs)) for source in sources],
+            dtype=np.int64
+        )
+        self.edge_targets = np.array(
+            [node_idxs.setdefault(target, len(node_idxs)) for target in targets],
+            dtype=np.int64
+        )
+        self.weights = np.array(weights, dtype=np.float64)
+
+        # dicts keep the insertion order, i.e. the order of the indices
+        self.node_ids: List[str] = list(self.node_idxs.keys())
+
+        self._build_adjacency()
+
+    def _build_adjacency(self) -> None:
+        edge_idxs = np.arange(len(self.edge_keys), dtype=np.int64)
+        ends = np.concatenate([self.edge_sources, self.edge_targets])
+        other_ends = np.concatenate([self.edge_targets, self.edge_sources])
+        order = np.argsort(ends, kind='stable')
+
+        # node index i -> adj_nodes/adj_edges[indptr[i]:indptr[i + 1]]
+        self.indptr = np.zeros(len(self.node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=len(self.node_ids)), out=self.indptr[1:])
+        self.adj_nodes = other_ends[order]
+        self.adj_edges = np.concatenate([edge_idxs, edge_idxs])[order]
+
+    @staticmethod
+    def from_columns(
+            labeled_columns: List[LabeledColumn],
+            weights: EdgeWeights | None = None
+    ) -> 'CSRGraph':
+        """
+        Builds the graph of the columns and their links like
+        util.graphbuilder.build(), i.e. columns are identified by their name
+        and links without a weight in weights get the default weight.
+        """
+        columns = [column for column in labeled_columns if column is not None]
+
+        if weights is None:
+            weights = dict()
+
+        return CSRGraph(
+            (column.column_name for column in columns),
+            (
+                (
+                    column.column_name,
+                    target_column.column_name,
+                    link_name,
+                    weights.get(
+                        (column.column_name, link_name, target_column.column_name),
+                        DEFAULT_EDGE_WEIGHT
+                    )
+                )
+                for column in columns
+                for link_name, target_columns in column.iter_links()
+                for target_column in target_columns
+            )
+        )
+
+    @staticmethod
+    def from_bank_graph(graph: BankGraph) -> 'CSRGraph':
+        return CSRGraph(
+            (node.id for node in graph.iter_nodes()),
+            ((e.source, e.target, e.key, e.weight) for e in graph.iter_edges())
+        )
+
+    def save(self, dir_path: str) -> None:
+        os.makedirs(dir_path, exist_ok=True)
+
+        for name in _ARRAY_NAMES:
+            np.save(os.path.join(dir_path, f'{name}.npy'), getattr(self, name))
+
+        columnstore.write_string_table(self.node_ids, dir_path, 'node_ids')
+        columnstore.write_string_table(self.edge_keys, dir_path, 'edge_keys')
+
+    @staticmethod
+    def load(dir_path: str) -> 'CSRGraph':
+        """Loads a graph stored with save(); the arrays are memory-mapped"""
+        graph = CSRGraph.__new__(CSRGraph)
+
+        for name in _ARRAY_NAMES:
+            setattr(graph, name, np.load(os.path.join(dir_path, f'{name}.npy'), mmap_mode='r'))
+
+        graph.node_ids = StringTable(dir_path, 'node_ids').to_list()
+        graph.node_idxs = {node_id: idx for idx, node_id in enumerate(graph.node_ids)}
+        graph.edge_keys = StringTable(dir_path, 'edge_keys').to_list()
+
+        return graph
+
+    def get_num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def get_num_edges(self) -> int:
+        return len(self.edge_keys)
+
+    def get_edge_triple(self, edge_idx: int) -> EdgeTriple:
+        return (
+            self.node_ids[self.edge_sources[edge_idx]],
+            self.node_ids[self.edge_targets[edge_idx]],
+            self.edge_keys[edge_idx]
+        )
+
+    def to_bank_graph(self, edge_idxs: Iterable[int] | None = None) -> BankGraph:
+        """
+        The subgraph consisting of the given edges as BankGraph, or the whole
+        graph if no edges are given
+        """
+        graph = BankGraph()
+
+        if edge_idxs is None:
+            edge_idxs = range(self.get_num_edges())
+
+            for node_id in self.node_ids:
+                graph.add_node(BankNode(node_id))
+
+        for edge_idx in edge_idxs:
+            source, target, key = self.get_edge_triple(edge_idx)
+
+            for node_id in (source, target):
+                if not graph.has_node(node_id):
+                    graph.add_node(BankNode(node_id))
+
+            graph.add_edge(BankEdge(
+                id=-1,
+                source=source,
+                target=target,
+                key=key,
+                weight=float(self.weights[edge_idx]),
+                n_edges=1
+            ))
+
+        return graph
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self._parents = list(range(size))
+
+    def find(self, idx: int) -> int:
+        root = idx
+        while self._parents[root] != root:
+            root = self._parents[root]
+
+        # path compression
+        while self._parents[idx] != root:
+            self._parents[idx], idx = root, self._parents[idx]
+
+        return root
+
+    def union(self, idx1: int, idx2: int) -> bool:
+        root1 = self.find(idx1)
+        root2 = self.find(idx2)
+
+        if root1 == root2:
+            return False
+
+        self._parents[root2] = root1
+
+        return True
+
+
+class _MehlhornSearch:
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+
+        # lists are faster to index in Python than NumPy arrays
+        self._edge_sources: List[int] = graph.edge_sources.tolist()
+        self._edge_targets: List[int] = graph.edge_targets.tolist()
+        self._weights: List[float] = graph.weights.tolist()
+        self._indptr: List[int] = graph.indptr.tolist()
+        self._adj_nodes: List[int] = graph.adj_nodes.tolist()
+        self._adj_edges: List[int] = graph.adj_edges.tolist()
+
+        # with uniform weights, a BFS is sufficient to find shortest paths
+        self._uniform_weight: float | None = None
+        if len(self._weights) > 0 and min(self._weights) == max(self._weights):
+            self._uniform_weight = self._weights[0]
+
+    def get_tree_edges(self, terminals: List[int], excluded_edges: Set[int] = frozenset()) -> List[int]:
+        """The edges of a Steiner tree which does not contain the excluded edges"""
+        graph = self.graph
+
+        if len(terminals) < 2:
+            return []
+
+        closest_terminals, distances, predecessor_edges = self._get_voronoi_regions(
+            terminals,
+            excluded_edges
+        )
+
+        bridges = self._get_bridges(closest_terminals, distances, excluded_edges)
+
+        # expand the minimum spanning tree of the terminal graph to paths
+        path_edges = set()
+        union_find = _UnionFind(graph.get_num_nodes())
+        for terminal1, terminal2, edge_idx in bridges:
+            if not union_find.union(terminal1, terminal2):
+                continue
+
+            path_edges.add(edge_idx)
+            for node in (self._edge_sources[edge_idx], self._edge_targets[edge_idx]):
+                while predecessor_edges[node] != -1:
+                    predecessor_edge = predecessor_edges[node]
+                    path_edges.add(predecessor_edge)
+                    node = self._get_other_node(predecessor_edge, node)
+
+        return self._prune(self._get_minimum_spanning_tree(path_edges), set(terminals))
+
+    def _get_bridges(
+            self,
+            closest_terminals: List[int],
+            distances: List[float],
+            excluded_edges: Set[int]
+    ) -> List[Tuple[int, int, int]]:
+        """
+        Returns the cheapest edge connecting the regions of each pair of
+        terminals as (terminal 1, terminal 2, edge index), ordered by the
+        length of the path between the terminals via the edge.
+        """
+        graph = self.graph
+        closest_terminals = np.array(closest_terminals, dtype=np.int64)
+        distances = np.array(distances, dtype=np.float64)
+
+        source_terminals = closest_terminals[graph.edge_sources]
+        target_terminals = closest_terminals[graph.edge_targets]
+        is_allowed = np.ones(graph.get_num_edges(), dtype=bool)
+        is_allowed[list(excluded_edges)] = False
+        edge_idxs = np.nonzero(
+            (source_terminals != -1)
+            & (target_terminals != -1)
+            & (source_terminals != target_terminals)
+            & is_allowed
+        )[0]
+
+        terminals1 = np.minimum(source_terminals[edge_idxs], target_terminals[edge_idxs])
+        terminals2 = np.maximum(source_terminals[edge_idxs], target_terminals[edge_idxs])
+        path_lengths = distances[graph.edge_sources[edge_idxs]] \
+            + graph.weights[edge_idxs] \
+            + distances[graph.edge_targets[edge_idxs]]
+
+        # the first edge of each terminal pair is the cheapest one
+        order = np.lexsort((edge_idxs, path_lengths, terminals2, terminals1))
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = (np.diff(terminals1[order]) != 0) | (np.diff(terminals2[order]) != 0)
+        cheapest = order[is_first]
+
+        cheapest = cheapest[np.lexsort((
+            edge_idxs[cheapest],
+            terminals2[cheapest],
+            terminals1[cheapest],
+            path_lengths[cheapest]
+        ))]
+
+        return list(zip(
+            terminals1[cheapest].tolist(),
+            terminals2[cheapest].tolist(),
+            edge_idxs[cheapest].tolist()
+        ))
+
+    def _get_voronoi_regions(
+            self,
+            terminals: List[int],
+            excluded_edges: Set[int]
+    ) -> Tuple[List[int], List[float], List[int]]:
+        """
+        Multi-source Dijkstra from all terminals. Returns the closest
+        terminal of each node (-1 if unreachable), the distance to it and the
+        edge on the shortest path towards it. If all edges have the same
+        weight, e.g. the default weight of 1, a breadth-first search is run
+        instead.
+        """
+        indptr = self._indptr
+        adj_nodes = self._adj_nodes
+        adj_edges = self._adj_edges
+        weights = self._weights
+        num_nodes = self.graph.get_num_nodes()
+
+        closest_terminals = [-1] * num_nodes
+        distances = [float('inf')] * num_nodes
+        predecessor_edges = [-1] * num_nodes
+
+        for terminal in terminals:
+            closest_terminals[terminal] = terminal
+            distances[terminal] = 0.
+
+        if self._uniform_weight is not None:
+            weight = self._uniform_weight
+            queue = list(terminals)
+
+            # the queue grows while it is iterated
+            for node in queue:
+                neighbour_distance = distances[node] + weight
+                closest_terminal = closest_terminals[node]
+
+                for neighbour, edge_idx in zip(
+                        adj_nodes[indptr[node]:indptr[node + 1]],
+                        adj_edges[indptr[node]:indptr[node + 1]]
+                ):
+                    if closest_terminals[neighbour] == -1 and edge_idx not in excluded_edges:
+                        distances[neighbour] = neighbour_distance
+                        closest_terminals[neighbour] = closest_terminal
+                        predecessor_edges[neighbour] = edge_idx
+                        queue.append(neighbour)
+
+            return closest_terminals, distances, predecessor_edges
+
+        heap = [(0., terminal) for terminal in terminals]
+
+        while heap:
+            distance, node = heappop(heap)
+
+            if distance > distances[node]:
+                continue
+
+            for neighbour, edge_idx in zip(
+                    adj_nodes[indptr[node]:indptr[node + 1]],
+                    adj_edges[indptr[node]:indptr[node + 1]]
+            ):
+                if edge_idx in excluded_edges:
+                    continue
+
+                neighbour_distance = distance + weights[edge_idx]
+
+                if neighbour_distance < distances[neighbour]:
+                    distances[neighbour] = neighbour_distance
+                    closest_terminals[neighbour] = closest_terminals[node]
+                    predecessor_edges[neighbour] = edge_idx
+                    heappush(heap, (neighbour_distance, neighbour))
+
+        return closest_terminals, distances, predecessor_edges
+
+    def _get_other_node(self, edge_idx: int, node: int) -> int:
+        source = self._edge_sources[edge_idx]
+
+        if source == node:
+            return self._edge_targets[edge_idx]
+
+        return source
+
+    def _get_minimum_spanning_tree(self, edge_idxs: Set[int]) -> List[int]:
+        union_find = _UnionFind(self.graph.get_num_nodes())
+
+        return [
+            edge_idx
+            for edge_idx in sorted(edge_idxs, key=lambda e: (self._weights[e], e))
+            if union_find.union(self._edge_sources[edge_idx], self._edge_targets[edge_idx])
+        ]
+
+    def _prune(self, edge_idxs: List[int], terminals: Set[int]) -> List[int]:
+        """Iteratively removes the edges of non-terminal leaves"""
+        node_edges: Dict[int, Set[int]] = dict()
+        for edge_idx in edge_idxs:
+            for node in (self._edge_sources[edge_idx], self._edge_targets[edge_idx]):
+                node_edges.setdefault(node, set()).add(edge_idx)
+
+        leaves = [
+            node for node, edges in node_edges.items()
+            if len(edges) == 1 and node not in terminals
+        ]
+        removed_edges = set()
+
+        while leaves:
+            leaf = leaves.pop()
+            if len(node_edges[leaf]) != 1:
+                continue
+
+            edge_idx = node_edges[leaf].pop()
+            removed_edges.add(edge_idx)
+
+            other_node = self._get_other_node(edge_idx, leaf)
+            node_edges[other_node].discard(edge_idx)
+            if len(node_edges[other_node]) == 1 and other_node not in terminals:
+                leaves.append(other_node)
+
+        return [edge_idx for edge_idx in edge_idxs if edge_idx not in removed_edges]
+
+    def get_num_components(self, edge_idxs: List[int], terminals: List[int]) -> int:
+        """Number of components the edges partition the terminals into"""
+        union_find = _UnionFind(self.graph.get_num_nodes())
+        for edge_idx in edge_idxs:
+            union_find.union(self._edge_sources[edge_idx], self._edge_targets[edge_idx])
+
+        return len({union_find.find(terminal) for terminal in terminals})
+
+    def get_weight(self, edge_idxs: Iterable[int]) -> float:
+        return sum(self._weights[edge_idx] for edge_idx in edge_idxs)
+
+
+class ReductionStats:
+    """Number of nodes and edges of a graph after each reduction stage"""
+    def __init__(self, num_nodes: int, num_edges: int):
+        self.stages: List[Tuple[str, int, int]] = [('input', num_nodes, num_edges)]
+
+    def add_stage(self, name: str, num_nodes: int, num_edges: int) -> None:
+        self.stages.append((name, num_nodes, num_edges))
+
+    def get_num_nodes(self) -> int:
+        return self.stages[-1][1]
+
+    def get_num_edges(self) -> int:
+        return self.stages[-1][2]
+
+    def __str__(self):
+        return ' -> '.join(
+            f'{num_nodes} nodes/{num_edges} edges ({name})'
+            for name, num_nodes, num_edges in self.stages
+        )
+
+
+class GraphReduction:
+    """
+    A graph reduced by reduce_graph(). Each edge of the reduced graph
+    represents a path of edges of the original graph.
+    """
+    def __init__(self, graph: CSRGraph, edge_paths: List[List[int]], stats: ReductionStats):
+        self.graph = graph
+        self.edge_paths = edge_paths
+        self.stats = stats
+
+    def get_original_edges(self, edge_idxs: Iterable[int]) -> List[int]:
+        return [
+            original_edge_idx
+            for edge_idx in edge_idxs
+            for original_edge_idx in self.edge_paths[edge_idx]
+        ]
+
+
+def _get_neighbours(graph: CSRGraph, node: int) -> Iterator[Tuple[int, int]]:
+    start = graph.indptr[node]
+    end = graph.indptr[node + 1]
+
+    return zip(graph.adj_nodes[start:end].tolist(), graph.adj_edges[start:end].tolist())
+
+
+def reduce_graph(
+        graph: CSRGraph,
+        terminal_nodes: Set[str],
+        max_depth: int | None = None,
+        contract_paths: bool = True
+) -> GraphReduction:
+    """
+    Reduces the graph to the part which is relevant for connecting the
+    terminal nodes in three stages:
+
+    1) Only the nodes which are at most max_depth (undirected) hops away
+       from a terminal are kept. Without max_depth, these are the connected
+       components of the terminals. With max_depth, terminals which are
+       more than 2 * max_depth hops apart may not be connected anymore.
+    2) Non-terminal nodes with a single neighbour are removed iteratively as
+       they cannot be part of a minimal Steiner tree.
+    3) Chains of non-terminal nodes with two neighbours are contracted to
+       single edges, if contract_paths is set. The contracted edges are
+       undirected, i.e. the reduced graph is only suited for solvers
+       treating edges as undirected.
+
+    Only the nodes and edges within max_depth hops of the terminals are
+    visited, so the reduction does not depend on the size of the whole graph.
+    """
+    stats = ReductionStats(graph.get_num_nodes(), graph.get_num_edges())
+    terminals = {
+        graph.node_idxs[node_id] for node_id in terminal_nodes if node_id in graph.node_idxs
+    }
+
+    # 1) BFS balls around the terminals
+    depths = {terminal: 0 for terminal in terminals}
+    queue = sorted(terminals)
+
+    # the queue grows while it is iterated
+    for node in queue:
+        depth = depths[node]
+        if max_depth is not None and depth >= max_depth:
+            continue
+
+        for neighbour, _ in _get_neighbours(graph, node):
+            if neighbour not in depths:
+                depths[neighbour] = depth + 1
+                queue.append(neighbour)
+
+    # node -> neighbour -> edges between them (self loops are never needed)
+    adjacency: Dict[int, Dict[int, List[int]]] = {node: dict() for node in queue}
+    num_edges = 0
+    for node in queue:
+        for neighbour, edge_idx in _get_neighbours(graph, node):
+            if neighbour != node and neighbour in adjacency:
+                adjacency[node].setdefault(neighbour, []).append(edge_idx)
+                num_edges += 1
+
+    # each edge was counted from both ends
+    stats.add_stage('bfs balls', len(adjacency), num_edges // 2)
+
+    # 2) non-terminal leaves
+    leaves = [node for node in queue if len(adjacency[node]) <= 1 and node not in terminals]
+    while leaves:
+        leaf = leaves.pop()
+        if leaf not in adjacency:
+            continue
+
+        for neighbour in adjacency.pop(leaf):
+            del adjacency[neighbour][leaf]
+
+            if len(adjacency[neighbour]) <= 1 and neighbour not in terminals:
+                leaves.append(neighbour)
+
+    stats.add_stage(
+        'leaf pruning',
+        len(adjacency),
+        sum(len(edges) for neighbours in adjacency.values() for edges in neighbours.values()) // 2
+    )
+
+    # 3) chains of nodes with two neighbours
+    weights = graph.weights
+    edges: List[Tuple[int, int, str, float]] = []
+    edge_paths: List[List[int]] = []
+
+    def is_inner(node_: int) -> bool:
+        return contract_paths and len(adjacency[node_]) == 2 and node_ not in terminals
+
+    def get_cheapest_edge(node1: int, node2: int) -> int:
+        return min(adjacency[node1][node2], key=lambda e: (weights[e], e))
+
+    def add_edge(source: int, target: int, path: List[int]) -> None:
+        edges.append((
+            graph.node_ids[source],
+            graph.node_ids[target],
+            ' -> '.join(graph.edge_keys[edge_idx] for edge_idx in path),
+            float(sum(weights[edge_idx] for edge_idx in path))
+        ))
+        edge_paths.append(path)
+
+    contracted = set()
+    for node in adjacency:
+        if not is_inner(node) or node in contracted:
+            continue
+
+        contracted.add(node)
+        chain_ends = []
+        chain_paths = []
+
+        for neighbour in adjacency[node]:
+            previous, current = node, neighbour
+            path = [get_cheapest_edge(previous, current)]
+
+            while is_inner(current) and current != node:
+                contracted.add(current)
+                next_ = next(n for n in adjacency[current] if n != previous)
+                path.append(get_cheapest_edge(current, next_))
+                previous, current = current, next_
+
+            chain_ends.append(current)
+            chain_paths.append(path)
+
+        # cycles without a terminal or other branching node are not needed
+        if chain_ends[0] != chain_ends[1] and node not in chain_ends:
+            add_edge(chain_ends[0], chain_ends[1], chain_paths[0][::-1] + chain_paths[1])
+
+    for node, neighbours in adjacency.items():
+        if node in contracted:
+            continue
+
+        for neighbour, edge_idxs in neighbours.items():
+            if neighbour in contracted:
+                continue
+
+            for edge_idx in edge_idxs:
+                # add each edge once, in its original direction
+                if graph.edge_sources[edge_idx] == node:
+                    edges.append((
+                        graph.node_ids[node],
+                        graph.node_ids[neighbour],
+                        graph.edge_keys[edge_idx],
+                        float(weights[edge_idx])
+                    ))
+                    edge_paths.append([edge_idx])
+
+    reduced_graph = CSRGraph(
+        (graph.node_ids[node] for node in adjacency if node not in contracted),
+        edges
+    )
+
+    if contract_paths:
+        stats.add_stage('path contraction', reduced_graph.get_num_nodes(), reduced_graph.get_num_edges())
+
+    return GraphReduction(reduced_graph, edge_paths, stats)
+
+
+class MehlhornSolver:
+    """
+    Approximates minimum Steiner trees connecting the terminal nodes. Like
+    the BankSolver of the steiner-tree package, the solutions are stored in
+    the solutions attribute. Terminals in different connected components are
+    connected as far as possible, i.e. the solution graphs are forests then.
+    Terminal nodes which are not part of the graph are ignored.
+
+    The graph is reduced with reduce_graph() first, which does not change
+    the solutions: only the components of the terminals are kept, leaves
+    which are no terminals are pruned and paths are contracted. If max_depth
+    is given, only the nodes within max_depth hops of the terminals are
+    kept, so that the solver does not depend on the size of the whole graph.
+    The statistics of the reduction are available in reduction_stats.
+    """
+    def __init__(
+            self,
+            graph: CSRGraph,
+            terminal_nodes: Set[str],
+            max_depth: int | None = None
+    ):
+        self.graph = graph
+        self.terminal_nodes = terminal_nodes
+        self.max_depth = max_depth
+        self.solutions: List[Solution] = []
+        self.reduction_stats: ReductionStats | None = None
+
+    def run(self) -> List[Solution]:
+        """Computes the best solution only"""
+        self.solutions = list(self.iter_solutions(top_k=1))
+
+        return self.solutions
+
+    def iter_solutions(
+            self,
+            top_k: int = 10,
+            time_budget: float | None = None,
+            max_expansions: int | None = None
+    ) -> Iterator[Solution]:
+        """
+        Yields up to top_k alternative solutions, roughly ordered by weight.
+        The first solution is yielded as soon as it is computed. Alternatives
+        are found by excluding one edge of a yielded solution at a time and
+        solving again (one expansion). Once the time budget (in seconds) or
+        the maximal number of expansions is used up, only the alternatives
+        found so far are yielded. The yielded solutions are collected in the
+        solutions attribute.
+        """
+        start_time = time.monotonic()
+        self.solutions = []
+
+        reduction = reduce_graph(self.graph, self.terminal_nodes, self.max_depth)
+        self.reduction_stats = reduction.stats
+        graph = reduction.graph
+
+        terminals = sorted(
+            graph.node_idxs[node_id]
+            for node_id in self.terminal_nodes
+            if node_id in graph.node_idxs
+        )
+        search = _MehlhornSearch(graph)
+
+        tree = search.get_tree_edges(terminals)
+        num_components = search.get_num_components(tree, terminals)
+
+        # (weight, insertion counter, excluded edges, tree edges)
+        candidates = [(search.get_weight(tree), 0, frozenset(), tree)]
+        seen_trees = {frozenset(tree)}
+        num_expansions = 0
+
+        def has_budget() -> bool:
+            if max_expansions is not None and num_expansions >= max_expansions:
+                return False
+
+            return time_budget is None or time.monotonic() - start_time < time_budget
+
+        while candidates and len(self.solutions) < top_k:
+            _, _, excluded_edges, tree = heappop(candidates)
+
+            edge_idxs = reduction.get_original_edges(tree)
+            solution = Solution.from_graph(self.graph.to_bank_graph(edge_idxs))
+            self.solutions.append(solution)
+
+            yield solution
+
+            for edge_idx in tree:
+                if not has_budget():
+                    break
+
+                num_expansions += 1
+                alternative_excluded_edges = excluded_edges | {edge_idx}
+                alternative = search.get_tree_edges(terminals, alternative_excluded_edges)
+
+                alternative_key = frozenset(alternative)
+                if alternative_key in seen_trees \
+                        or search.get_num_components(alternative, terminals) != num_components:
+                    continue
+
+                seen_trees.add(alternative_key)
+                heappush(candidates, (
+                    search.get_weight(alternative),
+                    len(seen_trees),
+                    alternative_excluded_edges,
+                    alternative
+                ))
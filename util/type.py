@@ -1,8 +1,12 @@
-from typing import Set, Dict
+from collections import Counter
+from typing import Set, Dict, Iterable
 
 from rdflib import URIRef
 
 from util import datatypeinferencer
+from util.classhierarchy import ClassHierarchy
+from util.idset import CompactIDSet
+from util.iriinterner import IRIInterner, LocalNameRegistry
 from semanticlabeling.labeledcolumn import TypedIDColumn, LabeledColumn
 
 
@@ -12,20 +16,31 @@ class TypeHandler:
         self.id_ = type_id
 
         self.id_column = TypedIDColumn(type_id)
-        self.instances: Set[URIRef] = set()
+        # interned IDs of the instance IRIs
+        self.instances: CompactIDSet = CompactIDSet()
         self.is_datatype = False
         self.values = []
 
-    def get_id_column(self) -> TypedIDColumn:
-        if not self.is_datatype and self.id_column.min_id_length is None:
-            self.id_column.update_stats()
+    def remove_values(self, values: Iterable) -> None:
+        """
+        Removes one occurrence of each of the given values in a single pass
+        over the values. Values which are not contained are ignored.
+        """
+        removed_cnts = Counter(values)
+        remaining_values = []
+
+        for value in self.values:
+            if removed_cnts.get(value, 0) > 0:
+                removed_cnts[value] -= 1
+            else:
+                remaining_values.append(value)
+
+        self.values = remaining_values
 
+    def get_id_column(self) -> TypedIDColumn:
         return self.id_column
 
     def get_column(self) -> LabeledColumn:
-        if not self.is_datatype and self.id_column.min_id_length is None:
-            self.id_column.update_stats()
-
         if self.is_datatype:
             return datatypeinferencer.get_column(self)
 
@@ -34,54 +49,27 @@ class TypeHandler:
 
 
 class TypesHandler:
-    def __init__(self):
+    def __init__(self, interner: IRIInterner | None = None):
+        self.interner = interner if interner is not None else IRIInterner()
+
         self.types: Dict[URIRef, TypeHandler] = dict()
 
         # property ID -> TypeHandler
         self.datatypes: Dict[str, TypeHandler] = dict()
 
-        self._iri_to_type_id: Dict[URIRef, str] = dict()
-        self._type_id_to_iri: Dict[str, URIRef] = dict()
-        self._iri_to_property_id: Dict[URIRef, str] = dict()
-        self._property_id_to_iri: Dict[str, URIRef] = dict()
+        # the IDs of the classes and of the datatype properties are the names
+        # of their columns, so they share one registry to stay unique, e.g. for
+        # a class and a datatype property with the same local name
+        self.column_ids = LocalNameRegistry(self.interner, separator='_')
 
         self.class_iris: Set[URIRef] = set()
-        self.subclasses_of: Dict[URIRef, Set[URIRef]] = dict()
-        self.superclasses_of: Dict[URIRef, Set[URIRef]] = dict()
+        self.hierarchy = ClassHierarchy(self.interner)
 
     def _get_type_id(self, type_iri: URIRef) -> str:
-        type_id: str = self._iri_to_type_id.get(type_iri)
-
-        if type_id is None:
-            local_part = type_iri.split('/')[-1].split('#')[-1]
-            tmp = local_part[:]
-            cntr = 0
-            while tmp in self._type_id_to_iri.keys():
-                cntr += 1
-                tmp = local_part + f'_{cntr}'
-
-            type_id = tmp
-            self._iri_to_type_id[type_iri] = type_id
-            self._type_id_to_iri[type_id] = type_iri
-
-        return type_id
+        return self.column_ids.get_name(type_iri)
 
     def _get_property_id(self, property_iri: URIRef) -> str:
-        property_id: str = self._iri_to_property_id.get(property_iri)
-
-        if property_id is None:
-            local_part = property_iri.split('/')[-1].split('#')[-1]
-            tmp = local_part[:]
-            cntr = 0
-            while tmp in self._property_id_to_iri.keys():
-                cntr += 1
-                tmp = local_part + f'_{cntr}'
-
-            property_id = tmp
-            self._iri_to_property_id[property_iri] = property_id
-            self._property_id_to_iri[property_id] = property_iri
-
-        return property_id
+        return self.column_ids.get_name(property_iri)
 
     def add_type(self, type_iri: URIRef) -> None:
         if type_iri not in self.types:
@@ -94,6 +82,12 @@ class TypesHandler:
     def add_datatype(self, property_iri: URIRef, datatype_iri: URIRef):
         property_id: str = self._get_property_id(property_iri)
 
+        datatype_ = self.datatypes.get(property_id)
+        if datatype_ is not None and datatype_.iri == datatype_iri:
+            # e.g. the property is declared after statements using it were
+            # processed; replacing the datatype would lose their values
+            return
+
         if datatype_iri in self.class_iris:
             self.class_iris.remove(datatype_iri)
             datatype_ = self.types.pop(datatype_iri)
@@ -132,12 +126,23 @@ class TypesHandler:
             self.add_type(type_iri)
             type_ = self.get_type(type_iri)
 
-        type_.instances.add(instance)
+        type_.instances.add(self.interner.get_id(instance))
+
+    def remove_instance_of_type(self, instance: URIRef, type_iri: URIRef) -> None:
+        type_ = self.types.get(type_iri)
+        instance_id = self.interner.find_id(instance)
+
+        if type_ is not None and instance_id is not None:
+            type_.instances.discard(instance_id)
 
     def get_typed_id_column_for_instance(self, instance: URIRef) -> TypedIDColumn | None:
+        instance_id = self.interner.find_id(instance)
+        if instance_id is None:
+            return None
+
         typed_id_columns = []
         for type_ in self.types.values():
-            if instance in type_.instances:
+            if instance_id in type_.instances:
                 typed_id_columns.append(type_.get_id_column())
 
         assert len(typed_id_columns) <= 1
@@ -148,9 +153,13 @@ class TypesHandler:
             return None
 
     def get_type_for_instance(self, instance: URIRef) -> TypeHandler | None:
+        instance_id = self.interner.find_id(instance)
+        if instance_id is None:
+            return None
+
         types = []
         for type_ in self.types.values():
-            if instance in type_.instances:
+            if instance_id in type_.instances:
                 types.append(type_)
 
         if types:
@@ -165,28 +174,19 @@ class TypesHandler:
         if subclass_iri not in self.class_iris:
             self.add_type(subclass_iri)
 
-        if superclass_iri not in self.superclasses_of:
-            self.superclasses_of[superclass_iri] = set()
-
-        if superclass_iri not in self.subclasses_of:
-            self.subclasses_of[superclass_iri] = set()
-        self.subclasses_of[superclass_iri].add(subclass_iri)
+        self.hierarchy.add_subclass(superclass_iri, subclass_iri)
 
-        if subclass_iri not in self.subclasses_of:
-            self.subclasses_of[subclass_iri] = set()
+    def is_subclass_of(self, subclass_iri: URIRef, superclass_iri: URIRef) -> bool:
+        return self.hierarchy.is_subclass_of(subclass_iri, superclass_iri)
 
-        if subclass_iri not in self.superclasses_of:
-            self.superclasses_of[subclass_iri] = set()
+    def compute_class_closure(self) -> None:
+        self.hierarchy.compute_closure()
 
-        self.superclasses_of[subclass_iri].add(superclass_iri)
+    def is_class_closure_computed(self) -> bool:
+        return self.hierarchy.is_closure_computed()
 
-        # get the superclasses of superclass and assign the subclass to them
-        # as well
-        for sup_cls in self.superclasses_of[superclass_iri]:
-            self.subclasses_of[sup_cls].add(subclass_iri)
-            self.superclasses_of[subclass_iri].add(sup_cls)
+    def get_subclasses_of(self, superclass_iri: URIRef) -> Set[URIRef]:
+        return self.hierarchy.get_subclasses_of(superclass_iri)
 
-        # get the subclasses of subclass and assign superclass to them as well
-        for sub_cls in self.subclasses_of[subclass_iri]:
-            self.superclasses_of[sub_cls].add(superclass_iri)
-            self.subclasses_of[superclass_iri].add(sub_cls)
+    def get_superclasses_of(self, subclass_iri: URIRef) -> Set[URIRef]:
+        return self.hierarchy.get_superclasses_of(subclass_iri)
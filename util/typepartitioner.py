@@ -0,0 +1,319 @@
+"""
+Partitioning of an RDF file into one N-Triples file per type of the subjects.
+
+N-Triples input (optionally bz2 compressed) is streamed twice: the first pass
+only parses the lines containing rdf:type to collect the types of all
+subjects, the second one copies each line to the files of the types of its
+subject, parsing only the subject. Other formats are loaded into a graph once.
+Since a dump may contain more types than files can be open at the same time,
+only the most recently used output files are kept open.
+
+Instead of all subjects, a sample of at most N subjects per type can be
+written. The samples are drawn in the first pass by keeping the N subjects
+with the smallest (seeded) hash per type, so that only the sampled subjects
+are kept in memory and duplicate rdf:type triples, e.g. of concatenated dumps,
+cannot sample a subject twice.
+"""
+import bz2
+import hashlib
+import heapq
+import logging
+import os
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, Iterator, List, Set, Tuple
+
+from rdflib import Graph, RDF, URIRef
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser, decodeUnicodeEscape
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.term import Node
+
+from util.iriinterner import IRIInterner, IRIID, LocalNameRegistry
+
+logger = logging.getLogger(__name__)
+
+TripleCallback = Callable[[Node, Node, Node], None]
+
+
+class _CallbackSink:
+    """Sink of the N-Triples parser handing each triple to a callback"""
+    def __init__(self, triple: TripleCallback):
+        self.triple = triple
+
+
+def _is_ntriples_file(file_path: str) -> bool:
+    return file_path.endswith('.nt') or file_path.endswith('.nt.bz2')
+
+
+class _FilteredReader:
+    """
+    Binary file-like object only reading the lines of a file which contain
+    the given bytes, so that other lines are not parsed at all
+    """
+    def __init__(self, file, needle: bytes):
+        self._file = file
+        self._needle = needle
+
+    def read(self, size: int = -1) -> bytes:
+        lines = []
+        num_bytes = 0
+
+        while size < 0 or num_bytes < size:
+            line = self._file.readline()
+            if not line:
+                break
+
+            if self._needle in line:
+                lines.append(line)
+                num_bytes += len(line)
+
+        return b''.join(lines)
+
+
+def _for_each_triple(
+        source: str | Graph,
+        callback: TripleCallback,
+        only_types: bool = False
+) -> None:
+    """
+    Calls the callback with the triples of the graph or N-Triples file. If
+    only_types is set, at least all rdf:type triples are passed.
+    """
+    if isinstance(source, Graph):
+        triples = source.triples((None, RDF.type, None)) if only_types else source
+        for s, p, o in triples:
+            callback(s, p, o)
+
+    else:
+        open_input = bz2.open if source.endswith('.bz2') else open
+
+        with open_input(source, 'rb') as input_file:
+            if only_types:
+                input_file = _FilteredReader(input_file, f'<{RDF.type}>'.encode())
+
+            W3CNTriplesParser(sink=_CallbackSink(callback)).parse(input_file)
+
+
+def _iter_subject_lines(file_path: str) -> Iterator[Tuple[URIRef | None, bytes]]:
+    """
+    Yields the lines of an N-Triples file with their subject IRI, or None for
+    blank node subjects, comments and empty lines. Only the subjects are
+    parsed, so that the lines can be copied as they are.
+    """
+    open_input = bz2.open if file_path.endswith('.bz2') else open
+
+    with open_input(file_path, 'rb') as input_file:
+        for line in input_file:
+            subject = None
+
+            if line.startswith(b'<'):
+                iri = line[1:line.index(b'>')].decode('utf-8')
+                if '\\' in iri:
+                    iri = decodeUnicodeEscape(iri)
+
+                subject = URIRef(iri)
+
+            if not line.endswith(b'\n'):
+                line += b'\n'
+
+            yield subject, line
+
+
+class _TypeWriters:
+    """
+    Appends N-Triples lines to the files of the types, keeping at most
+    max_open_files files open
+    """
+    def __init__(self, dir_path: str, max_open_files: int):
+        self._dir_path = dir_path
+        self._max_open_files = max_open_files
+        self._names = LocalNameRegistry(IRIInterner())
+
+        self._files: OrderedDict[URIRef, BinaryIO] = OrderedDict()
+        self.file_paths: Dict[URIRef, str] = dict()
+        self.num_triples: Dict[URIRef, int] = dict()
+
+    def write(self, type_iri: URIRef, line: bytes) -> None:
+        file = self._files.get(type_iri)
+
+        if file is None:
+            if len(self._files) >= self._max_open_files:
+                _, least_recently_used_file = self._files.popitem(last=False)
+                least_recently_used_file.close()
+
+            file_path = self.file_paths.get(type_iri)
+            if file_path is None:
+                file_path = os.path.join(self._dir_path, self._names.get_name(type_iri) + '.nt')
+                self.file_paths[type_iri] = file_path
+                self.num_triples[type_iri] = 0
+                file = open(file_path, 'wb')
+            else:
+                file = open(file_path, 'ab')
+
+            self._files[type_iri] = file
+
+        else:
+            self._files.move_to_end(type_iri)
+
+        file.write(line)
+        self.num_triples[type_iri] += 1
+
+    def close(self) -> None:
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+
+class _TypeReservoirs:
+    """
+    Uniform random samples of at most max_subjects distinct subjects per type,
+    drawn in a single pass (bottom-k sampling): each subject gets a priority
+    from a hash of its IRI keyed by the seed, and the subjects with the
+    smallest priorities are kept. A repeated subject gets the same priority,
+    so it is either already in the sample or rejected again.
+    """
+    def __init__(self, max_subjects: int, seed: int):
+        self._max_subjects = max_subjects
+        self._key = seed.to_bytes(8, 'little', signed=True)
+
+        self.subjects: Dict[URIRef, Set[URIRef]] = dict()
+        # max-heaps of the sampled subjects by priority
+        self._heaps: Dict[URIRef, List[Tuple[int, URIRef]]] = dict()
+
+    def _get_priority(self, subject: URIRef) -> int:
+        digest = hashlib.blake2b(subject.encode('utf-8'), digest_size=8, key=self._key).digest()
+
+        return int.from_bytes(digest, 'little')
+
+    def add(self, subject: URIRef, type_iri: URIRef) -> None:
+        reservoir = self.subjects.get(type_iri)
+        if reservoir is None:
+            reservoir = set()
+            self.subjects[type_iri] = reservoir
+            self._heaps[type_iri] = []
+
+        if subject in reservoir:
+            return
+
+        heap = self._heaps[type_iri]
+        priority = self._get_priority(subject)
+
+        if len(heap) < self._max_subjects:
+            heapq.heappush(heap, (-priority, subject))
+            reservoir.add(subject)
+
+        elif heap and priority < -heap[0][0]:
+            _, evicted_subject = heapq.heapreplace(heap, (-priority, subject))
+            reservoir.remove(evicted_subject)
+            reservoir.add(subject)
+
+    def get_num_subjects(self, type_iri: URIRef) -> int:
+        """
+        Returns the number of distinct subjects of the type, which is
+        estimated from the largest sampled priority once the sample is full
+        """
+        heap = self._heaps.get(type_iri, [])
+
+        if not heap or len(heap) < self._max_subjects:
+            return len(heap)
+
+        return round((self._max_subjects - 1) / ((-heap[0][0] + 1) / 2 ** 64))
+
+
+def partition_by_type(
+        input_file_path: str,
+        output_dir_path: str,
+        max_open_files: int = 256,
+        max_subjects_per_type: int | None = None,
+        seed: int = 0
+) -> Dict[URIRef, str]:
+    """
+    Writes the triples of each typed subject to the N-Triples files of its
+    types in output_dir_path and returns the file paths per type. Triples of
+    blank nodes and untyped subjects are skipped.
+
+    If max_subjects_per_type is given, only a sample of at most that many
+    subjects is written per type, with all their triples. The samples are
+    drawn with the given seed and only they are kept in memory.
+    """
+    if _is_ntriples_file(input_file_path):
+        source = input_file_path
+    else:
+        source = Graph()
+        source.parse(input_file_path)
+        logger.info(f'Parsed graph with {len(source)} triples')
+
+    interner = IRIInterner()
+    # interned subject IRI -> the types whose files its triples are written to
+    subject_types: Dict[IRIID, Tuple[URIRef, ...]] = dict()
+    # the same type object is shared by all subjects
+    type_iris: Dict[URIRef, URIRef] = dict()
+
+    def add_subject_type(subject: URIRef, type_iri: URIRef) -> None:
+        subject_id = interner.get_id(subject)
+        types = subject_types.get(subject_id, ())
+
+        if type_iri not in types:
+            subject_types[subject_id] = types + (type_iri,)
+
+    reservoirs = None
+    if max_subjects_per_type is not None:
+        reservoirs = _TypeReservoirs(max_subjects_per_type, seed)
+
+    def add_type(s: Node, p: Node, o: Node) -> None:
+        if p != RDF.type or not isinstance(s, URIRef) or not isinstance(o, URIRef):
+            return
+
+        type_iri = type_iris.setdefault(o, o)
+
+        if reservoirs is None:
+            add_subject_type(s, type_iri)
+        else:
+            reservoirs.add(s, type_iri)
+
+    _for_each_triple(source, add_type, only_types=True)
+
+    if reservoirs is not None:
+        for type_iri, subjects in reservoirs.subjects.items():
+            logger.info(
+                f'Sampled {len(subjects)} of about {reservoirs.get_num_subjects(type_iri)} '
+                f'subjects of {type_iri}'
+            )
+            for subject in subjects:
+                add_subject_type(subject, type_iri)
+
+    logger.info(f'Found {len(subject_types)} subjects of {len(type_iris)} types')
+
+    if isinstance(source, Graph):
+        lines = (
+            (s if isinstance(s, URIRef) else None, _nt_row((s, p, o)).encode('utf-8'))
+            for s, p, o in source
+        )
+    else:
+        # the lines are copied without parsing the predicates and objects
+        lines = _iter_subject_lines(source)
+
+    os.makedirs(output_dir_path, exist_ok=True)
+    writers = _TypeWriters(output_dir_path, max_open_files)
+
+    try:
+        for cntr, (subject, line) in enumerate(lines, start=1):
+            if cntr % 100000 == 0:
+                logger.info(f'{cntr} triples processed')
+
+            if subject is None:
+                continue
+
+            subject_id = interner.find_id(subject)
+            if subject_id is None:
+                continue
+
+            for type_iri in subject_types.get(subject_id, ()):
+                writers.write(type_iri, line)
+
+    finally:
+        writers.close()
+
+    for type_iri, num_triples in writers.num_triples.items():
+        logger.info(f'Wrote {num_triples} triples of {type_iri}')
+
+    return writers.file_paths